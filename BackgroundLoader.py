@@ -0,0 +1,60 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Runs an expensive load function at most once, in a background thread, so a server can
+# boot and answer requests while the data is still being prepared. start() begins the load
+# without waiting; get() waits for it, starting it first when nothing did (lazy loading).
+class BackgroundLoader:
+    def __init__(self, load, name='background-loader'):
+        self._load = load
+        self.name = name
+        self._lock = threading.Lock()
+        self._thread = None
+        self._done = threading.Event()
+        self._value = None
+        self.error = None
+        self.seconds = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    # True once the load finished, successfully or not
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def get(self, timeout=None):
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f'{self.name} is still loading')
+        if self.error is not None:
+            raise self.error
+        return self._value
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self._value = self._load()
+        except Exception as e:
+            logger.exception('%s failed', self.name)
+            self.error = e
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+        if self.error is None:
+            logger.info('%s finished in %.2fs', self.name, self.seconds)
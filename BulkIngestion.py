@@ -0,0 +1,108 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+from DataIngestion import CSVDataIngestion, JSONDataIngestion, XMLDataIngestion, expand_paths
+
+
+# Outcome of loading one file
+class FileReport:
+    def __init__(self, path, strategy, seconds, rows=0, error=None):
+        self.path = path
+        self.strategy = strategy
+        self.seconds = seconds
+        self.rows = rows
+        self.error = error
+
+    def __repr__(self):
+        status = f'error={self.error!r}' if self.error else f'rows={self.rows}'
+        return f'FileReport({self.path!r}, {self.strategy}, {self.seconds:.3f}s, {status})'
+
+
+class BulkIngestionResult:
+    def __init__(self, data, files, seconds):
+        self.data = data
+        self.files = files
+        self.seconds = seconds
+
+    @property
+    def failures(self):
+        return [report for report in self.files if report.error is not None]
+
+
+# Runs in the worker; must stay a top-level function so process pools can pickle it
+def _load_file(path, strategy, schema):
+    start = time.perf_counter()
+    try:
+        data = strategy.ingest_data(path)
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        # Strategies that do not type their output themselves get the schema applied here
+        if schema is not None and getattr(strategy, 'schema', None) is None:
+            data = schema.apply(data)
+    except Exception as e:
+        return None, FileReport(path, type(strategy).__name__, time.perf_counter() - start, error=repr(e))
+    return data, FileReport(path, type(strategy).__name__, time.perf_counter() - start, rows=len(data))
+
+
+# Concatenate frames so categorical columns stay categorical with the union of all categories
+def concat_frames(frames):
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame()
+    categorical = {
+        col for frame in frames for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)
+    }
+    for col in categorical:
+        categories = pd.Index(sorted(set().union(*(
+            frame[col].cat.categories if isinstance(frame[col].dtype, pd.CategoricalDtype) else frame[col].dropna().unique()
+            for frame in frames if col in frame.columns
+        ))))
+        frames = [
+            frame.assign(**{col: pd.Categorical(frame[col], categories=categories)}) if col in frame.columns else frame
+            for frame in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+# Loads many files in parallel, picking the ingestion strategy by file extension.
+# Use processes for CPU-bound parsing of many large files, threads for many small ones.
+class BulkDataIngestion:
+    def __init__(self, schema=None, strategies=None, max_workers=None, use_processes=False):
+        self.schema = schema
+        self.strategies = strategies or {
+            '.csv': CSVDataIngestion(schema=schema),
+            '.json': JSONDataIngestion(schema=schema),
+            '.jsonl': JSONDataIngestion(lines=True, schema=schema),
+            '.ndjson': JSONDataIngestion(lines=True, schema=schema),
+            '.xml': XMLDataIngestion(field_map=schema.xml_field_map() if schema is not None else None, schema=schema),
+        }
+        self.max_workers = max_workers or os.cpu_count()
+        self.use_processes = use_processes
+
+    # Globs and directories expand to their files with a known extension; files named
+    # explicitly are kept whatever their extension, so ingest() reports the unsupported ones
+    def expand(self, paths):
+        return expand_paths(paths, self.strategies)
+
+    @staticmethod
+    def _extension(path):
+        return os.path.splitext(path)[1].lower()
+
+    def ingest(self, paths):
+        start = time.perf_counter()
+        files = self.expand(paths)
+        unsupported = {
+            path: FileReport(path, None, 0.0, error=repr(ValueError(f'No ingestion strategy for {path!r}')))
+            for path in files if self._extension(path) not in self.strategies
+        }
+        supported = [path for path in files if path not in unsupported]
+        strategies = [self.strategies[self._extension(path)] for path in supported]
+
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=max(1, min(self.max_workers, len(supported) or 1))) as executor:
+            loaded = dict(zip(supported, executor.map(_load_file, supported, strategies, [self.schema] * len(supported))))
+
+        frames = [loaded[path][0] for path in supported]
+        reports = [unsupported[path] if path in unsupported else loaded[path][1] for path in files]
+        return BulkIngestionResult(concat_frames(frames), reports, time.perf_counter() - start)
@@ -0,0 +1,113 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from ReportCache import frame_fingerprint
+from SalesCube import SalesCube
+
+FILTER_DIMENSIONS = ['Country', 'Product', 'Segment']
+
+
+# Serves filtered views of one frame for interactive filters. Each filter dimension is held as
+# categorical codes and the dates as int64, so a selection becomes a few boolean array
+# lookups instead of string comparisons. Aggregated reports go through a SalesCube slice,
+# which stays small however many rows the frame has.
+class CrossFilter:
+    def __init__(self, data, cube: SalesCube = None, dimensions=FILTER_DIMENSIONS, row_columns=None):
+        self.data = data
+        # Columns row-level reports need; fewer columns make the masked copy cheaper
+        self.row_columns = list(row_columns) if row_columns is not None else list(data.columns)
+        # Built per day by default so date ranges from a day picker are matched exactly
+        self.cube = cube if cube is not None else SalesCube.from_frame(data, granularity='day')
+        self.dimensions = list(dimensions)
+        self._categories = {}
+        self._codes = {}
+        for dimension in self.dimensions:
+            values = data[dimension]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            self._categories[dimension] = values.cat.categories
+            self._codes[dimension] = values.cat.codes.to_numpy()
+        dates = data['Date'] if pd.api.types.is_datetime64_any_dtype(data['Date']) else pd.to_datetime(data['Date'])
+        self._dates = dates.to_numpy(dtype='datetime64[ns]')
+        self._fingerprint = None
+
+    # Fingerprint of a selection of this data, to key what is derived from it (figures).
+    # The data is hashed once; selections are normalized so equal selections match.
+    def fingerprint(self, selections=None, start=None, end=None):
+        if self._fingerprint is None:
+            self._fingerprint = frame_fingerprint(self.data)
+        selections = sorted((dimension, sorted(values)) for dimension, values in (selections or {}).items() if values)
+        bounds = [pd.Timestamp(bound).isoformat() if bound is not None else None for bound in (start, end)]
+        return hashlib.sha1(repr((self._fingerprint, selections, bounds)).encode()).hexdigest()
+
+    def options(self, dimension):
+        return self._categories[dimension].tolist()
+
+    def date_bounds(self):
+        return pd.Timestamp(np.nanmin(self._dates)), pd.Timestamp(np.nanmax(self._dates))
+
+    # Boolean row mask of a selection, or None when nothing is filtered
+    def mask(self, selections=None, start=None, end=None):
+        mask = None
+        for dimension, values in (selections or {}).items():
+            if not values:
+                continue
+            categories = self._categories[dimension]
+            # One extra False slot so missing values (code -1) never match
+            allowed = np.zeros(len(categories) + 1, dtype=bool)
+            indexer = categories.get_indexer(list(values))
+            allowed[indexer[indexer >= 0]] = True
+            selected = allowed[self._codes[dimension]]
+            mask = selected if mask is None else mask & selected
+        for bound, compare in ((start, np.greater_equal), (end, np.less_equal)):
+            if bound is None:
+                continue
+            selected = compare(self._dates, np.datetime64(pd.Timestamp(bound), 'ns'))
+            mask = selected if mask is None else mask & selected
+        return mask
+
+    # Rows of the given columns matching the selection
+    def rows(self, columns, selections=None, start=None, end=None):
+        view = self.data[columns]
+        mask = self.mask(selections, start, end)
+        return view if mask is None else view[mask]
+
+    # Cube cells matching the selection. Dates are matched at the cube's granularity: a
+    # period is kept when it overlaps the range.
+    def cube_slice(self, selections=None, start=None, end=None):
+        selections = {dimension: values for dimension, values in (selections or {}).items() if values}
+        if not selections and start is None and end is None:
+            return self.cube
+        if start is not None:
+            start = pd.Timestamp(start).to_period('M' if self.cube.granularity == 'month' else 'D').start_time
+        return self.cube.filter(selections, start, end)
+
+    # Whether the cube's periods cover exactly the days from start to end: always for a
+    # daily cube, only for ranges of whole months for a monthly one
+    def cube_matches(self, start=None, end=None):
+        if self.cube.granularity == 'day':
+            return True
+        return ((start is None or pd.Timestamp(start).normalize().is_month_start)
+                and (end is None or pd.Timestamp(end).normalize().is_month_end))
+
+    # Run every strategy on the selection: from the cube slice when the strategy can be
+    # answered from it, otherwise from the masked rows. Each source is sliced at most once.
+    # When the cube cannot match the date range exactly every report reads the rows, so
+    # cube and row reports always cover the same days.
+    def reports(self, strategies, selections=None, start=None, end=None):
+        cube = rows = None
+        use_cube = self.cube_matches(start, end)
+        results = []
+        for strategy in strategies:
+            if use_cube:
+                if cube is None:
+                    cube = self.cube_slice(selections, start, end)
+                try:
+                    results.append(strategy.process_cube(cube))
+                    continue
+                except NotImplementedError:
+                    pass
+            if rows is None:
+                rows = self.rows(self.row_columns if use_cube else list(self.data.columns), selections, start, end)
+            results.append(strategy.process_data(rows))
+        return results
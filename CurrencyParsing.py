@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Money columns of the Financials format
+MONEY_COLUMNS = ['Units Sold', 'Manufacturing Price', 'Sale Price', 'Gross Sales', 'Discounts', 'Sales', 'COGS', 'Profit']
+
+
+# Vectorized money/number normalizer for a whole column.
+# "$1,618.50 " -> 1618.5, "($880.00)" -> -880.0, " $-   " / "" / missing -> NaN
+def parse_currency(values):
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        return values.astype('float64', copy=False)
+
+    # ERP money columns repeat the same few prices and totals, so only the distinct
+    # strings are parsed and the results are broadcast back through the codes
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    # Nothing to parse (no rows, or only missing values); np.char fails on empty arrays
+    if len(uniques) == 0:
+        return pd.Series(np.full(len(values), np.nan), index=values.index, name=values.name)
+    text = np.asarray(uniques).astype(str)
+    text = np.char.strip(np.char.replace(np.char.replace(text, '$', ''), ',', ''))
+
+    # Accounting style negatives are wrapped in parentheses
+    negative = np.char.startswith(text, '(') & np.char.endswith(text, ')')
+    text = np.char.strip(text, '()')
+
+    # Blanks and the lone '-' placeholder are not numbers and become NaN
+    numbers = pd.to_numeric(text, errors='coerce').astype('float64')
+    numbers[negative] = -numbers[negative]
+
+    parsed = numbers.take(codes)
+    parsed[codes < 0] = np.nan
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+
+# Parse several money columns at once and return them as a new frame, leaving the input untouched
+def parse_currency_columns(data, columns):
+    if not data.columns.is_unique:
+        return data[columns].apply(parse_currency)
+    # Build the result column by column so only the parsed columns are ever materialized
+    return pd.DataFrame({col: parse_currency(data[col]) for col in columns}, index=data.index)
+
+
+# Legacy per-cell converter, kept as the reference implementation for benchmarks
+def convert_currency(val):
+    try:
+        val = val.replace(',', '').replace('$', '')
+        return float(val) if val.strip() != '' and val.strip() != '-' else np.nan
+    except Exception:
+        return np.nan
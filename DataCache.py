@@ -0,0 +1,124 @@
+import hashlib
+import os
+import tempfile
+from importlib.util import find_spec
+import pandas as pd
+from DataIngestion import DataIngestionStrategy
+from Instrumentation import stage
+
+# Bump when the on-disk layout changes so old entries are never read back
+CACHE_FORMAT_VERSION = 1
+
+# Feather keeps the typed columns (categoricals, datetime64) and reads them back without
+# parsing, but needs pyarrow; without it the cache falls back to pickle files.
+HAS_PYARROW = find_spec('pyarrow') is not None
+
+
+# Uncompressed so the warm read is a plain read of the column buffers, with nothing to
+# decompress; to_pandas() then copies them into the frame's blocks
+def _write_feather(data, file_path):
+    data.reset_index(drop=True).to_feather(file_path, compression='uncompressed')
+
+
+def _read_feather(file_path):
+    from pyarrow import feather
+    return feather.read_table(file_path).to_pandas()
+
+
+CACHE_FORMATS = {
+    'feather': ('.feather', _write_feather, _read_feather),
+    'pickle': ('.pkl', lambda data, file_path: data.to_pickle(file_path), pd.read_pickle),
+}
+
+
+# On-disk store of parsed frames keyed by the source file's path, mtime, size and the
+# version of the schema it was parsed with. Entries of a changed source are dropped.
+class DatasetCache:
+    def __init__(self, cache_dir='.cache/datasets', cache_format=None):
+        self.cache_dir = cache_dir
+        self.cache_format = cache_format or ('feather' if HAS_PYARROW else 'pickle')
+        if self.cache_format not in CACHE_FORMATS:
+            raise ValueError(f'Unknown cache format: {self.cache_format}')
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, file_path, schema_version=0):
+        source = os.path.abspath(file_path)
+        stat = os.stat(source)
+        source_key = hashlib.sha1(source.encode()).hexdigest()[:16]
+        version_key = hashlib.sha1(
+            f'{stat.st_mtime_ns}|{stat.st_size}|{schema_version}|{CACHE_FORMAT_VERSION}'.encode()
+        ).hexdigest()[:16]
+        extension = CACHE_FORMATS[self.cache_format][0]
+        return os.path.join(self.cache_dir, f'{source_key}-{version_key}{extension}')
+
+    def load(self, file_path, schema_version=0):
+        entry = self.entry_path(file_path, schema_version)
+        if not os.path.exists(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CACHE_FORMATS[self.cache_format][2](entry)
+
+    def store(self, file_path, data, schema_version=0):
+        entry = self.entry_path(file_path, schema_version)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file and rename it, so concurrent readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(handle)
+        try:
+            CACHE_FORMATS[self.cache_format][1](data, temp_path)
+            os.replace(temp_path, entry)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._remove_stale(entry)
+        return entry
+
+    # Drop older entries of the same source file
+    def _remove_stale(self, entry):
+        name = os.path.basename(entry)
+        source_key = name.split('-')[0]
+        for other in os.listdir(self.cache_dir):
+            if other != name and other.startswith(source_key + '-'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, other))
+                except FileNotFoundError:
+                    # Another process already cleaned it up
+                    pass
+
+
+# Ingestion strategy decorator that serves parsed frames from a DatasetCache and only
+# falls through to the wrapped strategy when the source changed or was never cached.
+class CachedDataIngestion(DataIngestionStrategy):
+    def __init__(self, strategy: DataIngestionStrategy, cache: DatasetCache = None):
+        self.strategy = strategy
+        self.cache = cache or DatasetCache()
+
+    def _schema_version(self):
+        schema = getattr(self.strategy, 'schema', None)
+        version = schema.version if schema is not None else 0
+        # Decorators changing the representation (CompactDataIngestion) add a tag of their own
+        tag = getattr(self.strategy, 'cache_tag', None)
+        return version if tag is None else f'{version}|{tag}'
+
+    def ingest_data(self, file_path):
+        with stage('cache_load'):
+            data = self.cache.load(file_path, self._schema_version())
+        if data is None:
+            with stage(type(self.strategy).__name__):
+                data = self.strategy.ingest_data(file_path)
+            with stage('cache_store'):
+                self.cache.store(file_path, data, self._schema_version())
+        return data
+
+    # Streaming reads bypass the cache; they exist for files that do not fit in memory
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        return self.strategy.ingest_chunks(file_path, chunksize, end)
+
+    def ingest_appended(self, file_path, offset, chunksize, end=None):
+        return self.strategy.ingest_appended(file_path, offset, chunksize, end)
+
+    def record_end(self, file_path, offset, size):
+        return self.strategy.record_end(file_path, offset, size)
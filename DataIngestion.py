@@ -1,7 +1,82 @@
+import glob
+import io
+import os
 import pandas as pd
 import json
 import xml.etree.ElementTree as et
 from abc import ABC, abstractmethod
+from CurrencyParsing import parse_currency
+from Instrumentation import count_rows, stage
+
+# Files a list of source paths stands for, as absolute paths without duplicates: files named
+# explicitly as given (even missing ones, so callers can report them), the files of a
+# directory (hidden and temporary files skipped) and the files matching glob patterns.
+# With `extensions`, directory listings and glob matches keep only files with one of them.
+def expand_paths(paths, extensions=None):
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                       if not name.startswith('.') and not name.endswith('.tmp')]
+        elif glob.has_magic(path):
+            matches = sorted(glob.glob(path))
+        else:
+            files.append(path)
+            continue
+        files.extend(match for match in matches if not os.path.isdir(match) and (
+            extensions is None or os.path.splitext(match)[1].lower() in extensions))
+    return list(dict.fromkeys(os.path.abspath(path) for path in files))
+
+
+# Size of the blocks scanned backwards for the last complete line
+LINE_SCAN_BYTES = 65536
+
+
+# Byte position just after the last newline in [offset, size), or offset when there is none:
+# where the complete lines of a file still being appended to end
+def last_line_end(file_path, offset, size):
+    with open(file_path, 'rb') as file:
+        position = size
+        while position > offset:
+            start = max(offset, position - LINE_SCAN_BYTES)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return offset
+
+
+# Raw binary reader over the bytes [offset, end) of a file
+class _FileRange(io.RawIOBase):
+    def __init__(self, file, end):
+        self._file = file
+        self._left = end - file.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._left)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._left -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+# Binary file positioned at offset that ends at byte end (the end of the file when None)
+def open_range(file_path, offset=0, end=None):
+    file = open(file_path, 'rb')
+    file.seek(offset)
+    return file if end is None else io.BufferedReader(_FileRange(file, end))
+
 
 # Interface for data ingestion
 class DataIngestionStrategy(ABC):
@@ -9,34 +84,252 @@ class DataIngestionStrategy(ABC):
     def ingest_data(self, file_path):
         pass
 
+    # Yield the data as frames of at most chunksize rows. Strategies that cannot
+    # stream their format fall back to a single chunk holding the whole file.
+    # end stops line-based formats at that byte offset (see record_end); documents are
+    # always read whole.
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        yield self.ingest_data(file_path)
+
+    # Yield only the records appended after byte offset, which must fall on a record
+    # boundary, and before end when given. Formats without appendable records cannot do this.
+    def ingest_appended(self, file_path, offset, chunksize, end=None):
+        raise NotImplementedError(f'{type(self).__name__} cannot read appended records')
+
+    # Where the complete records between offset and size end: a writer may be halfway
+    # through the last one. Documents are only complete as a whole, so their size.
+    def record_end(self, file_path, offset, size):
+        return size
+
 # Concrete class for CSV data ingestion
 class CSVDataIngestion(DataIngestionStrategy):
+    def __init__(self, currency_columns=None, schema=None):
+        # Optional money columns to normalize into floats right after reading
+        self.currency_columns = currency_columns or []
+        # Optional DataSchema; when given the file is read straight into typed columns
+        self.schema = schema
+
     def ingest_data(self, file_path):
-        return pd.read_csv(file_path)
+        with stage('read'):
+            data = pd.read_csv(file_path, dtype=self._dtypes())
+        with stage('convert', rows_in=len(data)):
+            return self._convert(data)
+
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        with open_range(file_path, 0, end) as file:
+            with pd.read_csv(file, dtype=self._dtypes(), chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield self._convert(chunk)
+
+    def ingest_appended(self, file_path, offset, chunksize, end=None):
+        columns = pd.read_csv(file_path, nrows=0).columns
+        end = os.path.getsize(file_path) if end is None else end
+        if end <= offset:
+            return
+        with open_range(file_path, offset, end) as file:
+            with pd.read_csv(file, header=None, names=columns, dtype=self._dtypes(), chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield self._convert(chunk)
+
+    def record_end(self, file_path, offset, size):
+        return last_line_end(file_path, offset, size)
+
+    def _dtypes(self):
+        return self.schema.read_dtypes() if self.schema is not None else None
+
+    def _convert(self, data):
+        if self.schema is not None:
+            return self.schema.apply(data)
+        for col in self.currency_columns:
+            data[col] = parse_currency(data[col])
+        return data
 
-# Concrete class for JSON data ingestion
+# Concrete class for JSON data ingestion.
+# Returns a DataFrame like the other strategies. Nested records are flattened into dotted
+# column names ('Pricing.Sale Price'); with a schema, a flattened name whose last part is a
+# schema column is renamed to it. Line-delimited JSON (lines=True) is streamed in chunks.
 class JSONDataIngestion(DataIngestionStrategy):
+    def __init__(self, lines=False, record_path=None, schema=None):
+        self.lines = lines
+        # Key (or list of keys) leading to the list of records inside a JSON document
+        self.record_path = record_path
+        # Optional DataSchema applied to every parsed frame
+        self.schema = schema
+
     def ingest_data(self, file_path):
-        with open(file_path, 'r') as file:
-            return json.load(file)
+        if self.lines:
+            frames = list(self.ingest_chunks(file_path, 100_000))
+            return pd.concat(frames, ignore_index=True) if frames else self._frame([])
+        with stage('parse'), open(file_path, 'r') as file:
+            document = json.load(file)
+        with stage('frame'):
+            return self._frame(document)
+
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        if not self.lines:
+            yield self.ingest_data(file_path)
+            return
+        with open_range(file_path, 0, end) as file:
+            yield from self._read_lines(file, chunksize)
+
+    def ingest_appended(self, file_path, offset, chunksize, end=None):
+        if not self.lines:
+            return super().ingest_appended(file_path, offset, chunksize, end)
+        return self._appended_lines(file_path, offset, chunksize, end)
+
+    def record_end(self, file_path, offset, size):
+        return last_line_end(file_path, offset, size) if self.lines else size
+
+    def _appended_lines(self, file_path, offset, chunksize, end):
+        with open_range(file_path, offset, end) as file:
+            yield from self._read_lines(file, chunksize)
+
+    def _read_lines(self, file, chunksize):
+        records = []
+        for line in file:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) >= chunksize:
+                yield self._frame(records)
+                records = []
+        if records:
+            yield self._frame(records)
 
-# Placeholder concrete class for XML data ingestion
+    def _frame(self, document):
+        if self.record_path is not None:
+            for key in [self.record_path] if isinstance(self.record_path, str) else self.record_path:
+                document = document[key]
+        if isinstance(document, dict):
+            document = [document]
+
+        # Flat records are built directly; json_normalize is several times slower and only
+        # used when a column holds nested objects (judged by its first non-null value)
+        data = pd.DataFrame.from_records(document)
+        for col in data.columns:
+            first = data[col].first_valid_index()
+            if data[col].dtype == object and first is not None and isinstance(data[col][first], dict):
+                data = pd.json_normalize(document)
+                break
+
+        if self.schema is None:
+            return data
+        known = set(self.schema.columns)
+        data = data.rename(columns={
+            col: col.rsplit('.', 1)[-1] for col in data.columns if col not in known and col.rsplit('.', 1)[-1] in known
+        })
+        return self.schema.apply(data)
+
+# Concrete class for XML data ingestion.
+# The file is parsed incrementally: each record element is turned into one row as soon as it
+# is complete and then cleared, so memory does not grow with the size of the document.
+# Records are the children of the root element unless record_tag names them. field_map maps
+# child paths (or '@attribute' names) to column names; without it every child tag and record
+# attribute becomes a column.
 class XMLDataIngestion(DataIngestionStrategy):
+    def __init__(self, record_tag=None, field_map=None, schema=None):
+        self.record_tag = record_tag
+        self.field_map = field_map
+        # Optional DataSchema applied to every parsed frame
+        self.schema = schema
+
     def ingest_data(self, file_path):
-        tree = et.parse(file_path)
-        root = tree.getroot()
-        # The XML parsing logic would be more complex and is dependent on the XML schema
-        # This is a placeholder to demonstrate how one might start implementing XML ingestion
-        data = [{child.tag: child.text for child in root} for child in root]
-        return pd.DataFrame(data)
+        return next(self._iter_frames(file_path, None))
+
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        return self._iter_frames(file_path, chunksize)
+
+    def _iter_frames(self, file_path, chunksize):
+        order = list(self.field_map.values()) if self.field_map else []
+        columns, rows = {}, 0
+        stack = []
+        for event, elem in et.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if not self._is_record(elem, len(stack)):
+                continue
+
+            # Write the fields straight into per-column arrays, padding columns the record lacks
+            for name, value in self._fields(elem):
+                values = columns.get(name)
+                if values is None:
+                    values = columns[name] = [None] * rows
+                    if name not in order:
+                        order.append(name)
+                values.append(value)
+            rows += 1
+            for values in columns.values():
+                if len(values) < rows:
+                    values.append(None)
+
+            # Drop the consumed record so the tree never holds more than the open ancestors
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+            if chunksize and rows >= chunksize:
+                yield self._frame(columns, rows, order)
+                columns, rows = {}, 0
+        if rows or not chunksize:
+            yield self._frame(columns, rows, order)
+
+    def _is_record(self, elem, depth):
+        if self.record_tag is None:
+            return depth == 1
+        return elem.tag == self.record_tag or elem.tag.endswith('}' + self.record_tag)
+
+    def _fields(self, elem):
+        if self.field_map is None:
+            yield from elem.attrib.items()
+            for child in elem:
+                yield child.tag, child.text
+            return
+        for source, column in self.field_map.items():
+            if source.startswith('@'):
+                yield column, elem.get(source[1:])
+            else:
+                child = elem.find(source)
+                yield column, child.text if child is not None else None
+
+    def _frame(self, columns, rows, order):
+        data = pd.DataFrame({col: columns.get(col, [None] * rows) for col in order}, index=pd.RangeIndex(rows))
+        return self.schema.apply(data) if self.schema is not None else data
 
 # Context class for data ingestion
 class DataIngestionContext:
-    def __init__(self, strategy: DataIngestionStrategy):
+    def __init__(self, strategy: DataIngestionStrategy, instrumentation=None):
         self._strategy = strategy
+        # Optional Instrumentation recording time, memory and rows of every call
+        self._instrumentation = instrumentation
 
     def set_strategy(self, strategy: DataIngestionStrategy):
         self._strategy = strategy
 
     def ingest(self, file_path):
-        return self._strategy.ingest_data(file_path)
\ No newline at end of file
+        if self._instrumentation is None:
+            return self._strategy.ingest_data(file_path)
+        with self._instrumentation.measure('ingest', self._strategy) as call:
+            data = self._strategy.ingest_data(file_path)
+            call.rows_out = count_rows(data)
+        return data
+
+    # Stream the file in fixed-size chunks so memory is bounded by chunksize, not file size
+    # end is only passed on when given, so strategies written before it existed keep working
+    def ingest_chunks(self, file_path, chunksize=100_000, end=None):
+        bound = {} if end is None else {'end': end}
+        return self._instrumented_chunks('ingest_chunks', self._strategy.ingest_chunks(file_path, chunksize, **bound))
+
+    # Stream only the records appended to the file after byte offset
+    def ingest_appended(self, file_path, offset, chunksize=100_000, end=None):
+        bound = {} if end is None else {'end': end}
+        return self._instrumented_chunks('ingest_appended',
+                                         self._strategy.ingest_appended(file_path, offset, chunksize, **bound))
+
+    def record_end(self, file_path, offset, size):
+        return self._strategy.record_end(file_path, offset, size)
+
+    def _instrumented_chunks(self, name, chunks):
+        if self._instrumentation is None:
+            return chunks
+        return self._instrumentation.measure_chunks(name, self._strategy, chunks)
\ No newline at end of file
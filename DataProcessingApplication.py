@@ -1,79 +1,477 @@
 import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from CurrencyParsing import parse_currency_columns
+from StreamingStatistics import CovarianceAccumulator, GroupedStatistics, StatisticsAccumulator
+from ReportCache import frame_fingerprint
+from Instrumentation import count_rows, stage
 
+# Strategies treat their input as immutable: derived columns (parsed dates, parsed money)
+# are computed as separate Series and never written back into the caller's frame, and the
+# frame is never copied as a whole. The same frame can be passed to every strategy in any order.
 class DataProcess(ABC):
     @abstractmethod
     def process_data(self, data):
         pass
 
+    # Streaming protocol: a partial aggregate is computed per chunk, partials are merged
+    # pairwise and the merged state is finalized into the same output as process_data.
+    # Row-level strategies cannot bound their state and do not implement it.
+    def partial(self, data):
+        raise NotImplementedError(f'{type(self).__name__} does not support streaming')
+
+    def merge(self, left, right):
+        raise NotImplementedError(f'{type(self).__name__} does not support streaming')
+
+    def finalize(self, state):
+        raise NotImplementedError(f'{type(self).__name__} does not support streaming')
+
+    # Only reports that are sums over the cube dimensions can be answered from a SalesCube
+    def process_cube(self, cube):
+        raise NotImplementedError(f'{type(self).__name__} cannot be answered from a sales cube')
+
+    # Run the report as SQL over a SQLBackend.SQLStore instead of an in-memory frame
+    def process_sql(self, store):
+        raise NotImplementedError(f'{type(self).__name__} has no SQL form')
+
+    def process_chunks(self, chunks):
+        state = None
+        for chunk in chunks:
+            partial = self.partial(chunk)
+            state = partial if state is None else self.merge(state, partial)
+        if state is None:
+            raise ValueError('No chunks to process')
+        return self.finalize(state)
+
+
+# Group keys derived from the 'Date' column rather than read from the data
+DATE_KEYS = {
+    'Year': lambda dates: dates.dt.year,
+    'Quarter': lambda dates: dates.dt.quarter,
+    'Month': lambda dates: dates.dt.month,
+    'Day': lambda dates: dates.dt.day,
+}
+
+
+# First day of every (year, month) pair, built without formatting strings
+def month_starts(years, months):
+    periods = (np.asarray(years, dtype='int64') - 1970) * 12 + np.asarray(months, dtype='int64') - 1
+    return pd.Series(periods.astype('datetime64[M]').astype('datetime64[ns]'), index=getattr(years, 'index', None))
+
+
+# Resolve group key names to Series, parsing 'Date' at most once
+def group_key_columns(data, keys):
+    dates = None
+    columns = []
+    for key in keys:
+        if key in DATE_KEYS:
+            if dates is None:
+                dates = data['Date'] if pd.api.types.is_datetime64_any_dtype(data['Date']) else pd.to_datetime(data['Date'])
+            columns.append(DATE_KEYS[key](dates).rename(key))
+        else:
+            columns.append(data[key])
+    return columns
+
+
+# Dense group ids above this many key combinations would cost more memory than a groupby
+MAX_DENSE_GROUPS = 1_000_000
+
+
+# Integer codes of group keys (-1 for missing) and the sorted values they stand for.
+# Categorical keys reuse their codes; date keys are computed on the distinct dates only,
+# which are few however many rows there are; other keys are factorized.
+def group_key_codes(data, keys):
+    dates = None
+    levels = {}
+    for key in keys:
+        if key in DATE_KEYS:
+            if dates is None:
+                values = data['Date'] if pd.api.types.is_datetime64_any_dtype(data['Date']) else pd.to_datetime(data['Date'])
+                dates = pd.factorize(values)
+            date_codes, distinct = dates
+            key_codes, labels = pd.factorize(DATE_KEYS[key](pd.Series(distinct)), sort=True)
+            codes = key_codes.take(date_codes) if len(key_codes) else np.full(len(date_codes), -1)
+            codes[date_codes < 0] = -1
+            levels[key] = (codes.astype('int64'), pd.Index(labels, name=key))
+        elif isinstance(data[key].dtype, pd.CategoricalDtype):
+            levels[key] = (data[key].cat.codes.to_numpy().astype('int64'), data[key].dtype)
+        else:
+            codes, labels = pd.factorize(data[key], sort=True)
+            levels[key] = (codes.astype('int64'), pd.Index(labels, name=key))
+    return levels
+
+
+# Sum value columns per group through the key codes: the codes are combined into one dense
+# group id and every column is summed with np.bincount, so no key is hashed or sorted.
+# Gives the frame of data.groupby(keys, observed=True)[value_columns].sum().
+def grouped_sums(data, keys, value_columns, levels=None):
+    levels = levels if levels is not None else group_key_codes(data, keys)
+    sizes = [len(levels[key][1].categories if isinstance(levels[key][1], pd.CategoricalDtype) else levels[key][1])
+             for key in keys]
+    numeric = all(pd.api.types.is_float_dtype(data[col].dtype) for col in value_columns)
+    if not len(data) or not numeric or np.prod(sizes, dtype='float64') > MAX_DENSE_GROUPS:
+        return data.groupby(group_key_columns(data, keys), observed=True)[value_columns].sum()
+
+    group = np.zeros(len(data), dtype='int64')
+    missing = False
+    for key, size in zip(keys, sizes):
+        codes = levels[key][0]
+        group *= size
+        group += codes
+        missing = missing or (len(codes) and codes.min() < 0)
+    valid = None
+    if missing:
+        valid = np.ones(len(data), dtype=bool)
+        for key in keys:
+            valid &= levels[key][0] >= 0
+        group = group[valid]
+
+    total = int(np.prod(sizes, dtype='int64'))
+    observed = np.flatnonzero(np.bincount(group, minlength=total))
+    sums = {}
+    for col in value_columns:
+        values = data[col].to_numpy(dtype='float64')
+        if valid is not None:
+            values = values[valid]
+        # Missing values are skipped, as sum() does
+        nan = np.isnan(values)
+        weights = np.where(nan, 0.0, values) if nan.any() else values
+        sums[col] = np.bincount(group, weights=weights, minlength=total)[observed]
+
+    # Split the group ids back into the codes of each key
+    arrays = []
+    remaining = observed
+    for key, size in reversed(list(zip(keys, sizes))):
+        codes, labels = remaining % size, levels[key][1]
+        remaining = remaining // size
+        if isinstance(labels, pd.CategoricalDtype):
+            arrays.append(pd.Categorical.from_codes(codes, dtype=labels))
+        else:
+            arrays.append(labels.take(codes))
+    arrays.reverse()
+    if len(keys) == 1:
+        index = pd.Index(arrays[0], name=keys[0])
+    else:
+        index = pd.MultiIndex.from_arrays(arrays, names=keys)
+    return pd.DataFrame(sums, index=index)
+
+
+# Base class for reports that sum value columns per group. The per-group sums are the
+# partial aggregate, so the same code serves whole frames and streamed chunks.
+class GroupedSumProcess(DataProcess):
+    group_keys = []
+    value_columns = []
 
-class SalesTrendsOverTime(DataProcess):
     def process_data(self, data):
-        # Ensure 'Date' is in datetime format
-        data['Date'] = pd.to_datetime(data['Date'])
+        return self.finalize(self.partial(data))
+
+    # Answer the report from a SalesCube instead of the raw rows
+    def process_cube(self, cube):
+        return self.finalize(cube.rollup(self.group_keys, self.value_columns))
+
+    def process_sql(self, store):
+        return self.finalize(store.grouped_sums(self.group_keys, self.value_columns))
+
+    def partial(self, data):
+        return grouped_sums(data, self.group_keys, self.value_columns)
+
+    def merge(self, left, right):
+        combined = pd.concat([left, right])
+        return combined.groupby(level=list(range(combined.index.nlevels)), observed=True).sum()
+
 
-        # Group by year and month, then sum the sales
-        grouped = data.groupby([data['Date'].dt.year.rename('Year'), data['Date'].dt.month.rename('Month')])[
-            'Sales'].sum().reset_index(name='TotalSales')
+class SalesTrendsOverTime(GroupedSumProcess):
+    group_keys = ['Year', 'Month']
+    value_columns = ['Sales']
+
+    def finalize(self, state):
+        # Sum the sales per year and month
+        grouped = state['Sales'].reset_index(name='TotalSales')
 
         # Reconstruct the 'Date' column for ease of plotting
-        grouped['Date'] = pd.to_datetime(grouped.assign(DAY=1)[['Year', 'Month', 'DAY']])
+        grouped['Date'] = month_starts(grouped['Year'], grouped['Month'])
 
         # Ensure 'Date' is the first column if needed
         cols = ['Date'] + [col for col in grouped.columns if col != 'Date']
         return grouped[cols]
 
 
-class ProfitAnalysisByCountry(DataProcess):
-    def process_data(self, data):
-        return data.groupby('Country')['Profit'].sum().reset_index()
+class ProfitAnalysisByCountry(GroupedSumProcess):
+    group_keys = ['Country']
+    value_columns = ['Profit']
 
-class ProductPerformance(DataProcess):
-    def process_data(self, data):
-        return data.groupby('Product')[['Sales', 'Profit']].sum().reset_index()
+    def finalize(self, state):
+        return state.reset_index()
+
+class ProductPerformance(GroupedSumProcess):
+    group_keys = ['Product']
+    value_columns = ['Sales', 'Profit']
+
+    def finalize(self, state):
+        return state.reset_index()
 
 class DiscountImpactOnSales(DataProcess):
+    columns = ['Discount Band', 'Sales', 'Profit']
+
     def process_data(self, data):
-        return data[['Discount Band', 'Sales', 'Profit']]
+        return data[self.columns]
+
+    def process_sql(self, store):
+        return store.select(self.columns)
+
+class MonthlySalesDistribution(GroupedSumProcess):
+    group_keys = ['Month']
+    value_columns = ['Sales']
+
+    def finalize(self, state):
+        return state['Sales'].rename_axis('Date').reset_index(name='MonthlySales')
+
+
+class CountryWiseSalesDistribution(GroupedSumProcess):
+    group_keys = ['Country']
+    value_columns = ['Sales']
+
+    def finalize(self, state):
+        return state.reset_index()
+
+
+class QuarterlySales(GroupedSumProcess):
+    group_keys = ['Year', 'Quarter']
+    value_columns = ['Sales', 'Profit']
+
+    def finalize(self, state):
+        return state.reset_index()
+
+
+class SegmentSalesTrends(GroupedSumProcess):
+    group_keys = ['Segment', 'Year', 'Month']
+    value_columns = ['Sales']
+
+    def finalize(self, state):
+        grouped = state['Sales'].reset_index(name='TotalSales')
+        grouped.insert(0, 'Date', month_starts(grouped['Year'], grouped['Month']))
+        return grouped
+
+
+class CorrelationAnalysis(DataProcess):
+    columns = ['Units Sold', 'Manufacturing Price', 'Sale Price', 'Gross Sales', 'Discounts', 'Sales', 'Profit']
 
-class MonthlySalesDistribution(DataProcess):
     def process_data(self, data):
-        data['Date'] = pd.to_datetime(data['Date'])
-        return data.groupby(data['Date'].dt.month)['Sales'].sum().reset_index(name='MonthlySales')
+        # Money columns are parsed column-wide instead of one Python call per cell
+        return parse_currency_columns(data, self.columns).corr()
+
+    # Streaming uses mergeable covariance accumulators instead of the raw rows
+    def partial(self, data):
+        return CovarianceAccumulator.from_frame(parse_currency_columns(data, self.columns), self.columns)
+
+    def merge(self, left, right):
+        return left.merge(right)
+
+    def finalize(self, state):
+        return state.correlation()
+
+    # Answered from a cube built with moments of every column
+    def process_cube(self, cube):
+        if not set(self.columns) <= set(cube.moments):
+            return super().process_cube(cube)
+        return cube.correlation(self.columns)
+
+    def process_sql(self, store):
+        return self.finalize(store.covariance(self.columns))
 
 
-class CountryWiseSalesDistribution(DataProcess):
+# describe()-style statistics of the correlation columns from one-pass accumulators: exact
+# count, mean, std, min and max, and sketched quartiles. Streams chunk by chunk like
+# CorrelationAnalysis, so the summary never needs the whole frame.
+class SummaryStatistics(DataProcess):
+    columns = CorrelationAnalysis.columns
+
     def process_data(self, data):
-        return data.groupby('Country')['Sales'].sum().reset_index()
+        return self.finalize(self.partial(data))
 
+    def partial(self, data):
+        return StatisticsAccumulator.from_frame(parse_currency_columns(data, self.columns), self.columns)
+
+    def merge(self, left, right):
+        return left.merge(right)
+
+    def finalize(self, state):
+        return state.summary()
+
+
+# Correlation matrix per group of `by` (e.g. 'Country' or 'Segment'), stacked under the
+# group keys as DataFrame.groupby(by).corr() returns it. Whole frames and chunks both go
+# through one covariance accumulator per group, so no group's rows are copied at once.
+class GroupedCorrelation(DataProcess):
+    def __init__(self, by='Country', columns=None):
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.columns = list(columns) if columns is not None else list(CorrelationAnalysis.columns)
+
+    def _values(self, data):
+        values = parse_currency_columns(data, self.columns)
+        for key in self.by:
+            values[key] = data[key]
+        return values
 
-class CorrelationAnalysis(DataProcess):
     def process_data(self, data):
-        # Updated function to handle non-convertible strings
-        def convert_currency(val):
-            try:
-                # Removing currency symbols and commas
-                val = val.replace(',', '').replace('$', '')
-                # Converting to float or returning NaN for non-convertible values
-                return float(val) if val.strip() != '' and val.strip() != '-' else np.nan
-            except Exception as e:
-                return np.nan  # Return NaN for any other conversion errors
+        return self.finalize(self.partial(data))
+
+    def partial(self, data):
+        return GroupedStatistics.from_frame(self._values(data), self.columns, self.by)
+
+    def merge(self, left, right):
+        return left.merge(right)
+
+    def finalize(self, state):
+        return state.correlation()
 
-        # Apply conversion on all specified columns
-        for col in ['Units Sold', 'Manufacturing Price', 'Sale Price', 'Gross Sales', 'Discounts', 'Sales', 'Profit']:
-            data[col] = data[col].apply(convert_currency)
 
-        return data[['Units Sold', 'Manufacturing Price', 'Sale Price', 'Gross Sales', 'Discounts', 'Sales', 'Profit']].corr()
 
+# Executes several strategies over the same frame as one plan. Grouped reports that share
+# a group key share one groupby, and reports whose keys are a subset of another report's
+# keys (Month within Year x Month) are rolled up from that smaller aggregate, so the number
+# of passes over the data follows the number of distinct group keys, not of reports.
+class ReportPlan:
+    def __init__(self, strategies):
+        self.strategies = list(strategies)
+
+        grouped = [s for s in self.strategies if self.plannable(s)]
+        # Distinct key sets, remembering the key order of the first report using each
+        key_order = {}
+        for strategy in grouped:
+            key_order.setdefault(frozenset(strategy.group_keys), list(strategy.group_keys))
+
+        # Key sets that are not contained in another one are computed from the data
+        self.base_keys = {keys: order for keys, order in key_order.items() if not any(keys < other for other in key_order)}
+        self.source = {keys: next(base for base in self.base_keys if keys <= base) for keys in key_order}
+
+        # Sum every value column any report served by a base aggregate needs
+        self.base_columns = {base: [] for base in self.base_keys}
+        for strategy in grouped:
+            columns = self.base_columns[self.source[frozenset(strategy.group_keys)]]
+            columns.extend(col for col in strategy.value_columns if col not in columns)
+
+    # Grouped reports with their own partial (e.g. parsing or extra sums) run on their own
+    @staticmethod
+    def plannable(strategy):
+        return isinstance(strategy, GroupedSumProcess) and type(strategy).partial is GroupedSumProcess.partial
+
+    # Returns the results in the order the strategies were given
+    def execute(self, data):
+        aggregates = self.aggregate(data)
+        results = []
+        for strategy in self.strategies:
+            with stage(type(strategy).__name__):
+                results.append(self._result(strategy, data, aggregates))
+        return results
+
+    # The sums of every base key set, indexed by its keys
+    def aggregate(self, data):
+        all_keys = list(dict.fromkeys(key for order in self.base_keys.values() for key in order))
+        levels = group_key_codes(data, all_keys)
+
+        aggregates = {}
+        for base, order in self.base_keys.items():
+            with stage('groupby ' + ' x '.join(order), rows_in=len(data)):
+                aggregates[base] = grouped_sums(data, order, self.base_columns[base], levels)
+        return aggregates
+
+    def process_unplanned(self, strategy, data):
+        return strategy.process_data(data)
+
+    def _result(self, strategy, data, aggregates):
+        if not self.plannable(strategy):
+            return self.process_unplanned(strategy, data)
+        aggregate = aggregates[self.source[frozenset(strategy.group_keys)]]
+        if list(aggregate.index.names) != list(strategy.group_keys):
+            # Roll up (or reorder) the shared aggregate to this report's keys
+            aggregate = aggregate.groupby(level=strategy.group_keys, observed=True).sum()
+        return strategy.finalize(aggregate[strategy.value_columns])
+
+
+# Default execution backend of DataProcessingContext: strategies run on in-memory frames.
+# SQLBackend.SQLBackend has the same methods and runs them over a SQLStore instead.
+class PandasBackend:
+    def fingerprint(self, data):
+        return frame_fingerprint(data)
+
+    def process(self, strategy, data):
+        return strategy.process_data(data)
+
+    def process_many(self, strategies, data):
+        return ReportPlan(strategies).execute(data)
 
 
 class DataProcessingContext:
-    def __init__(self, strategy: DataProcess):
+    def __init__(self, strategy: DataProcess, cache=None, instrumentation=None, backend=None):
         self._strategy = strategy
+        # Optional ReportCache memoizing results per strategy and input fingerprint
+        self._cache = cache
+        # Optional Instrumentation recording time, memory and rows of every call
+        self._instrumentation = instrumentation
+        # Where process() and process_many() run; the data passed to them is what the
+        # backend works on (a frame for PandasBackend, a SQLStore for SQLBackend)
+        self._backend = backend if backend is not None else PandasBackend()
 
     def set_strategy(self, strategy: DataProcess):
         self._strategy = strategy
 
+    # Answer the strategy from a SalesCube; the cache key follows the cube's contents
+    def process_cube(self, cube):
+        with self._measure('process_cube', self._strategy, len(cube)) as call:
+            if self._cache is None:
+                result = self._strategy.process_cube(cube)
+            else:
+                key = self._cache.key(self._strategy, cube.fingerprint())
+                result = self._cache.get_or_compute(key, lambda: self._strategy.process_cube(cube))
+            if call is not None:
+                call.rows_out = count_rows(result)
+        return result
+
     def process(self, data):
-        return self._strategy.process_data(data)
+        with self._measure('process', self._strategy, len(data)) as call:
+            if self._cache is None:
+                result = self._backend.process(self._strategy, data)
+            else:
+                with stage('fingerprint'):
+                    key = self._cache.key(self._strategy, self._backend.fingerprint(data))
+                result = self._cache.get_or_compute(key, lambda: self._backend.process(self._strategy, data))
+            if call is not None:
+                call.rows_out = count_rows(result)
+        return result
+
+    # Run several strategies over the same data in one plan and return every result
+    def process_many(self, strategies, data):
+        with self._measure('process_many', 'ReportPlan', len(data)):
+            if self._cache is None:
+                return self._backend.process_many(strategies, data)
+
+            # Only the reports missing from the cache go into the plan
+            with stage('fingerprint'):
+                fingerprint = self._backend.fingerprint(data)
+            keys = [self._cache.key(strategy, fingerprint) for strategy in strategies]
+            return self._cache.get_or_compute_many(keys, lambda missing: self._backend.process_many(
+                [strategies[i] for i in missing], data))
+
+    # Run the strategy over an iterable of chunks, e.g. DataIngestionContext.ingest_chunks
+    def process_chunks(self, chunks):
+        if self._instrumentation is None:
+            return self._strategy.process_chunks(chunks)
+        rows = 0
+
+        def counted(chunks):
+            nonlocal rows
+            for chunk in chunks:
+                rows += len(chunk)
+                yield chunk
+
+        with self._instrumentation.measure('process_chunks', self._strategy) as call:
+            result = self._strategy.process_chunks(counted(chunks))
+            call.rows_in, call.rows_out = rows, count_rows(result)
+        return result
+
+    def _measure(self, name, strategy, rows_in):
+        if self._instrumentation is None:
+            return nullcontext()
+        return self._instrumentation.measure(name, strategy, rows_in)
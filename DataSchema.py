@@ -0,0 +1,90 @@
+import pandas as pd
+from CurrencyParsing import MONEY_COLUMNS, parse_currency
+from Instrumentation import stage
+
+
+# Strip padding from the category labels of a categorical column.
+# Only the categories are touched, so the cost is independent of the row count.
+def strip_categories(values):
+    stripped = values.cat.categories.astype(str).str.strip()
+    categories = pd.Index(stripped.unique()).sort_values()
+    mapping = categories.get_indexer(stripped)
+    codes = values.cat.codes.to_numpy()
+    new_codes = mapping.take(codes)
+    new_codes[codes < 0] = -1
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories), index=values.index, name=values.name)
+
+
+# Parse a date column with a fixed format; categorical input only parses its categories
+def parse_dates(values, date_format):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.to_datetime(values, format=date_format)
+    categories = pd.to_datetime(values.cat.categories, format=date_format)
+    codes = values.cat.codes.to_numpy()
+    parsed = pd.Series(categories.take(codes), index=values.index, name=values.name)
+    return parsed.where(codes >= 0)
+
+
+# Declarative description of a tabular dataset: which columns are money, categorical,
+# integer or dates. Used to read files straight into compact, typed columns.
+class DataSchema:
+    def __init__(self, columns, money_columns=(), categorical_columns=(), integer_columns=None,
+                 date_columns=None, version=1):
+        self.columns = list(columns)
+        self.money_columns = list(money_columns)
+        self.categorical_columns = list(categorical_columns)
+        # Integer columns map to the numpy dtype they should be stored as
+        self.integer_columns = dict(integer_columns or {})
+        # Date columns map to their strptime format
+        self.date_columns = dict(date_columns or {})
+        # Bump whenever the typed representation changes, so caches can be invalidated
+        self.version = version
+
+    # dtypes the CSV parser can produce directly while reading. Date columns are read as
+    # categoricals too, so their conversion only has to parse the distinct values. Money
+    # columns are read as plain strings: totals are nearly unique per row on real data, where
+    # building categories made the read several times slower, and parse_currency factorizes
+    # the strings anyway.
+    def read_dtypes(self):
+        dtypes = {col: 'category' for col in self.categorical_columns + list(self.date_columns)}
+        dtypes.update({col: 'object' for col in self.money_columns})
+        dtypes.update(self.integer_columns)
+        return dtypes
+
+    # Field map for XML exports, whose element names cannot contain spaces ('Discount_Band')
+    def xml_field_map(self):
+        return {col.replace(' ', '_'): col for col in self.columns}
+
+    # Column-wide conversions applied after reading; returns a new frame.
+    # Each conversion is an instrumentation stage named after its column.
+    def apply(self, data):
+        converted = {}
+        for col in data.columns:
+            with stage(col):
+                converted[col] = self._convert_column(col, data[col])
+        return pd.DataFrame(converted, index=data.index)
+
+    def _convert_column(self, col, values):
+        if col in self.money_columns:
+            return parse_currency(values)
+        if col in self.categorical_columns:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            return strip_categories(values)
+        if col in self.date_columns:
+            return parse_dates(values, self.date_columns[col])
+        if col in self.integer_columns:
+            return values.astype(self.integer_columns[col])
+        return values
+
+
+# Schema of datasets/Financials.csv.
+# The dates are day-first (1/6/2014 is the first of June, matching 'Month Number').
+FINANCIALS_SCHEMA = DataSchema(
+    columns=['Segment', 'Country', 'Product', 'Discount Band', 'Units Sold', 'Manufacturing Price', 'Sale Price',
+             'Gross Sales', 'Discounts', 'Sales', 'COGS', 'Profit', 'Date', 'Month Number', 'Month Name', 'Year'],
+    money_columns=MONEY_COLUMNS,
+    categorical_columns=['Segment', 'Country', 'Product', 'Discount Band', 'Month Name'],
+    integer_columns={'Month Number': 'int8', 'Year': 'int16'},
+    date_columns={'Date': '%d/%m/%Y'},
+)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from plotly.io.json import to_json_plotly
+from ReportCache import ReportCache, frame_fingerprint
+
+# Points above which a series is downsampled before it is sent to the browser
+MAX_LINE_POINTS = 2000
+MAX_SCATTER_POINTS = 5000
+
+# Bins per axis of a density view replacing a scatter
+DENSITY_BINS = 50
+
+
+# Numbers LTTB can do arithmetic on; dates become nanoseconds
+def _numeric(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+    return values.to_numpy(dtype='float64')
+
+
+# Indices of the points Largest-Triangle-Three-Buckets keeps: the first and last points and,
+# from each of threshold - 2 buckets, the point forming the largest triangle with the point
+# kept before it and the average of the next bucket. Keeps the visual shape of a line
+# (peaks included) with a fixed number of points. x must be sorted.
+def lttb(x, y, threshold):
+    x, y = _numeric(x), _numeric(y)
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    every = (size - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype='int64')
+    kept[0], kept[-1] = 0, size - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, size)
+        average_x, average_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[previous] - average_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+# Row counts of a scatter over a grid: categorical x keeps one column per category, numeric
+# x is binned like y. Returns x labels, y bin centers and counts shaped (y, x).
+def density(x, y, bins=DENSITY_BINS):
+    x, y = pd.Series(x).reset_index(drop=True), pd.Series(y).reset_index(drop=True)
+    present = y.notna().to_numpy()
+    y_values = y.to_numpy(dtype='float64')[present]
+    y_edges = np.linspace(y_values.min(), y_values.max(), bins + 1) if len(y_values) else np.linspace(0, 1, bins + 1)
+    y_index = np.clip(np.searchsorted(y_edges, y_values, side='right') - 1, 0, bins - 1)
+
+    if isinstance(x.dtype, pd.CategoricalDtype) or x.dtype == object:
+        codes, labels = pd.factorize(x, sort=True)
+        codes = codes[present]
+        x_labels = list(labels)
+        valid = codes >= 0
+        x_index, y_index = codes[valid], y_index[valid]
+    else:
+        x_values = x.to_numpy(dtype='float64')[present]
+        x_edges = np.linspace(np.nanmin(x_values), np.nanmax(x_values), bins + 1)
+        x_index = np.clip(np.searchsorted(x_edges, x_values, side='right') - 1, 0, bins - 1)
+        x_labels = ((x_edges[:-1] + x_edges[1:]) / 2).tolist()
+    counts = np.bincount(y_index * len(x_labels) + x_index, minlength=bins * len(x_labels))
+    return x_labels, (y_edges[:-1] + y_edges[1:]) / 2, counts.reshape(bins, len(x_labels))
+
+
+# Figures are built by functions so the initial layout and the filter callback share them.
+# Point series above max_points are downsampled, so payloads stay bounded by the limits
+# above whatever the size of the data.
+def sales_trends_figure(sales_trends_data, max_points=MAX_LINE_POINTS):
+    x, y = sales_trends_data['Date'], sales_trends_data['TotalSales']
+    if len(sales_trends_data) > max_points:
+        kept = lttb(x, y, max_points)
+        x, y = x.iloc[kept], y.iloc[kept]
+    return {
+        'data': [
+            {'x': x, 'y': y, 'type': 'line', 'name': 'Sales Trends'},
+        ],
+        'layout': {
+            'title': 'Sales Trends Over Time'
+        }
+    }
+
+
+def profit_by_country_figure(profit_by_country_data):
+    return {
+        'data': [
+            {'x': profit_by_country_data['Country'], 'y': profit_by_country_data['Profit'], 'type': 'bar', 'name': 'Profit by Country'},
+        ],
+        'layout': {
+            'title': 'Profit Analysis by Country'
+        }
+    }
+
+
+def product_performance_figure(product_performance_data):
+    return {
+        'data': [
+            {'x': product_performance_data['Product'], 'y': product_performance_data['Sales'], 'type': 'bar', 'name': 'Sales'},
+            {'x': product_performance_data['Product'], 'y': product_performance_data['Profit'], 'type': 'bar', 'name': 'Profit'},
+        ],
+        'layout': {
+            'title': 'Product Performance',
+            'barmode': 'stack'
+        }
+    }
+
+
+def country_wise_sales_figure(country_wise_sales_data):
+    return {
+        'data': [
+            {'x': country_wise_sales_data['Country'], 'y': country_wise_sales_data['Sales'], 'type': 'bar', 'name': 'Sales by Country'},
+        ],
+        'layout': {
+            'title': 'Country-wise Sales Distribution',
+            'xaxis': {'title': 'Country'},
+            'yaxis': {'title': 'Total Sales'}
+        }
+    }
+
+
+# One marker per row up to max_points; above that the rows are shown as a density of sales
+# per discount band, which costs the same for a thousand rows or a billion
+def discount_impact_figure(discount_impact_data, max_points=MAX_SCATTER_POINTS, bins=DENSITY_BINS):
+    if len(discount_impact_data) <= max_points:
+        return {
+            'data': [
+                {'x': discount_impact_data['Discount Band'], 'y': discount_impact_data['Sales'], 'mode': 'markers', 'type': 'scatter', 'name': 'Discount Impact on Sales'},
+            ],
+            'layout': {
+                'title': 'Discount Impact on Sales'
+            }
+        }
+    bands, sales, counts = density(discount_impact_data['Discount Band'], discount_impact_data['Sales'], bins)
+    return {
+        'data': [
+            {'x': bands, 'y': sales, 'z': np.where(counts > 0, counts, np.nan), 'type': 'heatmap',
+             'colorscale': 'Viridis', 'colorbar': {'title': 'Rows'}, 'name': 'Discount Impact on Sales'},
+        ],
+        'layout': {
+            'title': f'Discount Impact on Sales (density of {len(discount_impact_data):,} rows)',
+            'xaxis': {'title': 'Discount Band'},
+            'yaxis': {'title': 'Sales'},
+        }
+    }
+
+
+def correlation_analysis_figure(correlation_analysis_data):
+    return {
+        'data': [
+            {
+                'z': correlation_analysis_data.values,
+                'x': correlation_analysis_data.columns,
+                'y': correlation_analysis_data.index,
+                'type': 'heatmap',
+                'colorscale': 'Viridis',
+            }
+        ],
+        'layout': {
+            'title': 'Correlation Analysis',
+            'xaxis': {'title': 'Variables'},
+            'yaxis': {'title': 'Variables'},
+        }
+    }
+
+
+# Placeholder shown until the data is loaded
+def loading_figure(title):
+    return {
+        'data': [],
+        'layout': {
+            'title': title,
+            'xaxis': {'visible': False},
+            'yaxis': {'visible': False},
+            'annotations': [{'text': 'Loading data...', 'showarrow': False, 'font': {'size': 16}}],
+        }
+    }
+
+
+# Figures keyed by (builder, report fingerprint), in a ReportCache (an LRU bounded by bytes,
+# optionally shared on disk). A figure is normalized to plain JSON types once, when it is
+# built, and a hit returns the cached dict itself: it skips building the figure, and with
+# figures() computing the reports too. Callers must not modify the figures they get.
+class FigureCache:
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else ReportCache(max_bytes=64 * 2 ** 20)
+
+    def key(self, builder, fingerprint):
+        return hashlib.sha1(f'figure|{builder.__module__}.{builder.__qualname__}|{fingerprint}'.encode()).hexdigest()
+
+    # The figure of one report; fingerprint defaults to the report's content fingerprint
+    def figure(self, builder, report, fingerprint=None):
+        fingerprint = fingerprint if fingerprint is not None else frame_fingerprint(report)
+        return self.cache.get_or_compute(self.key(builder, fingerprint), lambda: self._normalize(builder(report)))
+
+    # The figures of several reports sharing one fingerprint (e.g. a filter selection).
+    # compute_reports() returns the reports in builder order and only runs on a miss.
+    def figures(self, builders, fingerprint, compute_reports):
+        keys = [self.key(builder, fingerprint) for builder in builders]
+
+        def build(missing):
+            reports = compute_reports()
+            return [self._normalize(builders[i](reports[i])) for i in missing]
+
+        return self.cache.get_or_compute_many(keys, build)
+
+    # Arrays, timestamps and NaN as the browser receives them
+    @staticmethod
+    def _normalize(figure):
+        return json.loads(to_json_plotly(figure))
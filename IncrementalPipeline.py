@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from DataIngestion import DataIngestionContext, expand_paths
+from DataProcessingApplication import DataProcess
+from ReportCache import strategy_key
+
+# Bump when the persisted layout changes; older state files are then rebuilt from scratch
+STATE_VERSION = 1
+
+# How many bytes before the consumed offset are hashed to detect rewritten files
+TAIL_BYTES = 4096
+
+
+# Hash of the bytes just before offset; a different value means the consumed part changed
+def tail_digest(file_path, offset):
+    with open(file_path, 'rb') as file:
+        file.seek(max(0, offset - TAIL_BYTES))
+        return hashlib.sha1(file.read(offset - max(0, offset - TAIL_BYTES))).hexdigest()
+
+
+# Keeps running partial aggregates for a set of streaming strategies (see DataProcess.partial)
+# together with how far every source file has been consumed, and persists both to state_path.
+# A refresh only reads files that are new or have grown, so its cost follows the new data.
+class IncrementalPipeline:
+    def __init__(self, ingestion_context: DataIngestionContext, strategies, state_path, chunksize=100_000):
+        self.ingestion_context = ingestion_context
+        self.strategies = list(strategies)
+        self.state_path = state_path
+        self.chunksize = chunksize
+        for strategy in self.strategies:
+            if type(strategy).partial is DataProcess.partial:
+                raise ValueError(f'{type(strategy).__name__} has no mergeable running state')
+        self.keys = [strategy_key(strategy) for strategy in self.strategies]
+        self.sources = {}
+        self.partials = {}
+        self._load()
+
+    # Consume new files and appended rows, then return the finalized report of every strategy
+    def refresh(self, paths):
+        files = expand_paths(paths)
+        changes = {path: self._change(path) for path in files}
+
+        # A consumed file that shrank or was rewritten invalidates every running aggregate,
+        # so everything still on disk is consumed again. Sources that were archived after
+        # being consumed otherwise stay part of the history.
+        if 'rewritten' in changes.values():
+            rebuild = [path for path in self.sources if os.path.exists(path)] + files
+            self.sources, self.partials = {}, {}
+            changes = {path: 'new' for path in dict.fromkeys(rebuild)}
+
+        for path, change in changes.items():
+            if change == 'unchanged':
+                continue
+            # Only records complete when the file was looked at are read: a writer may be
+            # halfway through the last line, and rows appended during the read are left to
+            # the next refresh instead of being counted now and again then
+            offset = 0 if change == 'new' else self.sources[path]['offset']
+            end = self.ingestion_context.record_end(path, offset, os.path.getsize(path))
+            if end <= offset:
+                continue
+            if change == 'new':
+                chunks = self.ingestion_context.ingest_chunks(path, self.chunksize, end=end)
+            else:
+                chunks = self.ingestion_context.ingest_appended(path, offset, self.chunksize, end=end)
+            # The file's rows are aggregated on their own and merged together with the new
+            # offset once all of them were read, so a read failing halfway leaves no rows
+            # counted and the next refresh reads them again from the old offset
+            partials = {}
+            try:
+                for chunk in chunks:
+                    self._update(chunk, partials)
+            except Exception:
+                self._save()
+                raise
+            self._merge(partials)
+            self.sources[path] = {'offset': end, 'tail': tail_digest(path, end)}
+
+        self._save()
+        return self.results()
+
+    def results(self):
+        return [
+            strategy.finalize(self.partials[key]) if key in self.partials else None
+            for strategy, key in zip(self.strategies, self.keys)
+        ]
+
+    # Fold one chunk into partials, a running state per strategy key
+    def _update(self, chunk, partials):
+        if chunk.empty:
+            return
+        for strategy, key in zip(self.strategies, self.keys):
+            partial = strategy.partial(chunk)
+            partials[key] = partial if key not in partials else strategy.merge(partials[key], partial)
+
+    def _merge(self, partials):
+        for strategy, key in zip(self.strategies, self.keys):
+            if key in partials:
+                self.partials[key] = (partials[key] if key not in self.partials
+                                      else strategy.merge(self.partials[key], partials[key]))
+
+    def _change(self, path):
+        if path not in self.sources:
+            return 'new'
+        offset = self.sources[path]['offset']
+        size = os.path.getsize(path)
+        if size < offset or tail_digest(path, offset) != self.sources[path]['tail']:
+            return 'rewritten'
+        return 'unchanged' if size == offset else 'appended'
+
+    def _load(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('version') != STATE_VERSION:
+            return
+        self.sources = state['sources']
+        # Keep the running state only of strategies this pipeline still computes
+        self.partials = {key: value for key, value in state['partials'].items() if key in self.keys}
+        if set(self.partials) != set(self.keys) and self.sources:
+            # A strategy was added since the last run: its history has to be rebuilt
+            self.sources, self.partials = {}, {}
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            pickle.dump({'version': STATE_VERSION, 'sources': self.sources, 'partials': self.partials}, file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.state_path)
@@ -0,0 +1,312 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak memory is then only measured with tracemalloc
+    resource = None
+
+# Measurement of the call currently running in this thread or task, if any
+_active = ContextVar('instrumentation_call', default=None)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds (seconds) of the wall-time histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# Rows of a result: frames, series and anything else sized (a SalesCube) but not containers
+def count_rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if hasattr(value, '__len__') and not isinstance(value, (list, tuple, dict, str, bytes)):
+        return len(value)
+    return None
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+# Metrics of one measured call. Nested stages are named after their parent ('ingest.read').
+class CallMetrics:
+    def __init__(self, stage, strategy, rows_in=None):
+        self.stage = stage
+        self.strategy = strategy
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_memory_delta = None
+        self.error = None
+        self.timestamp = time.time()
+        self.profile = None
+
+    def as_dict(self):
+        return {
+            'stage': self.stage, 'strategy': self.strategy, 'rows_in': self.rows_in, 'rows_out': self.rows_out,
+            'wall_seconds': self.wall_seconds, 'cpu_seconds': self.cpu_seconds,
+            'peak_memory_delta': self.peak_memory_delta, 'error': self.error, 'timestamp': self.timestamp,
+        }
+
+    def __repr__(self):
+        return f'CallMetrics({self.stage!r}, {self.strategy!r}, {self.wall_seconds!r}s)'
+
+
+# Records wall time, CPU time, peak memory delta and rows in/out of measured calls and hands
+# every record to its sinks (objects with an emit(metrics) method).
+# memory='rss' reads the process high-water mark, which is nearly free but only grows when a
+# call goes above the previous peak; memory='tracemalloc' traces Python and numpy allocations
+# precisely at a noticeable cost; memory=None skips memory.
+class Instrumentation:
+    def __init__(self, sinks=(), memory='rss'):
+        if memory not in ('rss', 'tracemalloc', None):
+            raise ValueError(f'Unknown memory mode: {memory}')
+        self.sinks = list(sinks)
+        self.memory = memory
+        self._profile = None
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    # Run the next top-level measured call under cProfile. The stats are attached to its
+    # metrics as text and, with a path, dumped for pstats/snakeviz.
+    def profile_next(self, path=None):
+        with self._lock:
+            self._profile = {'path': path}
+
+    @contextmanager
+    def measure(self, stage, strategy, rows_in=None):
+        parent = _active.get()
+        if parent is not None and parent['instrumentation'] is self:
+            stage = f'{parent["metrics"].stage}.{stage}'
+        else:
+            parent = None
+        metrics = CallMetrics(stage, strategy if isinstance(strategy, str) else type(strategy).__name__, rows_in)
+
+        profile = None
+        if parent is None:
+            with self._lock:
+                profile, self._profile = self._profile, None
+        profiler = cProfile.Profile() if profile is not None else None
+
+        call = {'instrumentation': self, 'metrics': metrics, 'peak': 0}
+        memory_start = self._memory_start(parent, call)
+        token = _active.set(call)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield metrics
+        except BaseException as e:
+            metrics.error = repr(e)
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.cpu_seconds = time.thread_time() - cpu_start
+            _active.reset(token)
+            metrics.peak_memory_delta = self._memory_delta(parent, call, memory_start)
+            if profiler is not None:
+                metrics.profile = self._profile_text(profiler, profile['path'])
+            self._emit(metrics)
+
+    # Measure a stream of chunks: only the time spent producing them is counted, and the
+    # record is emitted once the stream is exhausted
+    def measure_chunks(self, stage, strategy, chunks):
+        rows = 0
+        iterator = iter(chunks)
+        metrics = CallMetrics(stage, type(strategy).__name__)
+        wall = cpu = 0.0
+        try:
+            while True:
+                wall_start, cpu_start = time.perf_counter(), time.thread_time()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - wall_start
+                    cpu += time.thread_time() - cpu_start
+                rows += len(chunk)
+                yield chunk
+        except BaseException as e:
+            metrics.error = repr(e)
+            raise
+        finally:
+            metrics.rows_out, metrics.wall_seconds, metrics.cpu_seconds = rows, wall, cpu
+            self._emit(metrics)
+
+    def _memory_start(self, parent, call):
+        if self.memory == 'rss':
+            return _max_rss_bytes()
+        if self.memory == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            # Hand the peak reached so far to the enclosing call before resetting it
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], peak)
+            tracemalloc.reset_peak()
+            call['peak'] = current
+            return current
+        return None
+
+    def _memory_delta(self, parent, call, start):
+        if self.memory == 'rss':
+            end = _max_rss_bytes()
+            return end - start if end is not None and start is not None else None
+        if self.memory == 'tracemalloc':
+            call['peak'] = max(call['peak'], tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], call['peak'])
+            return call['peak'] - start
+        return None
+
+    @staticmethod
+    def _profile_text(profiler, path, limit=30):
+        if path is not None:
+            profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def _emit(self, metrics):
+        for sink in self.sinks:
+            try:
+                sink.emit(metrics)
+            except Exception:
+                # A failing sink must never break the pipeline it observes
+                logging.getLogger(__name__).exception('Instrumentation sink %r failed', sink)
+
+
+# Nested stage of the call being measured, e.g. the parse step of an ingestion.
+# Does nothing when no instrumented call is running, so strategies can always use it.
+@contextmanager
+def stage(name, rows_in=None):
+    call = _active.get()
+    if call is None:
+        yield None
+        return
+    with call['instrumentation'].measure(name, call['metrics'].strategy, rows_in) as metrics:
+        yield metrics
+
+
+# Sink writing every record as one JSON log line
+class LogSink:
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('pipeline')
+        self.level = level
+
+    def emit(self, metrics):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(metrics.as_dict()))
+            if metrics.profile:
+                self.logger.log(self.level, 'profile of %s %s:\n%s', metrics.stage, metrics.strategy, metrics.profile)
+
+
+# In-process sink keeping the most recent records and running totals per (stage, strategy),
+# which it can render in the Prometheus text exposition format
+class MetricsRegistry:
+    def __init__(self, max_records=1000, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._records = deque(maxlen=max_records)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def emit(self, metrics):
+        with self._lock:
+            self._records.append(metrics)
+            totals = self._totals.setdefault((metrics.stage, metrics.strategy), {
+                'calls': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows_in': 0, 'rows_out': 0,
+                'peak_memory_delta': 0, 'buckets': [0] * len(self.buckets),
+            })
+            totals['calls'] += 1
+            totals['errors'] += metrics.error is not None
+            totals['wall_seconds'] += metrics.wall_seconds or 0.0
+            totals['cpu_seconds'] += metrics.cpu_seconds or 0.0
+            totals['rows_in'] += metrics.rows_in or 0
+            totals['rows_out'] += metrics.rows_out or 0
+            totals['peak_memory_delta'] = max(totals['peak_memory_delta'], metrics.peak_memory_delta or 0)
+            for i, bound in enumerate(self.buckets):
+                if (metrics.wall_seconds or 0.0) <= bound:
+                    totals['buckets'][i] += 1
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    # Running totals keyed by (stage, strategy)
+    def summary(self):
+        with self._lock:
+            return {key: {name: value for name, value in totals.items() if name != 'buckets'}
+                    for key, totals in self._totals.items()}
+
+    def prometheus_text(self, prefix='erp_pipeline'):
+        with self._lock:
+            totals = {key: dict(value, buckets=list(value['buckets'])) for key, value in self._totals.items()}
+
+        def labels(stage, strategy, **extra):
+            pairs = {'stage': stage, 'strategy': strategy, **extra}
+            return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs.items()) + '}'
+
+        lines = []
+        counters = [
+            ('calls_total', 'calls', 'counter', 'Measured pipeline calls'),
+            ('errors_total', 'errors', 'counter', 'Measured pipeline calls that raised'),
+            ('cpu_seconds_total', 'cpu_seconds', 'counter', 'CPU time of the calling thread'),
+            ('rows_in_total', 'rows_in', 'counter', 'Rows passed into the calls'),
+            ('rows_out_total', 'rows_out', 'counter', 'Rows returned by the calls'),
+            ('peak_memory_delta_bytes', 'peak_memory_delta', 'gauge', 'Largest peak memory increase of a call'),
+        ]
+        for suffix, field, kind, description in counters:
+            lines.append(f'# HELP {prefix}_{suffix} {description}')
+            lines.append(f'# TYPE {prefix}_{suffix} {kind}')
+            for (stage_name, strategy), value in sorted(totals.items()):
+                lines.append(f'{prefix}_{suffix}{labels(stage_name, strategy)} {value[field]}')
+
+        lines.append(f'# HELP {prefix}_wall_seconds Wall time of measured pipeline calls')
+        lines.append(f'# TYPE {prefix}_wall_seconds histogram')
+        for (stage_name, strategy), value in sorted(totals.items()):
+            for bound, count in zip(self.buckets, value['buckets']):
+                lines.append(f'{prefix}_wall_seconds_bucket{labels(stage_name, strategy, le=repr(float(bound)))} {count}')
+            lines.append(f'{prefix}_wall_seconds_bucket{labels(stage_name, strategy, le="+Inf")} {value["calls"]}')
+            lines.append(f'{prefix}_wall_seconds_sum{labels(stage_name, strategy)} {value["wall_seconds"]}')
+            lines.append(f'{prefix}_wall_seconds_count{labels(stage_name, strategy)} {value["calls"]}')
+        return '\n'.join(lines) + '\n'
+
+
+# A label value in the Prometheus text format, for metrics other modules expose next to the registry's
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Serve registry.prometheus_text() from a Flask server (the Dash app's app.server); a list
+# of registries (anything with prometheus_text()) is served as one page
+def register_metrics_endpoint(server, registry, path='/metrics'):
+    from flask import Response
+    registries = list(registry) if isinstance(registry, (list, tuple)) else [registry]
+
+    def metrics():
+        return Response(''.join(source.prometheus_text() for source in registries),
+                        content_type=PROMETHEUS_CONTENT_TYPE)
+
+    server.add_url_rule(path, 'pipeline_metrics', metrics)
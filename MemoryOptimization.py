@@ -0,0 +1,167 @@
+import logging
+import numpy as np
+import pandas as pd
+from CurrencyParsing import parse_currency
+from DataIngestion import DataIngestionStrategy
+from DataSchema import strip_categories
+from Instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# Bump when compact_frame changes the representation, so cached compact frames are rebuilt
+COMPACT_VERSION = 1
+
+
+def memory_usage(data):
+    return data.memory_usage(index=False, deep=True)
+
+
+def _strings(values):
+    return values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == 'string'
+
+
+# Numbers written as text ("1,618.50", "$3.00", "(880.00)"), or None when some value is not
+# a number. Blanks and the lone '-' placeholder count as missing, as in parse_currency.
+def _parse_numbers(values):
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = parse_currency(uniques)
+    unparsed = uniques[parsed.isna()]
+    if not unparsed.str.replace(r'[\s$,()]', '', regex=True).isin(['', '-']).all():
+        return None
+    numbers = parsed.to_numpy().take(codes) if len(parsed) else np.full(len(codes), np.nan)
+    numbers[codes < 0] = np.nan
+    return pd.Series(numbers, index=values.index, name=values.name)
+
+
+# Smallest integer dtype holding every value of a float column, when all of them are whole
+def _integer_dtype(values):
+    array = values.to_numpy()
+    if not len(array) or np.isnan(array).any() or not np.array_equal(array, np.round(array)):
+        return None
+    return pd.to_numeric(pd.Series([array.min(), array.max()], dtype='int64'), downcast='integer').dtype
+
+
+def _compact_column(values, max_category_ratio, float32):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return strip_categories(values) if values.cat.categories.dtype == object else values
+    if values.dtype == object:
+        if not _strings(values):
+            return values
+        parsed = _parse_numbers(values)
+        if parsed is not None:
+            return _compact_column(parsed, max_category_ratio, float32)
+        # Dictionary-encode repetitive text; unique-ish text (ids, notes) stays as it is
+        if values.nunique() > max_category_ratio * len(values):
+            return values
+        return strip_categories(values.astype('category'))
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.to_numeric(values, downcast='integer')
+    if pd.api.types.is_float_dtype(values.dtype):
+        dtype = _integer_dtype(values)
+        if dtype is not None:
+            return values.astype(dtype)
+        # float32 keeps about 7 significant digits: only taken when no value changes, and
+        # only on request since sums of float32 columns are float32 too
+        if float32 and values.dtype != 'float32':
+            narrow = values.astype('float32')
+            if np.array_equal(narrow.to_numpy(dtype='float64'), values.to_numpy(), equal_nan=True):
+                return narrow
+    return values
+
+
+# Before/after memory of a compact_frame pass, per column
+class MemoryReport:
+    def __init__(self, rows, before, after, dtypes_before, dtypes_after):
+        self.rows = rows
+        self.before = before
+        self.after = after
+        self.dtypes_before = dtypes_before
+        self.dtypes_after = dtypes_after
+
+    @property
+    def bytes_before(self):
+        return int(self.before.sum())
+
+    @property
+    def bytes_after(self):
+        return int(self.after.sum())
+
+    @property
+    def ratio(self):
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+    def as_frame(self):
+        return pd.DataFrame({
+            'dtype_before': self.dtypes_before.astype(str), 'dtype_after': self.dtypes_after.astype(str),
+            'bytes_before': self.before, 'bytes_after': self.after,
+        })
+
+    def __str__(self):
+        lines = [f'{"column":<22} {"before":>12} {"after":>12}  dtype']
+        for col in self.before.index:
+            change = str(self.dtypes_before[col])
+            if self.dtypes_after[col] != self.dtypes_before[col]:
+                change += f' -> {self.dtypes_after[col]}'
+            lines.append(f'{col:<22} {self.before[col] / 2 ** 20:>8.2f} MiB {self.after[col] / 2 ** 20:>8.2f} MiB  {change}')
+        lines.append(f'{"total":<22} {self.bytes_before / 2 ** 20:>8.2f} MiB {self.bytes_after / 2 ** 20:>8.2f} MiB  '
+                     f'{self.ratio:.0%} of {self.rows:,} rows')
+        return '\n'.join(lines)
+
+
+# Memory-optimization pass over a loaded frame; returns the new frame and a MemoryReport.
+# Text holding numbers (money included) becomes numeric; other text repeating enough
+# (distinct values at most max_category_ratio of the rows) is stripped and dictionary-
+# encoded as a categorical; whole numbers are downcast to the smallest integer dtype;
+# other floats become float32 only with float32=True and only when no value changes.
+# The input frame is left untouched.
+def compact_frame(data, max_category_ratio=0.5, float32=False):
+    before = memory_usage(data)
+    compacted = {}
+    for col in data.columns:
+        with stage(col):
+            compacted[col] = _compact_column(data[col], max_category_ratio, float32)
+    result = pd.DataFrame(compacted, index=data.index)
+    report = MemoryReport(len(data), before, memory_usage(result), data.dtypes, result.dtypes)
+    return result, report
+
+
+# Ingestion strategy decorator running compact_frame on every frame the wrapped strategy
+# reads. The report of the last read is kept in .report and logged. Wrap it in
+# CachedDataIngestion to cache the compact frame rather than redo the pass on every load.
+class CompactDataIngestion(DataIngestionStrategy):
+    def __init__(self, strategy: DataIngestionStrategy, max_category_ratio=0.5, float32=False):
+        self.strategy = strategy
+        self.max_category_ratio = max_category_ratio
+        self.float32 = float32
+        self.report = None
+
+    # Cached frames depend on the wrapped strategy's schema and on the compact pass
+    @property
+    def schema(self):
+        return getattr(self.strategy, 'schema', None)
+
+    @property
+    def cache_tag(self):
+        return f'compact{COMPACT_VERSION}|{self.max_category_ratio}|{self.float32}'
+
+    def ingest_data(self, file_path):
+        data = self.strategy.ingest_data(file_path)
+        with stage('compact', rows_in=len(data)):
+            data, self.report = compact_frame(data, self.max_category_ratio, self.float32)
+        logger.info('Compacted %s from %.1f MiB to %.1f MiB', file_path, self.report.bytes_before / 2 ** 20,
+                    self.report.bytes_after / 2 ** 20)
+        return data
+
+    # Chunks pass through unchanged: categories and integer widths chosen per chunk would
+    # differ between chunks and not survive merging their aggregates
+    def ingest_chunks(self, file_path, chunksize, end=None):
+        return self.strategy.ingest_chunks(file_path, chunksize, end)
+
+    def ingest_appended(self, file_path, offset, chunksize, end=None):
+        return self.strategy.ingest_appended(file_path, offset, chunksize, end)
+
+    def record_end(self, file_path, offset, size):
+        return self.strategy.record_end(file_path, offset, size)
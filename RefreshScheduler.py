@@ -0,0 +1,175 @@
+import logging
+import os
+import stat
+import threading
+import time
+from contextlib import nullcontext
+from BackgroundLoader import BackgroundLoader
+from DataIngestion import expand_paths
+from Instrumentation import escape_label
+
+logger = logging.getLogger(__name__)
+
+
+# (modification time, size) of every source file; a missing file maps to None
+def source_signature(paths):
+    signature = {}
+    for path in expand_paths(paths):
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            signature[path] = None
+            continue
+        if not stat.S_ISDIR(info.st_mode):
+            signature[path] = (info.st_mtime_ns, info.st_size)
+    return signature
+
+
+# A BackgroundLoader that keeps its value current: after the first load its thread polls the
+# source files every `interval` seconds and, once a change has stayed the same for one more
+# poll (so files still being written are not read), runs load() again and swaps the result
+# in. Readers take the value with get() once per request and keep that reference, so a
+# refresh never blocks them nor shows them a half-built value; the previous value is kept
+# when a refresh fails, and the same failing sources are not retried until they change.
+# start() restarts the watcher in a forked worker, whose threads do not survive the fork.
+# With watch=False the thread only does the first load and the owner calls poll(), or
+# pending() and refresh(), itself (serve.py's parent does, then forks workers sharing the data).
+class RefreshScheduler(BackgroundLoader):
+    def __init__(self, load, paths, interval=5.0, name='refresh', instrumentation=None, watch=True):
+        super().__init__(load, name)
+        self.paths = paths
+        self.interval = interval
+        self.watch = watch
+        # Optional Instrumentation measuring every load as stage 'refresh'
+        self._instrumentation = instrumentation
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._loaded_signature = None
+        self._failed_signature = None
+        self._previous_signature = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_seconds = None
+        self.loaded_at = None
+        self.stale_since = None
+
+    def start(self):
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+            if not running and (self.watch or not self._done.is_set()):
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    # Stop watching; the current value stays available and start() resumes watching
+    def stop(self, timeout=None):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        if not self._done.is_set():
+            self.refresh()
+            self._done.set()
+        if self.watch:
+            while not self._stop.wait(self.interval):
+                self.poll()
+
+    # Check the sources once and refresh when they differ from the loaded ones and have not
+    # changed since the previous poll. Returns True when new data was swapped in.
+    def poll(self):
+        signature = self.pending()
+        return self.refresh(signature) if signature is not None else False
+
+    # The check poll() makes, without loading: the sources' signature when they changed and
+    # have not changed since the previous call (and did not fail to load as they are), else None
+    def pending(self):
+        try:
+            current = source_signature(self.paths)
+        except OSError:
+            logger.exception('%s could not check its sources', self.name)
+            return None
+        if current == self._loaded_signature:
+            self._previous_signature, self.stale_since = None, None
+            return None
+        if self.stale_since is None:
+            self.stale_since = self._changed_at(current)
+        settled = current == self._previous_signature and current != self._failed_signature
+        self._previous_signature = current
+        return current if settled else None
+
+    # When the sources last changed: the newest modification time of a file that differs
+    # from the loaded one, or now when the change is a removed file
+    def _changed_at(self, current):
+        loaded = self._loaded_signature or {}
+        changed = [current[path] for path in current if current[path] != loaded.get(path)]
+        times = [value[0] / 1e9 for value in changed if value is not None]
+        return min(time.time(), max(times)) if len(times) == len(changed) and times else time.time()
+
+    # Load now, in the calling thread, and swap the result in. Returns True on success.
+    def refresh(self, signature=None):
+        with self._refresh_lock:
+            # Taken before loading, so changes made during the load trigger another refresh
+            signature = signature if signature is not None else source_signature(self.paths)
+            measure = (self._instrumentation.measure('refresh', self.name) if self._instrumentation is not None
+                       else nullcontext())
+            start = time.perf_counter()
+            try:
+                with measure:
+                    value = self._load()
+            except Exception as e:
+                self.last_refresh_seconds = self.seconds = time.perf_counter() - start
+                self.failures += 1
+                self._failed_signature = signature
+                if self._value is None:
+                    self.error = e
+                logger.exception('%s failed; %s', self.name,
+                                 'keeping the previous data' if self._value is not None else 'no data loaded')
+                return False
+
+            self._value = value
+            self.error = None
+            self.last_refresh_seconds = self.seconds = time.perf_counter() - start
+            self.refreshes += 1
+            self.loaded_at = time.time()
+            self._loaded_signature, self._failed_signature = signature, None
+            self.stale_since = None
+        logger.info('%s refreshed in %.2fs', self.name, self.seconds)
+        return True
+
+    # Seconds the sources have had changes that are not loaded yet (0 when up to date)
+    def staleness(self):
+        stale_since = self.stale_since
+        return max(0.0, time.time() - stale_since) if stale_since is not None else 0.0
+
+    def status(self):
+        return {
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'loaded_at': self.loaded_at,
+            'data_age_seconds': time.time() - self.loaded_at if self.loaded_at is not None else None,
+            'staleness_seconds': self.staleness(),
+        }
+
+    # Gauges and counters in the Prometheus text format, next to MetricsRegistry's; refresh
+    # durations also reach the registry's wall-time histogram through the instrumentation
+    def prometheus_text(self, prefix='erp_pipeline'):
+        status = self.status()
+        label = f'{{name="{escape_label(self.name)}"}}'
+        metrics = [
+            ('refreshes_total', 'counter', 'Successful data refreshes', status['refreshes']),
+            ('refresh_failures_total', 'counter', 'Data refreshes that raised', status['failures']),
+            ('last_refresh_seconds', 'gauge', 'Duration of the last data refresh', status['last_refresh_seconds']),
+            ('data_loaded_timestamp_seconds', 'gauge', 'When the served data was loaded', status['loaded_at']),
+            ('data_age_seconds', 'gauge', 'Seconds since the served data was loaded', status['data_age_seconds']),
+            ('data_staleness_seconds', 'gauge', 'Seconds the sources have had changes not yet served',
+             status['staleness_seconds']),
+        ]
+        lines = []
+        for suffix, kind, description, value in metrics:
+            lines.append(f'# HELP {prefix}_{suffix} {description}')
+            lines.append(f'# TYPE {prefix}_{suffix} {kind}')
+            lines.append(f'{prefix}_{suffix}{label} {value if value is not None else "NaN"}')
+        return '\n'.join(lines) + '\n'
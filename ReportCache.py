@@ -0,0 +1,204 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from threading import RLock
+import pandas as pd
+
+
+# Content fingerprint of a frame: layout plus a vectorized hash of every row
+def frame_fingerprint(data):
+    digest = hashlib.sha1()
+    digest.update(repr((data.shape, list(data.columns), [str(dtype) for dtype in data.dtypes])).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Identity of a strategy: its class and constructor parameters
+def strategy_key(strategy):
+    params = sorted((name, repr(value)) for name, value in vars(strategy).items())
+    return f'{type(strategy).__module__}.{type(strategy).__qualname__}{params}'
+
+
+# Memoizes strategy results keyed by (strategy, frame fingerprint).
+# Results live in an in-memory LRU tier bounded by max_bytes of pickled size, and optionally
+# in a disk tier shared by every process that points at the same directory. A lock file per
+# key makes concurrent workers wait for the one already computing a report. The disk tier is
+# bounded by max_disk_bytes: after each write the least recently used files (by modification
+# time, which a disk hit refreshes) are removed, so results of superseded data age out.
+# Cached results are shared, so callers must treat them as read-only.
+class ReportCache:
+    def __init__(self, max_bytes=256 * 2 ** 20, disk_dir=None, lock_timeout=300, max_disk_bytes=2 ** 30):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.lock_timeout = lock_timeout
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = RLock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+
+    # Cache key of a strategy applied to a frame with the given frame_fingerprint
+    def key(self, strategy, fingerprint):
+        return hashlib.sha1(f'{strategy_key(strategy)}|{fingerprint}'.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key][0]
+
+        value = self._load(key)
+        if value is not None:
+            self.stats['disk_hits'] += 1
+            self._remember(key, value[0], value[1])
+            return value[0]
+        return None
+
+    def put(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value, len(payload))
+        if self.disk_dir is not None:
+            self._write(key, payload)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lock_path = self._acquire(key)
+        try:
+            # Another process may have finished the same report while we waited
+            value = self.get(key)
+            if value is not None:
+                return value
+            self.stats['misses'] += 1
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            self._release(lock_path)
+
+    # get_or_compute for several keys at once: compute(missing) gets the positions of the
+    # keys still missing once their locks are held and returns their values in that order,
+    # so the missing results can be computed together (e.g. in one report plan)
+    def get_or_compute_many(self, keys, compute):
+        values = [self.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if not missing:
+            return values
+
+        # Locks are taken in key order, so processes asking for overlapping sets cannot deadlock
+        lock_paths = []
+        try:
+            for key in sorted({keys[i] for i in missing}):
+                lock_paths.append(self._acquire(key))
+            for i in missing:
+                values[i] = self.get(keys[i])
+            missing = [i for i in missing if values[i] is None]
+            if missing:
+                self.stats['misses'] += len(missing)
+                for i, value in zip(missing, compute(missing)):
+                    self.put(keys[i], value)
+                    values[i] = value
+            return values
+        finally:
+            for lock_path in lock_paths:
+                self._release(lock_path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remember(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.stats['evictions'] += 1
+
+    def _path(self, key, extension='.pkl'):
+        return os.path.join(self.disk_dir, key + extension)
+
+    def _load(self, key):
+        if self.disk_dir is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                payload = file.read()
+            # Mark it recently used for prune_disk()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        return pickle.loads(payload), len(payload)
+
+    def _write(self, key, payload):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(payload)
+        os.replace(temp_path, self._path(key))
+        self.prune_disk()
+
+    # Remove the least recently used results until the disk tier fits in max_disk_bytes, and
+    # temporary files left by writers that died
+    def prune_disk(self):
+        if self.disk_dir is None or not os.path.isdir(self.disk_dir):
+            return
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            try:
+                info = entry.stat()
+                if entry.name.endswith('.pkl'):
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+                elif entry.name.endswith('.tmp') and time.time() - info.st_mtime > self.lock_timeout:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                self.stats['disk_evictions'] += 1
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def _release(self, lock_path):
+        if lock_path is not None and os.path.exists(lock_path):
+            os.remove(lock_path)
+
+    # Take the per-key lock file; returns None when there is no disk tier or the result appeared
+    def _acquire(self, key):
+        if self.disk_dir is None:
+            return None
+        os.makedirs(self.disk_dir, exist_ok=True)
+        lock_path = self._path(key, '.lock')
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock_path
+            except FileExistsError:
+                pass
+            if os.path.exists(self._path(key)):
+                return None
+            try:
+                # The process holding the lock died; take it over
+                if time.time() - os.path.getmtime(lock_path) > self.lock_timeout:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
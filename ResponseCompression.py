@@ -0,0 +1,29 @@
+import gzip
+from flask import request
+
+# Text payloads worth compressing: callback responses, layouts and pages
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript', 'text/javascript',
+}
+
+
+# Gzip the responses of a Flask server (the Dash app's app.server) for clients accepting it.
+# Figure payloads are mostly repeated keys and digits and shrink several times; responses
+# below min_size, streamed files and already encoded responses are sent as they are.
+def register_compression(server, min_size=1024, level=6, mimetypes=COMPRESSIBLE_MIMETYPES):
+    def compress(response):
+        if (response.direct_passthrough or response.is_streamed or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers or response.mimetype not in mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        if 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    server.after_request(compress)
+    return compress
@@ -0,0 +1,400 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+import numpy as np
+import pandas as pd
+from DataProcessingApplication import DATE_KEYS, DataProcess, ReportPlan, group_key_columns
+from Instrumentation import stage
+from StreamingStatistics import CovarianceAccumulator
+
+# DuckDB executes every query on all cores and spills to disk by itself, but is optional;
+# SQLite ships with Python and is parallelized here by splitting the table into rowid ranges.
+HAS_DUCKDB = find_spec('duckdb') is not None
+
+ENGINES = ('sqlite', 'duckdb')
+
+# Rows below which a scan is not worth splitting across threads
+MIN_PARTITION_ROWS = 250_000
+
+# Rows of the sample the correlation moments are centered on
+CENTER_SAMPLE_ROWS = 10_000
+
+
+# Stored column holding a key derived from 'Date', so SQL groups by an integer column
+# instead of parsing a date per row
+def date_key_column(key):
+    return f'Date:{key}'
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'BIGINT'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'DOUBLE'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        # Nanoseconds since the epoch
+        return 'BIGINT'
+    return 'TEXT'
+
+
+# Column values as a list of Python scalars with None for missing values
+def _sql_values(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        nanoseconds = values.to_numpy(dtype='datetime64[ns]').view('int64')
+        return pd.Series(nanoseconds, dtype=object).where(values.notna().to_numpy(), None).tolist()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+# Frames on a local embedded SQL store, queried without loading the table into memory.
+# Rows are appended frame by frame (e.g. from DataIngestionContext.ingest_chunks), so the
+# table can be much larger than RAM. Column dtypes and categories are kept in a metadata
+# table, so frames read back and reports computed here match the in-memory ones.
+# A store on a file can be reopened; path=None uses a temporary file removed by close().
+class SQLStore:
+    def __init__(self, path=None, engine='sqlite', table='financials', threads=None, memory_limit=None):
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown SQL engine: {engine}')
+        if engine == 'duckdb' and not HAS_DUCKDB:
+            raise ImportError('The duckdb engine needs the duckdb package')
+        self._temporary = path is None
+        if path is None:
+            handle, path = tempfile.mkstemp(suffix='.duckdb' if engine == 'duckdb' else '.sqlite')
+            os.close(handle)
+            os.remove(path)
+        self.path = path
+        self.engine = engine
+        self.table = table
+        self.threads = threads or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._columns = None
+        self._meta = {}
+        self._load_meta()
+
+    # One connection per thread: SQLite connections cannot be shared between threads
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.engine == 'duckdb':
+                import duckdb
+                connection = duckdb.connect(self.path)
+                connection.execute(f'SET threads TO {int(self.threads)}')
+                if self.memory_limit:
+                    connection.execute(f"SET memory_limit = '{self.memory_limit}'")
+            else:
+                connection = sqlite3.connect(self.path, check_same_thread=False)
+                # Readers in other threads keep working while chunks are appended
+                connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+        if self._temporary:
+            for suffix in ('', '-wal', '-shm', '.wal'):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Rows as a list of tuples and the names of the result columns
+    def query(self, sql, params=()):
+        cursor = self.connection().execute(sql, params)
+        return cursor.fetchall(), [description[0] for description in cursor.description]
+
+    def _meta_table(self):
+        return _quote(f'{self.table}__meta')
+
+    def _load_meta(self):
+        connection = self.connection()
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {self._meta_table()} (key TEXT PRIMARY KEY, value TEXT)')
+        rows, _ = self.query(f'SELECT key, value FROM {self._meta_table()}')
+        self._meta = {key: json.loads(value) for key, value in rows}
+        self._columns = self._meta.get('columns')
+
+    def _save_meta(self, **values):
+        self._meta.update(values)
+        connection = self.connection()
+        connection.execute(f'DELETE FROM {self._meta_table()}')
+        connection.executemany(f'INSERT INTO {self._meta_table()} VALUES (?, ?)',
+                               [(key, json.dumps(value)) for key, value in self._meta.items()])
+
+    # Columns of the frames the store was loaded with, in order, with their dtype and
+    # (for categoricals) categories
+    @property
+    def columns(self):
+        return [column['name'] for column in self._columns or []]
+
+    def _column(self, name):
+        for column in self._columns or []:
+            if column['name'] == name:
+                return column
+        raise KeyError(f'The store has no {name!r} column')
+
+    def __len__(self):
+        return self._meta.get('rows', 0)
+
+    # Changes whenever rows are appended, so cached reports of an older load are not reused
+    def fingerprint(self):
+        key = (os.path.abspath(self.path), self.table, self._meta.get('token'), self._meta.get('version'), len(self))
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _create(self, data):
+        columns = []
+        for name in data.columns:
+            dtype = data[name].dtype
+            column = {'name': name, 'dtype': 'category' if isinstance(dtype, pd.CategoricalDtype) else str(dtype),
+                      'sql': _sql_type(dtype.categories.dtype if isinstance(dtype, pd.CategoricalDtype) else dtype)}
+            if isinstance(dtype, pd.CategoricalDtype):
+                column['categories'] = []
+            columns.append(column)
+        stored = [f'{_quote(column["name"])} {column["sql"]}' for column in columns]
+        if 'Date' in data.columns:
+            stored += [f'{_quote(date_key_column(key))} BIGINT' for key in DATE_KEYS]
+        connection = self.connection()
+        connection.execute(f'DROP TABLE IF EXISTS {_quote(self.table)}')
+        connection.execute(f'CREATE TABLE {_quote(self.table)} ({", ".join(stored)})')
+        self._columns = columns
+        self._save_meta(columns=columns, rows=0, version=0, token=uuid.uuid4().hex)
+
+    # Append a frame. The first frame (or replace=True) defines the table's columns.
+    def load(self, data, replace=False):
+        if self._columns is None or replace:
+            self._create(data)
+        if list(data.columns) != self.columns:
+            raise ValueError(f'Expected the columns {self.columns}, got {list(data.columns)}')
+
+        values = [_sql_values(data[name]) for name in self.columns]
+        if 'Date' in self.columns:
+            values += [_sql_values(key) for key in group_key_columns(data, list(DATE_KEYS))]
+        for column in self._columns:
+            if 'categories' in column:
+                # Chunks may carry different categories; the store keeps their sorted union,
+                # which is what reading the whole file with a category dtype gives
+                column['categories'] = sorted(set(column['categories']) | set(data[column['name']].dropna().unique()))
+
+        connection = self.connection()
+        placeholders = ', '.join('?' * len(values))
+        with stage('insert', rows_in=len(data)):
+            if self.engine == 'duckdb':
+                connection.execute('BEGIN TRANSACTION')
+            connection.executemany(f'INSERT INTO {_quote(self.table)} VALUES ({placeholders})', list(zip(*values)))
+            self._save_meta(columns=self._columns, rows=len(self) + len(data), version=self._meta['version'] + 1)
+            connection.commit()
+        return self
+
+    def load_chunks(self, chunks, replace=False):
+        for i, chunk in enumerate(chunks):
+            self.load(chunk, replace=replace and i == 0)
+        return self
+
+    # Restore the dtypes of the loaded frames on query results
+    def _restore(self, frame, names=None):
+        for name in frame.columns if names is None else names:
+            try:
+                column = self._column(name)
+            except KeyError:
+                continue
+            if column['dtype'] == 'category':
+                frame[name] = pd.Categorical(frame[name], categories=column['categories'])
+            elif column['dtype'].startswith('datetime64'):
+                frame[name] = pd.to_datetime(frame[name].astype('Int64'), unit='ns').astype(column['dtype'])
+            elif frame[name].notna().all() or not pd.api.types.is_integer_dtype(column['dtype']):
+                frame[name] = frame[name].astype(column['dtype'])
+        return frame
+
+    def _frame(self, rows, names):
+        frame = pd.DataFrame.from_records(rows, columns=names, coerce_float=True)
+        return self._restore(frame)
+
+    # Rowid ranges splitting the table across the SQLite threads
+    def _partitions(self):
+        if self.engine == 'duckdb' or len(self) < 2 * MIN_PARTITION_ROWS or self.threads < 2:
+            return [None]
+        rows, _ = self.query(f'SELECT MIN(rowid), MAX(rowid) FROM {_quote(self.table)}')
+        low, high = rows[0]
+        count = min(self.threads, len(self) // MIN_PARTITION_ROWS)
+        bounds = np.linspace(low, high + 1, count + 1).astype('int64')
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _map(self, func, partitions):
+        if len(partitions) == 1:
+            return [func(partitions[0])]
+        with ThreadPoolExecutor(len(partitions)) as executor:
+            return list(executor.map(func, partitions))
+
+    @staticmethod
+    def _where(partition, conditions=()):
+        conditions = list(conditions)
+        params = ()
+        if partition is not None:
+            conditions.append('rowid >= ? AND rowid < ?')
+            params = partition
+        return (' WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    def _stored(self, key):
+        return date_key_column(key) if key in DATE_KEYS else key
+
+    # Sum value columns per group key, in the shape of GroupedSumProcess.partial: indexed by
+    # the keys (categoricals as categoricals, date keys as int32) and sorted like a groupby
+    def grouped_sums(self, keys, value_columns):
+        keys, value_columns = list(keys), list(value_columns)
+        stored = [_quote(self._stored(key)) for key in keys]
+        sums = [f'COALESCE(SUM({_quote(col)}), 0)' for col in value_columns]
+
+        def run(partition):
+            # Rows with a missing key are dropped, as groupby does
+            where, params = self._where(partition, [f'{key} IS NOT NULL' for key in stored])
+            return self.query(f'SELECT {", ".join(stored + sums)} FROM {_quote(self.table)}{where} '
+                              f'GROUP BY {", ".join(stored)}', params)[0]
+
+        rows = [row for partial in self._map(run, self._partitions()) for row in partial]
+        frame = pd.DataFrame.from_records(rows, columns=keys + value_columns, coerce_float=True)
+        for key in keys:
+            if key in DATE_KEYS:
+                frame[key] = frame[key].astype('int32')
+        self._restore(frame, [key for key in keys if key not in DATE_KEYS])
+        for col in value_columns:
+            if pd.api.types.is_float_dtype(self._column(col)['dtype']):
+                frame[col] = frame[col].astype('float64')
+        frame = frame.groupby(keys, observed=True, sort=True)[value_columns].sum()
+        return frame
+
+    # CovarianceAccumulator of the columns with the pairwise-complete semantics of
+    # DataFrame.corr(). Rows are grouped by which columns are missing, so every group sums
+    # plain values, squares and cross products (no per-pair conditions), and a pair's moments
+    # are the sums of the groups where both of its columns are present. Values are centered
+    # on a sample mean first so the sums do not lose precision.
+    def covariance(self, columns):
+        columns = list(columns)
+        size = len(columns)
+        averages, _ = self.query(f'SELECT {", ".join(f"AVG({_quote(col)})" for col in columns)} '
+                                 f'FROM (SELECT * FROM {_quote(self.table)} LIMIT {CENTER_SAMPLE_ROWS})')
+        shift = np.array([value if value is not None else 0.0 for value in averages[0]], dtype='float64')
+        centered = ', '.join(f'{_quote(col)} - {float(value)!r} AS c{i}'
+                             for i, (col, value) in enumerate(zip(columns, shift)))
+        pairs = [(i, j) for i in range(size) for j in range(i, size)]
+
+        missing = [f'c{i} IS NULL' for i in range(size)]
+        expressions = (missing + ['COUNT(*)'] + [f'COALESCE(SUM(c{i}), 0)' for i in range(size)]
+                       + [f'COALESCE(SUM(c{i} * c{j}), 0)' for i, j in pairs])
+
+        def run(partition):
+            where, params = self._where(partition)
+            rows, _ = self.query(f'SELECT {", ".join(expressions)} '
+                                 f'FROM (SELECT {centered} FROM {_quote(self.table)}{where}) '
+                                 f'GROUP BY {", ".join(missing)}', params)
+            count, sums, squares, products = (np.zeros((size, size)) for _ in range(4))
+            for row in rows:
+                present = ~np.array(row[:size], dtype=bool)
+                both = np.outer(present, present)
+                totals = np.array(row[size + 1:2 * size + 1], dtype='float64')
+                cross = np.zeros((size, size))
+                cross[tuple(zip(*pairs))] = row[2 * size + 1:]
+                cross = cross + np.triu(cross, 1).T
+                count += both * row[size]
+                sums += both * totals[:, None]
+                squares += both * np.diag(cross)[:, None]
+                products += both * cross
+
+            mean = np.divide(sums, count, out=np.zeros_like(sums), where=count > 0)
+            accumulator = CovarianceAccumulator(columns)
+            accumulator.count = count
+            accumulator.mean = mean + shift[:, None]
+            accumulator.m2 = squares - count * mean ** 2
+            accumulator.comoment = products - count * mean * mean.T
+            return accumulator
+
+        partials = self._map(run, self._partitions())
+        state = partials[0]
+        for partial in partials[1:]:
+            state.merge(partial)
+        return state
+
+    # The given columns of every row, with their loaded dtypes
+    def select(self, columns=None):
+        columns = list(columns) if columns is not None else self.columns
+        rows, names = self.query(f'SELECT {", ".join(_quote(col) for col in columns)} FROM {_quote(self.table)} '
+                                 'ORDER BY rowid')
+        return self._frame(rows, names)
+
+    # The whole table as frames of at most `rows` rows, in load order
+    def chunks(self, rows=1_000_000):
+        select = ', '.join(_quote(col) for col in self.columns)
+        cursor = self.connection().cursor().execute(f'SELECT {select} FROM {_quote(self.table)} ORDER BY rowid')
+        names = [description[0] for description in cursor.description]
+        start = 0
+        while True:
+            batch = cursor.fetchmany(rows)
+            if not batch:
+                break
+            frame = self._frame(batch, names)
+            frame.index = pd.RangeIndex(start, start + len(frame))
+            start += len(frame)
+            yield frame
+
+
+# Plans several reports over a SQLStore: one GROUP BY per distinct key set, as ReportPlan
+# does with pandas
+class SQLReportPlan(ReportPlan):
+    def __init__(self, strategies, backend):
+        super().__init__(strategies)
+        self.backend = backend
+
+    def aggregate(self, store):
+        aggregates = {}
+        for base, order in self.base_keys.items():
+            with stage('group by ' + ' x '.join(order), rows_in=len(store)):
+                aggregates[base] = store.grouped_sums(order, self.base_columns[base])
+        return aggregates
+
+    def process_unplanned(self, strategy, store):
+        return self.backend.process(strategy, store)
+
+
+# Execution backend of DataProcessingContext running the strategies as SQL over a SQLStore:
+#   DataProcessingContext(ProductPerformance(), backend=SQLBackend()).process(store)
+# Reports give the same frames as the pandas backend. Strategies without a SQL form stream
+# the table through their partial/merge protocol, and row-level ones read it back.
+class SQLBackend:
+    def __init__(self, chunksize=1_000_000):
+        self.chunksize = chunksize
+
+    def fingerprint(self, store):
+        return store.fingerprint()
+
+    def process(self, strategy, store):
+        try:
+            return strategy.process_sql(store)
+        except NotImplementedError:
+            pass
+        if type(strategy).partial is not DataProcess.partial:
+            return strategy.process_chunks(store.chunks(self.chunksize))
+        return strategy.process_data(store.select())
+
+    def process_many(self, strategies, store):
+        return SQLReportPlan(strategies, self).execute(store)
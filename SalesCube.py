@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from CurrencyParsing import parse_currency_columns
+from DataProcessingApplication import GroupedSumProcess, group_key_columns, month_starts
+from ReportCache import frame_fingerprint
+
+CUBE_DIMENSIONS = ['Country', 'Product', 'Segment', 'Discount Band']
+
+# Additive measures only; prices are per-unit and would be meaningless as sums
+CUBE_MEASURES = ['Units Sold', 'Gross Sales', 'Discounts', 'Sales', 'COGS', 'Profit']
+
+GRANULARITIES = {
+    'month': ['Year', 'Month'],
+    'day': ['Year', 'Month', 'Day'],
+}
+
+# Name of a moment measure a cube can carry for correlations (see BuildSalesCube).
+# Moments of a pair of columns are taken over the rows where both are present:
+# n (row count), sum and sq (sum and sum of squares of column) and product.
+def moment_name(stat, column, other):
+    return f'moments:{stat}|{column}|{other}'
+
+
+# Variance from sums. The rounding left over when a column is constant would turn its
+# correlations into +-1 instead of NaN, so differences at that scale count as zero.
+def _variance(sq, total, count):
+    spread = sq - total * total / count
+    return 0.0 if spread <= 1e-12 * sq else spread / (count - 1)
+
+
+# Keys a cube can answer without storing them, computed from its stored levels
+DERIVED_KEYS = {
+    'Quarter': lambda cube: ((cube.level('Month') - 1) // 3 + 1).rename('Quarter'),
+}
+
+
+# Sales pre-aggregated over time x Country x Product x Segment x Discount Band.
+# Its size follows the number of distinct combinations, not the number of raw rows, so
+# roll-ups (quarterly, per segment, per country...) cost the same however large the data is.
+class SalesCube:
+    def __init__(self, data, granularity='month', moments=()):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+        # Sums indexed by the time keys followed by the dimensions
+        self.data = data
+        self.granularity = granularity
+        # Columns whose count, sums and cross-product sums are stored for correlations
+        self.moments = list(moments)
+
+    @classmethod
+    def from_frame(cls, data, granularity='month', measures=None, moments=None):
+        builder = BuildSalesCube(granularity, measures, moments)
+        return builder.process_data(data)
+
+    @property
+    def measures(self):
+        return [col for col in self.data.columns if not col.startswith('moments:')]
+
+    def __len__(self):
+        return len(self.data)
+
+    def fingerprint(self):
+        return frame_fingerprint(self.data)
+
+    def level(self, key):
+        if key in DERIVED_KEYS:
+            return DERIVED_KEYS[key](self)
+        if key not in self.data.index.names:
+            raise KeyError(f'The cube has no {key!r} dimension')
+        return pd.Series(self.data.index.get_level_values(key), name=key)
+
+    # Start of every cell's period, used for date-range filters
+    def dates(self):
+        dates = month_starts(self.level('Year'), self.level('Month'))
+        if self.granularity == 'day':
+            dates += pd.to_timedelta(self.level('Day') - 1, unit='D')
+        return dates
+
+    # Sum the measures per group key; the result has the shape of GroupedSumProcess.partial
+    def rollup(self, keys, measures=None):
+        measures = list(measures or self.measures)
+        missing = [measure for measure in measures if measure not in self.data.columns]
+        if missing:
+            raise KeyError(f'The cube has no {missing} measures')
+        values = self.data[measures].reset_index(drop=True)
+        if not keys:
+            return values.sum().to_frame().T
+        return values.groupby([self.level(key) for key in keys], observed=True).sum()
+
+    # Pairwise-complete covariance and correlation of moment columns over the cube's cells,
+    # from the stored sums; they match DataFrame.cov() and DataFrame.corr() of the rows
+    def _pair_moments(self, columns):
+        missing = [col for col in columns if col not in self.moments]
+        if missing:
+            raise KeyError(f'The cube has no moments of {missing}')
+        totals = self.data[[col for col in self.data.columns if col.startswith('moments:')]].sum()
+        pairs = {}
+        for a in columns:
+            for b in columns:
+                x, y = sorted((a, b), key=self.moments.index)
+                count = totals[moment_name('n', x, y)]
+                sum_x, sum_y = totals[moment_name('sum', a, b)], totals[moment_name('sum', b, a)]
+                if count <= 1:
+                    pairs[a, b] = (np.nan, np.nan, np.nan)
+                    continue
+                sq_x, sq_y = totals[moment_name('sq', a, b)], totals[moment_name('sq', b, a)]
+                pairs[a, b] = (
+                    (totals[moment_name('product', x, y)] - sum_x * sum_y / count) / (count - 1),
+                    _variance(sq_x, sum_x, count),
+                    _variance(sq_y, sum_y, count),
+                )
+        return pairs
+
+    def covariance(self, columns):
+        pairs = self._pair_moments(columns)
+        return pd.DataFrame([[pairs[a, b][0] for b in columns] for a in columns], index=columns, columns=columns)
+
+    def correlation(self, columns):
+        pairs = self._pair_moments(columns)
+        values = [[covariance / np.sqrt(variance_x * variance_y) if variance_x * variance_y > 0 else np.nan
+                   for covariance, variance_x, variance_y in (pairs[a, b] for b in columns)] for a in columns]
+        return pd.DataFrame(np.clip(values, -1.0, 1.0), index=columns, columns=columns)
+
+    # Slice the cube: selections maps a dimension to the values to keep, start/end bound the
+    # period (inclusive). Returns a smaller cube that answers the same queries.
+    def filter(self, selections=None, start=None, end=None):
+        mask = np.ones(len(self.data), dtype=bool)
+        for key, values in (selections or {}).items():
+            if values is None:
+                continue
+            if isinstance(values, str) or not hasattr(values, '__iter__'):
+                values = [values]
+            mask &= self.level(key).isin(list(values)).to_numpy()
+        if start is not None or end is not None:
+            dates = self.dates()
+            if start is not None:
+                mask &= (dates >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                mask &= (dates <= pd.Timestamp(end)).to_numpy()
+        return SalesCube(self.data[mask] if not mask.all() else self.data, self.granularity, self.moments)
+
+    def merge(self, other):
+        if other.granularity != self.granularity or other.moments != self.moments:
+            raise ValueError('Cannot merge cubes of different granularity or moments')
+        builder = BuildSalesCube(self.granularity, self.measures, self.moments)
+        return SalesCube(builder.merge(self.data, other.data), self.granularity, self.moments)
+
+
+# Builds a SalesCube. It is a grouped sum over every cube key, so it streams over chunks,
+# merges, caches and runs in the incremental pipeline like any other grouped report.
+# With moments, pairwise counts, sums, sums of squares and product sums of those columns are
+# stored per cell as well, so correlations of any slice can be answered without the rows.
+class BuildSalesCube(GroupedSumProcess):
+    def __init__(self, granularity='month', measures=None, moments=None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+        self.granularity = granularity
+        self.group_keys = GRANULARITIES[granularity] + CUBE_DIMENSIONS
+        self.value_columns = list(measures or CUBE_MEASURES)
+        self.moments = list(moments or [])
+
+    def partial(self, data):
+        # Money columns may still be raw strings when the data was read without a schema
+        keys = group_key_columns(data, self.group_keys)
+        grouped = parse_currency_columns(data, self.value_columns).groupby(keys, observed=True)
+        sums = grouped.sum()
+        if not self.moments:
+            return sums
+
+        # Moment sums are accumulated per cell with bincount over the group numbers
+        values = parse_currency_columns(data, self.moments).to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        groups = grouped.ngroup().to_numpy()
+        in_cell = groups >= 0
+        groups, values, present = groups[in_cell], values[in_cell], present[in_cell]
+
+        def cell_sums(weights):
+            return np.bincount(groups, weights, minlength=len(sums))
+
+        moments = {}
+        for i, column in enumerate(self.moments):
+            for j in range(i, len(self.moments)):
+                other = self.moments[j]
+                both = present[:, i] & present[:, j]
+                x, y = values[:, i] * both, values[:, j] * both
+                moments[moment_name('n', column, other)] = cell_sums(both.astype('float64'))
+                moments[moment_name('sum', column, other)] = cell_sums(x)
+                moments[moment_name('sum', other, column)] = cell_sums(y)
+                moments[moment_name('sq', column, other)] = cell_sums(x * x)
+                moments[moment_name('sq', other, column)] = cell_sums(y * y)
+                moments[moment_name('product', column, other)] = cell_sums(x * y)
+        return pd.concat([sums, pd.DataFrame(moments, index=sums.index)], axis=1)
+
+    def finalize(self, state):
+        return SalesCube(state, self.granularity, self.moments)
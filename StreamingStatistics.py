@@ -0,0 +1,290 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Percentiles reported by summary(), as in DataFrame.describe()
+SUMMARY_PERCENTILES = (0.25, 0.5, 0.75)
+
+# Rows converted to a float array at a time, bounding the temporaries of an update
+BLOCK_ROWS = 4096
+
+
+# Float arrays of the columns, BLOCK_ROWS rows at a time, with NaN for missing values.
+# Built column by column: slicing rows of the frame would consolidate its blocks in place.
+def row_blocks(data, columns):
+    series = [data[col] for col in columns]
+    for start in range(0, len(data), BLOCK_ROWS):
+        block = np.empty((min(BLOCK_ROWS, len(data) - start), len(columns)))
+        for i, values in enumerate(series):
+            block[:, i] = values.iloc[start:start + BLOCK_ROWS].to_numpy(dtype='float64', na_value=np.nan)
+        yield block
+
+
+# Mergeable covariance accumulator with the pairwise-complete semantics of DataFrame.corr().
+# For every pair of columns (i, j) it tracks, over the rows where both values are present:
+#   count[i, j]    number of rows
+#   mean[i, j]     mean of column i
+#   m2[i, j]       sum of squared deviations of column i
+#   comoment[i, j] sum of (x_i - mean_i) * (x_j - mean_j)
+# Chunks are folded in with the pairwise update of Chan et al., so accumulators built on
+# separate chunks (or processes) can be merged without revisiting the rows.
+class CovarianceAccumulator:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = np.zeros((size, size))
+        self.mean = np.zeros((size, size))
+        self.m2 = np.zeros((size, size))
+        self.comoment = np.zeros((size, size))
+
+    @classmethod
+    def from_frame(cls, data, columns=None):
+        accumulator = cls(data.columns if columns is None else columns)
+        accumulator.update(data)
+        return accumulator
+
+    def update(self, data):
+        for values in row_blocks(data, self.columns):
+            self.update_values(values)
+        return self
+
+    # Fold in a float array with one column per accumulator column, NaN marking missing values
+    def update_values(self, values):
+        present = ~np.isnan(values)
+        weights = present.astype('float64')
+
+        # Shift by the chunk means before forming sums of products to avoid cancellation
+        counts = weights.sum(axis=0)
+        shift = np.divide(np.nansum(values, axis=0), counts, out=np.zeros(len(self.columns)), where=counts > 0)
+        centered = np.where(present, values - shift, 0.0)
+
+        count = weights.T @ weights
+        sums = centered.T @ weights
+        squares = (centered ** 2).T @ weights
+        products = centered.T @ centered
+
+        mean = np.divide(sums, count, out=np.zeros_like(sums), where=count > 0)
+        chunk = CovarianceAccumulator(self.columns)
+        chunk.count = count
+        chunk.mean = mean + shift[:, None]
+        chunk.m2 = squares - count * mean ** 2
+        chunk.comoment = products - count * mean * mean.T
+        self.merge(chunk)
+        return self
+
+    def merge(self, other):
+        count = self.count + other.count
+        ratio = np.divide(other.count, count, out=np.zeros_like(count), where=count > 0)
+        delta = other.mean - self.mean
+        scale = self.count * ratio
+
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + other.m2 + delta ** 2 * scale
+        self.comoment = self.comoment + other.comoment + delta * delta.T * scale
+        self.count = count
+        return self
+
+    def covariance(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = np.where(self.count > 1, self.comoment / (self.count - 1), np.nan)
+        return pd.DataFrame(covariance, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        correlation = np.where(self.count > 1, np.clip(correlation, -1.0, 1.0), np.nan)
+        return pd.DataFrame(correlation, index=self.columns, columns=self.columns)
+
+
+# Mergeable approximate quantiles of a stream (a KLL sketch). Values are kept in levels of
+# compactors: an item at level h stands for 2**h values. A level over its capacity is sorted
+# and every other item (from a random offset) moves up a level, so memory stays around 3k
+# items whatever the stream length, and the rank error of a quantile is about 1.7 / k of the
+# count. Sketches built on separate chunks or processes merge by concatenating their levels.
+# Below k values nothing is compacted and quantiles are exact.
+class QuantileSketch:
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        for level, items in enumerate(other.levels):
+            if level < len(self.levels):
+                self.levels[level] = np.concatenate([self.levels[level], items])
+            else:
+                self.levels.append(items.copy())
+        self._compress()
+        return self
+
+    # Levels shrink geometrically towards the bottom, where items carry the least weight
+    def _capacity(self, level):
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level)))
+
+    # Compact the lowest level over its capacity while the sketch holds more than it may
+    def _compress(self):
+        while sum(map(len, self.levels)) > sum(map(self._capacity, range(len(self.levels)))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) > self._capacity(h))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind so the promoted items pair up exactly
+            keep = items[:len(items) % 2]
+            promoted = items[len(keep) + self._rng.integers(2)::2]
+            self.levels[level] = keep
+            if level + 1 == len(self.levels):
+                self.levels.append(promoted)
+            else:
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    # Approximate q-quantiles (q in [0, 1], scalar or array); NaN while the sketch is empty
+    def quantile(self, q):
+        q = np.asarray(q, dtype='float64')
+        if not self.count:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, ranks = items[order], np.cumsum(weights[order])
+        index = np.clip(np.searchsorted(ranks, q * ranks[-1], side='left'), 0, len(items) - 1)
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, items[index]))
+        return result if q.ndim else float(result)
+
+
+# One-pass statistics of several columns: pairwise covariances and correlations (a
+# CovarianceAccumulator), exact count, mean, std, min and max per column, and approximate
+# quantiles (a QuantileSketch per column). Every part merges, so chunks can be accumulated
+# separately, in any order or in other processes (accumulators pickle), then merged.
+class StatisticsAccumulator:
+    def __init__(self, columns, k=200):
+        self.columns = list(columns)
+        self.moments = CovarianceAccumulator(self.columns)
+        self.sketches = [QuantileSketch(k, seed=i) for i in range(len(self.columns))]
+
+    @classmethod
+    def from_frame(cls, data, columns=None, k=200):
+        accumulator = cls(data.columns if columns is None else columns, k)
+        accumulator.update(data)
+        return accumulator
+
+    def update(self, data):
+        for values in row_blocks(data, self.columns):
+            self.update_values(values)
+        return self
+
+    def update_values(self, values):
+        self.moments.update_values(values)
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(values[:, i])
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def covariance(self):
+        return self.moments.covariance()
+
+    def correlation(self):
+        return self.moments.correlation()
+
+    # Per-column statistics laid out like DataFrame.describe(); percentiles are approximate
+    def summary(self, percentiles=SUMMARY_PERCENTILES):
+        diagonal = np.arange(len(self.columns))
+        count = self.moments.count[diagonal, diagonal]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.where(count > 1, np.sqrt(self.moments.m2[diagonal, diagonal] / (count - 1)), np.nan)
+        rows = {
+            'count': count,
+            'mean': np.where(count > 0, self.moments.mean[diagonal, diagonal], np.nan),
+            'std': std,
+            'min': [sketch.min for sketch in self.sketches],
+        }
+        for q in percentiles:
+            rows[f'{q * 100:g}%'] = [sketch.quantile(q) for sketch in self.sketches]
+        rows['max'] = [sketch.max for sketch in self.sketches]
+        return pd.DataFrame(rows, index=self.columns, dtype='float64').T
+
+
+# A StatisticsAccumulator per group of the `by` columns (e.g. per Country or Segment).
+# Only the accumulators are kept, so memory follows the number of groups, not of rows.
+class GroupedStatistics:
+    def __init__(self, columns, by, k=200):
+        self.columns = list(columns)
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.k = k
+        self.groups = {}
+
+    @classmethod
+    def from_frame(cls, data, columns, by, k=200):
+        accumulator = cls(columns, by, k)
+        accumulator.update(data)
+        return accumulator
+
+    # The frame is read in row_blocks once; each block's rows are sorted by group and every
+    # group's part of the block goes to its accumulator, so at most a block is copied at a time
+    def update(self, data):
+        key = self.by[0] if len(self.by) == 1 else self.by
+        # Group number of every row; -1 for rows with a missing key, which groupby drops too
+        codes = np.full(len(data), -1)
+        accumulators = []
+        for number, (group, rows) in enumerate(data.groupby(key, observed=True, sort=False).indices.items()):
+            if group not in self.groups:
+                self.groups[group] = StatisticsAccumulator(self.columns, self.k)
+            accumulators.append(self.groups[group])
+            codes[rows] = number
+
+        start = 0
+        for block in row_blocks(data, self.columns):
+            block_codes = codes[start:start + len(block)]
+            start += len(block)
+            order = np.argsort(block_codes, kind='stable')
+            for rows in np.split(order, np.flatnonzero(np.diff(block_codes[order])) + 1):
+                if len(rows) and block_codes[rows[0]] >= 0:
+                    accumulators[block_codes[rows[0]]].update_values(block[rows])
+        return self
+
+    # Groups new to self get a fresh accumulator, so later updates never reach into other's
+    def merge(self, other):
+        for group, accumulator in other.groups.items():
+            if group not in self.groups:
+                self.groups[group] = StatisticsAccumulator(self.columns, self.k)
+            self.groups[group].merge(accumulator)
+        return self
+
+    # One frame per group stacked under the group keys, as DataFrame.groupby(by).corr() does
+    def _stack(self, frames):
+        groups = sorted(self.groups)
+        if not groups:
+            return pd.DataFrame(columns=self.columns, dtype='float64')
+        return pd.concat([frames(self.groups[group]) for group in groups], keys=groups,
+                         names=self.by + [None])
+
+    def correlation(self):
+        return self._stack(StatisticsAccumulator.correlation)
+
+    def covariance(self):
+        return self._stack(StatisticsAccumulator.covariance)
+
+    def summary(self, percentiles=SUMMARY_PERCENTILES):
+        return self._stack(lambda accumulator: accumulator.summary(percentiles))
@@ -0,0 +1,132 @@
+import math
+import re
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+# Operators of the dash_table filter syntax, with their symbolic aliases.
+# 'i'/'s' prefixes select case-insensitive or case-sensitive matching.
+OPERATORS = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+    'is blank': 'blank', 'is nil': 'blank',
+}
+
+FILTER_PART = re.compile(
+    r'^\s*\{(?P<column>[^}]+)\}\s+(?P<case>[is]?)(?P<operator>' +
+    '|'.join(re.escape(op) for op in sorted(OPERATORS, key=len, reverse=True)) +
+    r')(?:\s+(?P<value>.*?))?\s*$'
+)
+
+
+# Split a dash_table filter_query into (column, operator, value, case_sensitive) clauses
+def parse_filter_query(filter_query):
+    clauses = []
+    for part in (filter_query or '').split(' && '):
+        if not part.strip():
+            continue
+        match = FILTER_PART.match(part)
+        if match is None:
+            raise ValueError(f'Unsupported filter expression: {part}')
+        value = match.group('value')
+        if value is not None and len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'`':
+            value = value[1:-1]
+        clauses.append((match.group('column'), OPERATORS[match.group('operator')], value, match.group('case') != 'i'))
+    return clauses
+
+
+def _convert_value(values, value):
+    if is_numeric_dtype(values.dtype):
+        return float(value)
+    if is_datetime64_any_dtype(values.dtype):
+        return pd.Timestamp(value)
+    return value
+
+
+# Date prefixes ("2014", "2014-06", "2014-06-01") become half-open timestamp ranges
+def _date_range(value):
+    parts = value.strip().split('-')
+    start = pd.Timestamp(year=int(parts[0]), month=int(parts[1]) if len(parts) > 1 else 1,
+                         day=int(parts[2]) if len(parts) > 2 else 1)
+    offset = [pd.DateOffset(years=1), pd.DateOffset(months=1), pd.DateOffset(days=1)][min(len(parts), 3) - 1]
+    return start, start + offset
+
+
+def _text_mask(values, operator, value, case_sensitive):
+    # Categorical columns are matched on their categories and expanded through the codes
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        labels = pd.Series(values.cat.categories.astype(str))
+        matched = _text_mask(labels, operator, value, case_sensitive)
+        return values.isin(values.cat.categories[matched.to_numpy()])
+    text = values.astype(str)
+    if operator == 'contains':
+        return text.str.contains(value, case=case_sensitive, regex=False)
+    if case_sensitive:
+        return text == value
+    return text.str.lower() == value.lower()
+
+
+def _clause_mask(data, column, operator, value, case_sensitive):
+    if column not in data.columns:
+        raise ValueError(f'Unknown column: {column}')
+    values = data[column]
+
+    if operator == 'blank':
+        return values.isnull()
+    if operator == 'datestartswith':
+        start, end = _date_range(value)
+        if not is_datetime64_any_dtype(values.dtype):
+            values = pd.to_datetime(values, errors='coerce')
+        return (values >= start) & (values < end)
+    if operator == 'contains' or (operator == 'eq' and not is_numeric_dtype(values.dtype)
+                                  and not is_datetime64_any_dtype(values.dtype)):
+        return _text_mask(values, operator, value, case_sensitive)
+
+    try:
+        value = _convert_value(values, value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid value for {column}: {value}')
+    if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+        values = values.astype(str)
+    comparisons = {
+        'eq': values.__eq__, 'ne': values.__ne__, 'lt': values.__lt__,
+        'le': values.__le__, 'gt': values.__gt__, 'ge': values.__ge__,
+    }
+    return comparisons[operator](value)
+
+
+# Apply a dash_table filter_query as vectorized boolean masks
+def filter_frame(data, filter_query):
+    mask = pd.Series(True, index=data.index)
+    for column, operator, value, case_sensitive in parse_filter_query(filter_query):
+        mask &= _clause_mask(data, column, operator, value, case_sensitive).fillna(False).astype(bool)
+    return data[mask] if not mask.all() else data
+
+
+# Apply a dash_table sort_by list ([{'column_id': ..., 'direction': 'asc'|'desc'}, ...])
+def sort_frame(data, sort_by):
+    if not sort_by:
+        return data
+    return data.sort_values(
+        [col['column_id'] for col in sort_by],
+        ascending=[col['direction'] == 'asc' for col in sort_by],
+        kind='stable',
+    )
+
+
+# Serve one page of a server-side table: returns (records, page_count)
+def query_table(data, page_current=0, page_size=10, filter_query='', sort_by=None):
+    view = sort_frame(filter_frame(data, filter_query), sort_by)
+    page_count = max(1, math.ceil(len(view) / page_size))
+    page = view.iloc[page_current * page_size:(page_current + 1) * page_size]
+
+    # Only the visible rows are converted into JSON-friendly values
+    page = page.assign(**{
+        col: page[col].dt.strftime('%Y-%m-%d') for col in page.columns if is_datetime64_any_dtype(page[col].dtype)
+    })
+    return page.astype(object).where(page.notnull(), None).to_dict('records'), page_count
@@ -0,0 +1,33 @@
+# Measure how multi-file ingestion scales with the number of workers.
+# Run from the repository root: python -m benchmarks.bulk_ingestion [files] [rows_per_file]
+import os
+import sys
+import tempfile
+from BulkIngestion import BulkDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from benchmarks.typed_ingestion import write_financials
+
+
+def main(files=32, rows_per_file=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        write_financials(rows_per_file, os.path.join(tmp, 'part-0.csv'))
+        with open(os.path.join(tmp, 'part-0.csv'), 'rb') as source:
+            content = source.read()
+        for i in range(1, files):
+            with open(os.path.join(tmp, f'part-{i}.csv'), 'wb') as target:
+                target.write(content)
+
+        print(f'{files} files x {rows_per_file:,} rows')
+        for use_processes in [False, True]:
+            baseline = None
+            for workers in sorted({1, 2, 4, os.cpu_count()}):
+                ingestion = BulkDataIngestion(FINANCIALS_SCHEMA, max_workers=workers, use_processes=use_processes)
+                result = ingestion.ingest(os.path.join(tmp, '*.csv'))
+                baseline = baseline or result.seconds
+                pool = 'processes' if use_processes else 'threads'
+                print(f'  {pool:<9} {workers:>3} workers  {result.seconds:.3f}s  speedup {baseline / result.seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
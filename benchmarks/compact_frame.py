@@ -0,0 +1,49 @@
+# Print the memory report of compact_frame on a plain read_csv frame of synthetic Financials
+# data, and time the grouped reports on the compact frame against pandas groupbys of the
+# same keys. Run from the repository root: python -m benchmarks.compact_frame [rows]
+import os
+import sys
+import time
+import pandas as pd
+from DataProcessingApplication import (
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, MonthlySalesDistribution, SegmentSalesTrends,
+    group_key_columns,
+)
+from MemoryOptimization import compact_frame
+from benchmarks.synthetic import write_financials
+
+STRATEGIES = [SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, MonthlySalesDistribution, SegmentSalesTrends]
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows=1_000_000):
+    file_path = f'.cache/benchmarks/financials-{rows}-seed0.csv'
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_financials(rows, file_path)
+
+    raw = pd.read_csv(file_path)
+    start = time.perf_counter()
+    data, report = compact_frame(raw)
+    print(f'{rows:,} rows compacted in {time.perf_counter() - start:.2f}s')
+    print(report)
+    data['Date'] = pd.to_datetime(data['Date'].astype(str), format='%d/%m/%Y')
+
+    for strategy_class in STRATEGIES:
+        strategy = strategy_class()
+        keys = group_key_columns(data, strategy.group_keys)
+        groupby = best_of(lambda: data.groupby(keys, observed=True)[strategy.value_columns].sum())
+        codes = best_of(lambda: strategy.partial(data))
+        print(f'    {strategy_class.__name__:<28} groupby {groupby * 1000:8.1f} ms   codes {codes * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,46 @@
+# Time the dashboard's cross-filter reports (all six charts) for typical selections.
+# Run from the repository root: python -m benchmarks.cross_filter [rows]
+import sys
+import time
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, CountryWiseSalesDistribution,
+    DiscountImpactOnSales, CorrelationAnalysis,
+)
+from CrossFilter import CrossFilter
+from SalesCube import SalesCube
+
+STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, CountryWiseSalesDistribution,
+    DiscountImpactOnSales, CorrelationAnalysis,
+]
+
+SELECTIONS = {
+    'no filter': ({}, None, None),
+    'one country': ({'Country': ['Canada']}, None, None),
+    'country x segment': ({'Country': ['Canada', 'France'], 'Segment': ['Government']}, None, None),
+    'product + half year': ({'Product': ['Paseo']}, '2014-01-01', '2014-06-30'),
+}
+
+
+def main(rows=1_000_000):
+    sample = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+    data = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).iloc[:rows]
+    start = time.perf_counter()
+    cube = SalesCube.from_frame(data, moments=CorrelationAnalysis.columns)
+    cross_filter = CrossFilter(data, cube, row_columns=['Discount Band', 'Sales', 'Profit'])
+    print(f'Financials ({rows:,} rows): cross filter built in {time.perf_counter() - start:.2f}s')
+
+    for label, (selections, start_date, end_date) in SELECTIONS.items():
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            cross_filter.reports([strategy() for strategy in STRATEGIES], selections, start_date, end_date)
+            timings.append(time.perf_counter() - start)
+        print(f'  {label:<22} {min(timings) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
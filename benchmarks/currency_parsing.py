@@ -0,0 +1,49 @@
+# Benchmark the vectorized money parser against the legacy per-cell Series.apply path.
+# Run from the repository root: python -m benchmarks.currency_parsing [rows]
+import sys
+import time
+import numpy as np
+import pandas as pd
+from CurrencyParsing import parse_currency, convert_currency
+
+
+def load_money_column(rows, file_path='datasets/Financials.csv', column='Profit'):
+    # Tile the sample dataset's column until it reaches the requested size
+    column_data = pd.read_csv(file_path, usecols=[column])[column]
+    repeats = rows // len(column_data) + 1
+    return pd.concat([column_data] * repeats, ignore_index=True).iloc[:rows]
+
+
+def unique_money_column(rows, seed=0):
+    # Worst case for deduplication: every value is distinct
+    amounts = np.random.default_rng(seed).uniform(-1e5, 1e5, rows)
+    return pd.Series([f'(${-x:,.2f})' if x < 0 else f'${x:,.2f} ' for x in amounts])
+
+
+def time_call(func, values):
+    start = time.perf_counter()
+    result = func(values)
+    return time.perf_counter() - start, result
+
+
+def compare(label, values):
+    legacy_time, legacy = time_call(lambda v: v.apply(convert_currency), values)
+    vectorized_time, vectorized = time_call(parse_currency, values)
+
+    # Both paths must agree wherever the legacy converter produced a number
+    comparable = legacy.notnull()
+    assert (legacy[comparable] == vectorized[comparable]).all()
+
+    print(f'{label} ({len(values):,} rows)')
+    print(f'  apply:      {legacy_time:.3f}s')
+    print(f'  vectorized: {vectorized_time:.3f}s')
+    print(f'  speedup:    {legacy_time / vectorized_time:.1f}x')
+
+
+def main(rows=1_000_000):
+    compare('Financials money column', load_money_column(rows))
+    compare('all distinct values', unique_money_column(rows))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
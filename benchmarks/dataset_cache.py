@@ -0,0 +1,37 @@
+# Compare a cold load (parse the CSV) with a warm load (read the cached columnar frame).
+# Run from the repository root: python -m benchmarks.dataset_cache [rows]
+import os
+import sys
+import tempfile
+import time
+from DataCache import DatasetCache, CachedDataIngestion
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from benchmarks.typed_ingestion import write_financials
+
+
+def main(rows=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'financials.csv')
+        write_financials(rows, file_path)
+        print(f'Financials ({rows:,} rows)')
+
+        for cache_format in ['pickle', 'feather']:
+            try:
+                cache = DatasetCache(os.path.join(tmp, cache_format), cache_format)
+                ingestion = CachedDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA), cache)
+                start = time.perf_counter()
+                ingestion.ingest_data(file_path)
+                cold = time.perf_counter() - start
+
+                start = time.perf_counter()
+                ingestion.ingest_data(file_path)
+                warm = time.perf_counter() - start
+            except ImportError as e:
+                print(f'  {cache_format:<8} skipped: {e}')
+                continue
+            print(f'  {cache_format:<8} cold {cold:.3f}s  warm {warm:.3f}s  ({cold / warm:.0f}x)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
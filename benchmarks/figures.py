@@ -0,0 +1,43 @@
+# Payload of the discount-impact chart as raw markers and as the density the figure layer
+# sends above MAX_SCATTER_POINTS, plain and gzipped, for growing row counts, and the time a
+# FigureCache hit takes to return that figure.
+# Run from the repository root: python -m benchmarks.figures [max_rows]
+import gzip
+import sys
+import time
+import pandas as pd
+from plotly.io.json import to_json_plotly
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import DiscountImpactOnSales
+from Figures import FigureCache, discount_impact_figure
+
+
+def payload(figure_func, report):
+    start = time.perf_counter()
+    body = to_json_plotly(figure_func(report)).encode()
+    seconds = time.perf_counter() - start
+    return seconds, len(body), len(gzip.compress(body, compresslevel=6))
+
+
+def main(max_rows=2_000_000):
+    sample = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+    rows = 10_000
+    while rows <= max_rows:
+        data = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).iloc[:rows]
+        report = DiscountImpactOnSales().process_data(data)
+        for label, figure_func in (('markers', lambda r: discount_impact_figure(r, max_points=len(r))),
+                                   ('figure', discount_impact_figure)):
+            seconds, size, compressed = payload(figure_func, report)
+            print(f'{rows:>10,} rows {label:<8} {seconds * 1000:8.1f} ms {size / 1024:10.1f} KiB '
+                  f'{compressed / 1024:9.1f} KiB gzipped')
+        cache = FigureCache()
+        cache.figures([discount_impact_figure], 'selection', lambda: [report])
+        start = time.perf_counter()
+        cache.figures([discount_impact_figure], 'selection', lambda: [report])
+        print(f'{rows:>10,} rows {"hit":<8} {(time.perf_counter() - start) * 1000:8.3f} ms')
+        rows *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,57 @@
+# Compare the legacy json.load ingestion (raw Python objects) with typed, streamed NDJSON
+# ingestion in throughput and peak memory.
+# Run from the repository root: python -m benchmarks.json_ingestion [rows]
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from DataIngestion import JSONDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        return result, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def legacy_load(file_path):
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+def stream_rows(file_path, chunksize=50_000):
+    # Consume the chunks the way a streaming report would, keeping only the row count
+    return sum(len(chunk) for chunk in JSONDataIngestion(lines=True, schema=FINANCIALS_SCHEMA).ingest_chunks(file_path, chunksize))
+
+
+def main(rows=500_000):
+    sample = pd.read_csv('datasets/Financials.csv', dtype=str)
+    data = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).iloc[:rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        array_path = os.path.join(tmp, 'financials.json')
+        lines_path = os.path.join(tmp, 'financials.ndjson')
+        data.to_json(array_path, orient='records')
+        data.to_json(lines_path, orient='records', lines=True)
+
+        print(f'Financials ({rows:,} rows)')
+        runs = [
+            ('json.load (raw objects)', lambda: legacy_load(array_path)),
+            ('typed DataFrame', lambda: JSONDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data(array_path)),
+            ('typed NDJSON, whole', lambda: JSONDataIngestion(lines=True, schema=FINANCIALS_SCHEMA).ingest_data(lines_path)),
+            ('typed NDJSON, streamed', lambda: stream_rows(lines_path)),
+        ]
+        for label, func in runs:
+            _, seconds, peak = measure(func)
+            print(f'  {label:<24} {seconds:6.2f}s  {rows / seconds:>10,.0f} rows/s  peak {peak / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,157 @@
+# Load test of a running dashboard: concurrent clients replay the requests of a session
+# (page, layout, chart and table callbacks with random filters) for a fixed duration and
+# report requests per second and latency percentiles per request kind.
+# Start the server first (python serve.py --workers 4), then from the repository root:
+#   python -m benchmarks.load_test --url http://127.0.0.1:8050 --concurrency 16 --duration 30
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+import numpy as np
+
+COUNTRIES = ['Canada', 'France', 'Germany', 'Mexico', 'United States of America']
+PRODUCTS = ['Amarilla', 'Carretera', 'Montana', 'Paseo', 'VTT', 'Velo']
+SEGMENTS = ['Channel Partners', 'Enterprise', 'Government', 'Midmarket', 'Small Business']
+
+CHART_IDS = [
+    'sales-trends', 'profit-by-country', 'product-performance', 'country-wise-sales', 'discount-impact',
+    'correlation-analysis',
+]
+
+
+def _multi_output(outputs):
+    return '..' + '...'.join(f'{component}.{prop}' for component, prop in outputs) + '..'
+
+
+# Body of a Dash callback request, as the browser sends it
+def callback_request(outputs, inputs):
+    return {
+        'output': _multi_output(outputs) if len(outputs) > 1 else f'{outputs[0][0]}.{outputs[0][1]}',
+        'outputs': [{'id': component, 'property': prop} for component, prop in outputs]
+        if len(outputs) > 1 else {'id': outputs[0][0], 'property': outputs[0][1]},
+        'inputs': [{'id': component, 'property': prop, 'value': value} for component, prop, value in inputs],
+        'changedPropIds': [f'{inputs[-1][0]}.{inputs[-1][1]}'],
+        'state': [],
+    }
+
+
+def charts_request(rng):
+    def pick(values):
+        return sorted(rng.sample(values, rng.randint(1, 2))) if rng.random() < 0.5 else None
+    return callback_request(
+        [(chart_id, 'figure') for chart_id in CHART_IDS],
+        [('data-ready', 'data', True), ('country-filter', 'value', pick(COUNTRIES)),
+         ('product-filter', 'value', pick(PRODUCTS)), ('segment-filter', 'value', pick(SEGMENTS)),
+         ('date-filter', 'start_date', None), ('date-filter', 'end_date', None)],
+    )
+
+
+def table_request(rng):
+    return callback_request(
+        [('table', 'data'), ('table', 'page_count')],
+        [('data-ready', 'data', True), ('table', 'page_current', rng.randint(0, 20)), ('table', 'page_size', 10),
+         ('table', 'sort_by', [{'column_id': 'Sales', 'direction': rng.choice(['asc', 'desc'])}]),
+         ('table', 'filter_query', rng.choice(['', '{Country} = Canada', '{Sales} > 100000']))],
+    )
+
+
+# (kind, method, path, body factory) of the requests a session makes, with their weights
+SCENARIO = [
+    ('page', 'GET', '/', None, 1),
+    ('layout', 'GET', '/_dash-layout', None, 1),
+    ('charts', 'POST', '/_dash-update-component', charts_request, 4),
+    ('table', 'POST', '/_dash-update-component', table_request, 4),
+]
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies) * 1000
+    return {f'p{q}': float(np.percentile(values, q)) for q in (50, 90, 99)} | {'max': float(values.max())}
+
+
+def _client(url, deadline, seed, results, lock):
+    rng = random.Random(seed)
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    kinds = [entry for entry in SCENARIO for _ in range(entry[4])]
+    local = []
+    while time.perf_counter() < deadline:
+        kind, method, path, body_factory, _ = rng.choice(kinds)
+        body = json.dumps(body_factory(rng)).encode() if body_factory else None
+        headers = {'Accept-Encoding': 'gzip', 'Content-Type': 'application/json'}
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+            payload, ok = b'', False
+        local.append((kind, time.perf_counter() - start, ok, len(payload)))
+    connection.close()
+    with lock:
+        results.extend(local)
+
+
+# Run `concurrency` clients for `duration` seconds; returns overall and per-kind statistics
+def run_load_test(url, concurrency=8, duration=10.0, seed=0):
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    clients = [threading.Thread(target=_client, args=(url, deadline, seed + i, results, lock))
+               for i in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    def summary(rows):
+        latencies = [latency for _, latency, _, _ in rows]
+        return {
+            'requests': len(rows), 'errors': sum(not ok for _, _, ok, _ in rows),
+            'rps': len(rows) / elapsed, 'bytes': sum(size for *_, size in rows),
+            **(percentiles(latencies) if latencies else {}),
+        }
+
+    kinds = sorted({kind for kind, *_ in results})
+    return {'seconds': elapsed, 'concurrency': concurrency, 'total': summary(results),
+            'kinds': {kind: summary([row for row in results if row[0] == kind]) for kind in kinds}}
+
+
+def format_summary(name, summary):
+    if not summary['requests']:
+        return f'  {name:<8} no requests'
+    return (f'  {name:<8} {summary["requests"]:>7,} req {summary["rps"]:8.1f} req/s {summary["errors"]:>5} errors   '
+            f'p50 {summary["p50"]:7.1f} ms  p90 {summary["p90"]:7.1f} ms  p99 {summary["p99"]:7.1f} ms  '
+            f'max {summary["max"]:7.1f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test a running dashboard')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the statistics as JSON to this file')
+    args = parser.parse_args(argv)
+
+    stats = run_load_test(args.url, args.concurrency, args.duration, args.seed)
+    print(f'{stats["concurrency"]} clients for {stats["seconds"]:.1f}s against {args.url}')
+    print(format_summary('total', stats['total']))
+    for kind, summary in stats['kinds'].items():
+        print(format_summary(kind, summary))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(stats, file, indent=2)
+    return 1 if stats['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# Compare report latency on the raw rows with the same reports answered from a SalesCube,
+# for growing row counts. Cube queries should stay flat while raw-row reports grow.
+# Run from the repository root: python -m benchmarks.sales_cube [max_rows]
+import sys
+import time
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import SalesTrendsOverTime, MonthlySalesDistribution, QuarterlySales, SegmentSalesTrends
+from SalesCube import SalesCube
+
+STRATEGIES = [SalesTrendsOverTime, MonthlySalesDistribution, QuarterlySales, SegmentSalesTrends]
+
+
+def best_of(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(max_rows=1_000_000):
+    sample = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+    rows = 10_000
+    while rows <= max_rows:
+        data = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).iloc[:rows]
+        start = time.perf_counter()
+        cube = SalesCube.from_frame(data)
+        build = time.perf_counter() - start
+        print(f'{rows:>10,} rows: cube of {len(cube):,} cells built in {build * 1000:.1f} ms')
+        for strategy_class in STRATEGIES:
+            raw = best_of(strategy_class().process_data, data)
+            cubed = best_of(strategy_class().process_cube, cube)
+            print(f'    {strategy_class.__name__:<28} raw {raw * 1000:8.2f} ms   cube {cubed * 1000:6.2f} ms')
+        rows *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,61 @@
+# Compare the pandas and SQL backends of DataProcessingContext on a synthetic CSV streamed
+# into a SQLStore chunk by chunk, so the store never needs the whole file in memory.
+# Run from the repository root: python -m benchmarks.sql_backend [rows] [--engine duckdb] [--threads N]
+import argparse
+import os
+import time
+from DataIngestion import CSVDataIngestion, DataIngestionContext
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    DataProcessingContext, SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis,
+)
+from SQLBackend import SQLStore, SQLBackend
+from benchmarks.synthetic import write_financials
+
+STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, MonthlySalesDistribution,
+    CountryWiseSalesDistribution, CorrelationAnalysis,
+]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SQL processing backend')
+    parser.add_argument('rows', type=int, nargs='?', default=1_000_000)
+    parser.add_argument('--engine', choices=['sqlite', 'duckdb'], default='sqlite')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--data-dir', default='.cache/benchmarks')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    csv_path = os.path.join(args.data_dir, f'financials-{args.rows}-seed0.csv')
+    if not os.path.exists(csv_path):
+        write_financials(args.rows, csv_path)
+
+    ingestion = DataIngestionContext(CSVDataIngestion(schema=FINANCIALS_SCHEMA))
+    data, seconds = timed(ingestion.ingest, csv_path)
+    print(f'{args.rows:,} rows: pandas ingest {seconds:.2f}s')
+
+    with SQLStore(engine=args.engine, threads=args.threads) as store:
+        _, seconds = timed(store.load_chunks, ingestion.ingest_chunks(csv_path, args.chunksize))
+        print(f'{args.engine} load {seconds:.2f}s ({store.threads} threads, {os.path.getsize(store.path) / 2 ** 20:.0f} MiB)')
+        for strategy_class in STRATEGIES:
+            _, pandas_seconds = timed(DataProcessingContext(strategy_class()).process, data)
+            _, sql_seconds = timed(DataProcessingContext(strategy_class(), backend=SQLBackend()).process, store)
+            print(f'    {strategy_class.__name__:<30} pandas {pandas_seconds * 1000:8.1f} ms   '
+                  f'{args.engine} {sql_seconds * 1000:8.1f} ms')
+        strategies = [strategy_class() for strategy_class in STRATEGIES]
+        _, pandas_seconds = timed(DataProcessingContext(None).process_many, strategies, data)
+        _, sql_seconds = timed(DataProcessingContext(None, backend=SQLBackend()).process_many, strategies, store)
+        print(f'    {"process_many":<30} pandas {pandas_seconds * 1000:8.1f} ms   {args.engine} {sql_seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
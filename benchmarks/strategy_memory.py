@@ -0,0 +1,43 @@
+# Report the peak memory each DataProcess strategy allocates relative to its input frame.
+# Run from the repository root: python -m benchmarks.strategy_memory [rows]
+import sys
+import tracemalloc
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis,
+)
+
+STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis,
+]
+
+
+def peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(rows=1_000_000):
+    data = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+    data = pd.concat([data] * (rows // len(data) + 1), ignore_index=True).iloc[:rows]
+    frame_bytes = data.memory_usage(deep=True).sum()
+    print(f'Financials ({rows:,} rows, {frame_bytes / 2 ** 20:,.1f} MiB)')
+
+    for copy_on_write in [False, True]:
+        with pd.option_context('mode.copy_on_write', copy_on_write):
+            print(f'  copy_on_write={copy_on_write}')
+            for strategy_class in STRATEGIES:
+                peak = peak_memory(strategy_class().process_data, data)
+                print(f'    {strategy_class.__name__:<30} {peak / 2 ** 20:8.1f} MiB  ({peak / frame_bytes:.2f}x frame)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
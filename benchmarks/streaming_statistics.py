@@ -0,0 +1,47 @@
+# Compare DataFrame.corr()/describe()/groupby().corr() on a whole synthetic frame with the
+# streaming strategies fed the same rows in chunks, and print the worst rank error of the
+# sketched quartiles (columns with few distinct prices count a tie as exact). Run from the repository root:
+#   python -m benchmarks.streaming_statistics [rows]
+import sys
+import numpy as np
+from CurrencyParsing import parse_currency_columns
+from DataProcessingApplication import CorrelationAnalysis, GroupedCorrelation, SummaryStatistics
+from benchmarks.suite import measure
+from benchmarks.synthetic import generate_financials
+
+COLUMNS = CorrelationAnalysis.columns
+
+
+def report(name, func):
+    seconds, peak = measure(func, repeat=1)
+    print(f'    {name:<40} {seconds * 1000:9.1f} ms   peak {peak / 2 ** 20:8.1f} MiB')
+
+
+def main(rows=1_000_000):
+    print(f'{rows:,} rows')
+    data = generate_financials(rows)
+    # Money is parsed up front so both sides time the statistics alone
+    values = parse_currency_columns(data, COLUMNS).join(data['Country'])
+    chunks = [values.iloc[start:start + 100_000] for start in range(0, rows, 100_000)]
+
+    report('DataFrame.corr()', lambda: values[COLUMNS].corr())
+    report('CorrelationAnalysis (streamed)', lambda: CorrelationAnalysis().process_chunks(chunks))
+    report('DataFrame.describe()', lambda: values[COLUMNS].describe())
+    report('SummaryStatistics (streamed)', lambda: SummaryStatistics().process_chunks(chunks))
+    report('groupby(Country).corr()', lambda: values.groupby('Country', observed=True)[COLUMNS].corr())
+    report('GroupedCorrelation(Country) (streamed)',
+           lambda: GroupedCorrelation('Country').process_chunks(chunks))
+
+    summary = SummaryStatistics().process_chunks(chunks)
+    errors = []
+    for col in COLUMNS:
+        ordered = np.sort(values[col].dropna().to_numpy())
+        for q in (0.25, 0.5, 0.75):
+            estimate = summary.loc[f'{q * 100:g}%', col]
+            low, high = np.searchsorted(ordered, estimate, side='left'), np.searchsorted(ordered, estimate, side='right')
+            errors.append(max(0.0, low / len(ordered) - q, q - high / len(ordered)))
+    print(f'    worst quartile rank error {max(errors):.4f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
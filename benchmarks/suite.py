@@ -0,0 +1,205 @@
+# Benchmark suite: times every ingestion strategy per file format and every DataProcess
+# strategy on seeded synthetic Financials data (see benchmarks.synthetic), recording wall
+# time, throughput and peak traced memory as JSON. A previous results file can be given as a
+# baseline; slower or larger results beyond the threshold are flagged and fail the run.
+# Sizes above --in-memory-rows are benchmarked in streaming mode (ingest_chunks/process_chunks),
+# which covers the formats and strategies that can stream.
+# Run from the repository root:
+#   python -m benchmarks.suite --rows 10000 100000 --formats csv json xml [--baseline old.json]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from DataIngestion import CSVDataIngestion, JSONDataIngestion, XMLDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    DataProcess, SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis,
+)
+from benchmarks.synthetic import write_financials
+
+RESULTS_VERSION = 1
+
+INGESTIONS = {
+    'csv': lambda: CSVDataIngestion(schema=FINANCIALS_SCHEMA),
+    'json': lambda: JSONDataIngestion(schema=FINANCIALS_SCHEMA),
+    'ndjson': lambda: JSONDataIngestion(lines=True, schema=FINANCIALS_SCHEMA),
+    'xml': lambda: XMLDataIngestion(field_map=FINANCIALS_SCHEMA.xml_field_map(), schema=FINANCIALS_SCHEMA),
+}
+
+# A JSON array is parsed as a whole, so it has no streaming mode
+STREAMING_FORMATS = {'csv', 'ndjson', 'xml'}
+
+STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis,
+]
+
+# Fields identifying the same benchmark across runs
+KEY_FIELDS = ('benchmark', 'target', 'format', 'rows', 'mode')
+
+
+# Best wall time of repeat runs, and the peak traced memory of one extra run
+def measure(func, repeat=3, memory=True):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(timings), peak
+
+
+# Generated files are kept in data_dir and reused by later runs with the same parameters
+def dataset(data_dir, rows, file_format, seed):
+    os.makedirs(data_dir, exist_ok=True)
+    file_path = os.path.join(data_dir, f'financials-{rows}-seed{seed}.{file_format}')
+    if not os.path.exists(file_path):
+        start = time.perf_counter()
+        write_financials(rows, file_path, file_format, seed)
+        print(f'  generated {file_path} in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    return file_path
+
+
+def record(benchmark, target, file_format, rows, mode, seconds, peak):
+    return {
+        'benchmark': benchmark, 'target': target, 'format': file_format, 'rows': rows, 'mode': mode,
+        'seconds': seconds, 'rows_per_second': rows / seconds if seconds > 0 else None, 'peak_bytes': peak,
+    }
+
+
+def run(rows_list, formats, seed=0, repeat=3, memory=True, data_dir='.cache/benchmarks',
+        in_memory_rows=10_000_000, chunksize=1_000_000):
+    results = []
+    for rows in rows_list:
+        mode = 'streaming' if rows > in_memory_rows else 'memory'
+        for file_format in formats:
+            if mode == 'streaming' and file_format not in STREAMING_FORMATS:
+                print(f'  skipping {file_format} at {rows:,} rows: no streaming mode', file=sys.stderr)
+                continue
+            file_path = dataset(data_dir, rows, file_format, seed)
+            ingestion = INGESTIONS[file_format]()
+            if mode == 'streaming':
+                func = lambda: sum(len(chunk) for chunk in ingestion.ingest_chunks(file_path, chunksize))
+            else:
+                func = lambda: ingestion.ingest_data(file_path)
+            seconds, peak = measure(func, repeat, memory)
+            results.append(record('ingest', type(ingestion).__name__, file_format, rows, mode, seconds, peak))
+            print(format_result(results[-1]), file=sys.stderr)
+
+        # Strategies run on the typed CSV data, either held in memory or streamed in chunks
+        csv_path = dataset(data_dir, rows, 'csv', seed)
+        csv_ingestion = INGESTIONS['csv']()
+        data = csv_ingestion.ingest_data(csv_path) if mode == 'memory' else None
+        for strategy_class in STRATEGIES:
+            strategy = strategy_class()
+            if mode == 'memory':
+                func = lambda: strategy.process_data(data)
+            elif type(strategy).partial is not DataProcess.partial:
+                func = lambda: strategy.process_chunks(csv_ingestion.ingest_chunks(csv_path, chunksize))
+            else:
+                print(f'  skipping {strategy_class.__name__} at {rows:,} rows: no streaming mode', file=sys.stderr)
+                continue
+            seconds, peak = measure(func, repeat, memory)
+            results.append(record('process', strategy_class.__name__, 'csv', rows, mode, seconds, peak))
+            print(format_result(results[-1]), file=sys.stderr)
+        del data
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'platform': platform.platform(), 'processor': platform.processor(), 'cpu_count': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+# Results of this run that are slower or use more memory than the baseline by more than
+# threshold (a fraction). Timings below min_seconds are too noisy to flag.
+def compare(results, baseline, threshold=0.2, min_seconds=0.01):
+    previous = {tuple(result[field] for field in KEY_FIELDS): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get(tuple(result[field] for field in KEY_FIELDS))
+        if before is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if result[metric] is None or not before[metric]:
+                continue
+            if metric == 'seconds' and max(result[metric], before[metric]) < min_seconds:
+                continue
+            ratio = result[metric] / before[metric]
+            if ratio > 1 + threshold:
+                regressions.append({**{field: result[field] for field in KEY_FIELDS}, 'metric': metric,
+                                    'before': before[metric], 'after': result[metric], 'ratio': ratio})
+    return regressions
+
+
+def format_result(result):
+    peak = f'{result["peak_bytes"] / 2 ** 20:9.1f} MiB' if result['peak_bytes'] is not None else ''
+    return (f'  {result["benchmark"]:<8} {result["target"]:<30} {result["format"]:<7} {result["rows"]:>12,} '
+            f'{result["mode"]:<9} {result["seconds"]:9.3f}s {result["rows_per_second"] or 0:>14,.0f} rows/s {peak}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ingestion and processing strategies')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--formats', nargs='+', choices=sorted(INGESTIONS), default=['csv', 'json', 'xml'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the traced-memory runs')
+    parser.add_argument('--data-dir', default='.cache/benchmarks')
+    parser.add_argument('--in-memory-rows', type=int, default=10_000_000,
+                        help='larger sizes are benchmarked in streaming mode')
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--output', help='results file (default: DATA_DIR/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='results file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown or growth, as a fraction')
+    args = parser.parse_args(argv)
+
+    created = datetime.now(timezone.utc)
+    results = run(args.rows, args.formats, args.seed, args.repeat, args.memory, args.data_dir,
+                  args.in_memory_rows, args.chunksize)
+    document = {'version': RESULTS_VERSION, 'created': created.isoformat(), 'seed': args.seed,
+                'repeat': args.repeat, 'environment': environment(), 'results': results}
+
+    output = args.output or os.path.join(args.data_dir, 'results', created.strftime('%Y%m%dT%H%M%SZ') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(document, file, indent=2)
+    print(f'Results written to {output}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression["benchmark"]} {regression["target"]} {regression["format"]} '
+                  f'{regression["rows"]:,} rows ({regression["mode"]}): {regression["metric"]} '
+                  f'{regression["before"]:.4g} -> {regression["after"]:.4g} ({regression["ratio"]:.2f}x)')
+        print(f'{len(regressions)} regression(s) against {args.baseline}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
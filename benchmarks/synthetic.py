@@ -0,0 +1,194 @@
+# Seeded generator of synthetic Financials data, formatted like datasets/Financials.csv
+# (money as " $1,234.00 ", negatives in parentheses, zero as " $-   ", dates as D/M/YYYY).
+# Rows are produced in fixed-size blocks, each seeded by (seed, block number), so the same
+# seed gives the same rows whatever the requested size and 10^8 rows never sit in memory.
+# Run from the repository root: python -m benchmarks.synthetic rows path [--seed N]
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from xml.sax.saxutils import escape
+from DataSchema import FINANCIALS_SCHEMA
+
+BLOCK_ROWS = 100_000
+
+COUNTRIES = ['Canada', 'France', 'Germany', 'Mexico', 'United States of America']
+
+# Product -> manufacturing price
+PRODUCTS = {'Amarilla': 260.0, 'Carretera': 3.0, 'Montana': 5.0, 'Paseo': 10.0, 'VTT': 250.0, 'Velo': 120.0}
+
+# (segment, sale price, cost per unit) price tiers, equally likely as in the sample
+PRICE_TIERS = [
+    ('Government', 20.0, 10.0), ('Government', 350.0, 260.0), ('Government', 7.0, 5.0),
+    ('Channel Partners', 12.0, 3.0), ('Enterprise', 125.0, 120.0), ('Midmarket', 15.0, 10.0),
+    ('Small Business', 300.0, 250.0),
+]
+
+# Discount band -> (probability, discount rates in percent)
+DISCOUNT_BANDS = {
+    'None': (0.08, [0]),
+    'Low': (0.23, [1, 2, 3, 4]),
+    'Medium': (0.34, [5, 6, 7, 8, 9]),
+    'High': (0.35, [10, 11, 12, 13, 14, 15]),
+}
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December']
+
+# The sample covers September 2013 to December 2014
+FIRST_MONTH = (2013, 9)
+MONTHS = 16
+
+
+# Apply a Python formatter once per distinct value instead of once per row
+def _map_unique(values, func):
+    codes, uniques = pd.factorize(values)
+    return pd.Series(np.asarray([func(value) for value in uniques], dtype=object)[codes])
+
+
+def _money(value):
+    if value == 0:
+        return ' $-   '
+    if value < 0:
+        return f'(${-value:,.2f})'
+    return f'${value:,.2f} '
+
+
+# One block of raw rows with the columns and string formatting of the sample CSV. A whole
+# block is always drawn, so a shorter last block is a prefix of the full one.
+def generate_block(block, seed=0, rows=BLOCK_ROWS):
+    rng = np.random.default_rng([seed, block])
+    draw = BLOCK_ROWS
+
+    tiers = rng.integers(len(PRICE_TIERS), size=draw)
+    segment = np.array([tier[0] for tier in PRICE_TIERS])[tiers]
+    sale_price = np.array([tier[1] for tier in PRICE_TIERS])[tiers]
+    unit_cost = np.array([tier[2] for tier in PRICE_TIERS])[tiers]
+
+    products = rng.integers(len(PRODUCTS), size=draw)
+    product = np.array(list(PRODUCTS))[products]
+    manufacturing_price = np.array(list(PRODUCTS.values()))[products]
+
+    bands = list(DISCOUNT_BANDS)
+    band_index = rng.choice(len(bands), size=draw, p=[DISCOUNT_BANDS[band][0] for band in bands])
+    rates = np.zeros(draw)
+    for i, band in enumerate(bands):
+        selected = band_index == i
+        rates[selected] = rng.choice(DISCOUNT_BANDS[band][1], size=selected.sum()) / 100
+
+    units = rng.integers(400, 9000, size=draw) / 2
+    gross_sales = units * sale_price
+    discounts = np.round(gross_sales * rates, 2)
+    sales = gross_sales - discounts
+    cogs = units * unit_cost
+
+    countries = rng.integers(len(COUNTRIES), size=draw)
+    months = rng.integers(MONTHS, size=draw) + FIRST_MONTH[1] - 1
+    year = FIRST_MONTH[0] + months // 12
+    month = months % 12 + 1
+
+    # Keep only the requested rows before the costly formatting
+    (segment, sale_price, product, manufacturing_price, band_index, units, gross_sales, discounts, sales, cogs,
+     countries, year, month) = (values[:rows] for values in (
+        segment, sale_price, product, manufacturing_price, band_index, units, gross_sales, discounts, sales, cogs,
+        countries, year, month))
+
+    return pd.DataFrame({
+        'Segment': segment,
+        'Country': np.array(COUNTRIES)[countries],
+        'Product': pd.Series(product).radd(' ').add(' '),
+        'Discount Band': pd.Series(np.array(bands)[band_index]).radd(' ').add(' '),
+        'Units Sold': _map_unique(units, _money),
+        'Manufacturing Price': _map_unique(manufacturing_price, _money),
+        'Sale Price': _map_unique(sale_price, _money),
+        'Gross Sales': _map_unique(gross_sales, _money),
+        'Discounts': _map_unique(discounts, _money),
+        'Sales': _map_unique(sales, _money),
+        'COGS': _map_unique(cogs, _money),
+        'Profit': _map_unique(np.round(sales - cogs, 2), _money),
+        'Date': _map_unique(month * 10000 + year, lambda key: f'1/{key // 10000}/{key % 10000}'),
+        'Month Number': month,
+        'Month Name': pd.Series(np.array(MONTH_NAMES)[month - 1]).radd(' ').add(' '),
+        'Year': year,
+    })
+
+
+# Yield the blocks making up the first `rows` rows of the seeded dataset
+def iter_financials(rows, seed=0):
+    for block, start in enumerate(range(0, rows, BLOCK_ROWS)):
+        yield generate_block(block, seed, min(BLOCK_ROWS, rows - start))
+
+
+def generate_financials(rows, seed=0):
+    return pd.concat(iter_financials(rows, seed), ignore_index=True)
+
+
+def _write_csv(blocks, file):
+    for i, block in enumerate(blocks):
+        block.to_csv(file, index=False, header=i == 0, lineterminator='\n')
+
+
+def _write_ndjson(blocks, file):
+    for block in blocks:
+        file.write(block.to_json(orient='records', lines=True))
+
+
+def _write_json(blocks, file):
+    file.write('[')
+    for i, block in enumerate(blocks):
+        if i:
+            file.write(',')
+        file.write(block.to_json(orient='records')[1:-1])
+    file.write(']')
+
+
+# One <record> element per row with a child per column, named as FINANCIALS_SCHEMA.xml_field_map()
+def _write_xml(blocks, file):
+    tags = {column: tag for tag, column in FINANCIALS_SCHEMA.xml_field_map().items()}
+    file.write('<?xml version="1.0" encoding="utf-8"?>\n<data>\n')
+    for block in blocks:
+        records = pd.Series('  <record>', index=block.index)
+        for column in block.columns:
+            values = _map_unique(block[column].to_numpy(), lambda value: escape(str(value)))
+            records += f'<{tags[column]}>' + values + f'</{tags[column]}>'
+        file.write('\n'.join(records + '</record>'))
+        file.write('\n')
+    file.write('</data>\n')
+
+
+WRITERS = {
+    'csv': _write_csv,
+    'json': _write_json,
+    'ndjson': _write_ndjson,
+    'xml': _write_xml,
+}
+
+
+# Write the seeded dataset to file_path in one of WRITERS' formats, block by block
+def write_financials(rows, file_path, file_format='csv', seed=0):
+    if file_format not in WRITERS:
+        raise ValueError(f'Unknown format: {file_format}')
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+        WRITERS[file_format](iter_financials(rows, seed), file)
+    os.replace(temp_path, file_path)
+    return file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Financials data')
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=sorted(WRITERS), default=None,
+                        help='defaults to the extension of path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    file_format = args.format or os.path.splitext(args.path)[1].lstrip('.').lower()
+    write_financials(args.rows, args.path, file_format, args.seed)
+    print(json.dumps({'rows': args.rows, 'path': args.path, 'format': file_format, 'seed': args.seed,
+                      'bytes': os.path.getsize(args.path)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# Compare plain read_csv ingestion with schema-driven typed ingestion.
+# Run from the repository root: python -m benchmarks.typed_ingestion [rows]
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+
+
+def write_financials(rows, file_path, source='datasets/Financials.csv'):
+    # Tile the sample dataset until it reaches the requested size
+    sample = pd.read_csv(source, dtype=str)
+    repeats = rows // len(sample) + 1
+    pd.concat([sample] * repeats, ignore_index=True).iloc[:rows].to_csv(file_path, index=False)
+
+
+def measure(label, ingestion, file_path):
+    start = time.perf_counter()
+    data = ingestion.ingest_data(file_path)
+    elapsed = time.perf_counter() - start
+    memory = data.memory_usage(deep=True).sum()
+    print(f'  {label:<8} {elapsed:.3f}s  {memory / 2 ** 20:,.1f} MiB')
+    return elapsed, memory
+
+
+def main(rows=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'financials.csv')
+        write_financials(rows, file_path)
+        print(f'Financials ({rows:,} rows)')
+        # The plain path still has to parse money columns before they are usable
+        plain_time, plain_memory = measure('plain', CSVDataIngestion(), file_path)
+        typed_time, typed_memory = measure('typed', CSVDataIngestion(schema=FINANCIALS_SCHEMA), file_path)
+        print(f'  memory reduction: {plain_memory / typed_memory:.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,48 +1,149 @@
+import functools
+import logging
+import os
 import dash
+import pandas as pd
 from dash import html
 import dash_table
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
 from DataIngestion import DataIngestionContext, CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataCache import CachedDataIngestion
+from MemoryOptimization import CompactDataIngestion
+from TableQuery import query_table
+from ReportCache import ReportCache
+from SalesCube import BuildSalesCube
+from CrossFilter import CrossFilter, FILTER_DIMENSIONS
+from RefreshScheduler import RefreshScheduler
+from Instrumentation import Instrumentation, LogSink, MetricsRegistry, register_metrics_endpoint
+from Figures import (
+    FigureCache, sales_trends_figure, profit_by_country_figure, product_performance_figure, country_wise_sales_figure,
+    discount_impact_figure, correlation_analysis_figure, loading_figure,
+)
+from ResponseCompression import register_compression
 from DataProcessingApplication import DataProcessingContext, SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales, CountryWiseSalesDistribution, CorrelationAnalysis
 
-# Load and process data
-data_ingestion_context = DataIngestionContext(CSVDataIngestion())
-sales_data = data_ingestion_context.ingest('datasets/Financials.csv')
+# Every ingestion, report and callback is measured: one JSON log line per call, and running
+# totals served in the Prometheus text format at /metrics
+pipeline_metrics = MetricsRegistry()
+instrumentation = Instrumentation([LogSink(), pipeline_metrics])
+
+# Every chart is a report over the selected slice of the data
+CHART_STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, CountryWiseSalesDistribution,
+    DiscountImpactOnSales, CorrelationAnalysis,
+]
+
+CHART_IDS = [
+    'sales-trends', 'profit-by-country', 'product-performance', 'country-wise-sales', 'discount-impact',
+    'correlation-analysis',
+]
+
+CHART_BUILDERS = [
+    sales_trends_figure, profit_by_country_figure, product_performance_figure, country_wise_sales_figure,
+    discount_impact_figure, correlation_analysis_figure,
+]
+
+CHART_TITLES = [
+    'Sales Trends Over Time', 'Profit Analysis by Country', 'Product Performance',
+    'Country-wise Sales Distribution', 'Discount Impact on Sales', 'Correlation Analysis',
+]
+
+# The source file, and how often (seconds) it is checked for changes to load
+DATA_PATH = os.environ.get('DASHBOARD_DATA', 'datasets/Financials.csv')
+REFRESH_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_INTERVAL', '5'))
+
+
+# Ingest the data and build what the callbacks query. Nothing of this runs at import time,
+# so importing the module or booting a worker does not depend on the size of the data.
+def load_dashboard_data():
+    # DASHBOARD_PROFILE=path captures a cProfile of the ingestion into path
+    if os.environ.get('DASHBOARD_PROFILE'):
+        instrumentation.profile_next(os.environ['DASHBOARD_PROFILE'])
 
-data_processing_context = DataProcessingContext(SalesTrendsOverTime())
-sales_trends_data = data_processing_context.process(sales_data)
+    # The parsed frame is compacted (whole-number prices downcast, text dictionary-encoded)
+    # and cached on disk until the CSV changes
+    data_ingestion_context = DataIngestionContext(
+        CachedDataIngestion(CompactDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA))),
+        instrumentation=instrumentation)
+    sales_data = data_ingestion_context.ingest(DATA_PATH)
 
-data_processing_context.set_strategy(ProfitAnalysisByCountry())
-profit_by_country_data = data_processing_context.process(sales_data)
+    # Pre-aggregate the sales cube once, with the moments the correlation chart needs, so the
+    # grouped charts and the correlation are answered from it instead of the raw rows.
+    # It is built per day so the date picker's ranges select the same days as the row mask.
+    # The cube is memoized on disk, so restarts and sibling workers reuse it; cubes of
+    # superseded data are pruned once the directory outgrows max_disk_bytes.
+    report_cache = ReportCache(disk_dir='.cache/reports', max_disk_bytes=2 ** 30)
+    cube_builder = BuildSalesCube(granularity='day', moments=CorrelationAnalysis.columns)
+    data_processing_context = DataProcessingContext(cube_builder, cache=report_cache,
+                                                    instrumentation=instrumentation)
+    sales_cube = data_processing_context.process(sales_data)
 
-data_processing_context = DataProcessingContext(ProductPerformance())
-product_performance_data = data_processing_context.process(sales_data)
+    # Interactive filters slice the frame by categorical codes and the cube by its dimensions;
+    # only the discount chart still reads rows. The data's fingerprint keys the figure cache
+    # and is taken here rather than on the first filter change.
+    cross_filter = CrossFilter(sales_data, sales_cube, row_columns=['Discount Band', 'Sales', 'Profit'])
+    cross_filter.fingerprint()
+    return cross_filter
 
-data_processing_context = DataProcessingContext(DiscountImpactOnSales())
-discount_impact_data = data_processing_context.process(sales_data)
 
-data_processing_context.set_strategy(CountryWiseSalesDistribution())
-country_wise_sales_data = data_processing_context.process(sales_data)
+# Figures per selection; a selection seen before is served without recomputing
+# its reports or figures
+figure_cache = FigureCache()
 
-data_processing_context.set_strategy(CorrelationAnalysis())
-correlation_analysis_data = data_processing_context.process(sales_data)
+# Loading starts with the first request (or right away when run as a script). Afterwards the
+# source is watched and a changed file is loaded in the background and swapped in; callbacks
+# keep the data they took until they return, so none of them waits for or mixes two loads.
+# Under serve.py only the parent process watches and loads, and its workers are re-forked.
+dashboard_data = RefreshScheduler(load_dashboard_data, [DATA_PATH], interval=REFRESH_INTERVAL, name='dashboard data',
+                                  instrumentation=instrumentation)
+
+
+# The loaded data, or PreventUpdate while it is still loading so callbacks keep their placeholders
+def loaded_data():
+    if not dashboard_data.ready:
+        raise dash.exceptions.PreventUpdate
+    return dashboard_data.get()
+
+
+# Measure every callback, to spot slow filters and regressions. PreventUpdate is how a
+# callback declines to update, so it is not recorded as an error.
+def timed_callback(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        prevented = None
+        with instrumentation.measure('callback', func.__name__):
+            try:
+                return func(*args, **kwargs)
+            except dash.exceptions.PreventUpdate as e:
+                prevented = e
+        raise prevented
+    return wrapper
 
 
 # Initialize the Dash app
 app = dash.Dash(__name__)
+app.server.before_request(dashboard_data.start)
+register_metrics_endpoint(app.server, [pipeline_metrics, dashboard_data])
+register_compression(app.server)
 
 # Define the layout of the app
 app.layout = html.Div(children=[
     html.H1(children='ERP System Reporting tool for Sales Data'),
 
+    # Polls until the background load finishes, then flags the data as ready
+    html.Div('Loading data...', id='loading-status'),
+    dcc.Interval(id='loading-poll', interval=500),
+    dcc.Store(id='data-ready', data=False),
+
     # Column selector
     html.H3('Select Columns to Display:'),
     dcc.Checklist(
         id='column-selector',
-        options=[{'label': col, 'value': col} for col in sales_data.columns],
-        value=sales_data.columns.tolist(),  # Default to all columns
+        options=[{'label': col, 'value': col} for col in FINANCIALS_SCHEMA.columns],
+        value=list(FINANCIALS_SCHEMA.columns),  # Default to all columns
         inline=True,
     ),
 
@@ -52,106 +153,115 @@ app.layout = html.Div(children=[
     html.H2("ERP System's Data Table"),
     dash_table.DataTable(
         id='table',
-        columns=[{"name": i, "id": i} for i in sales_data.columns],  # Columns to be updated in the callback
-        data=sales_data.to_dict('records'),
-        filter_action='native',  # Enable filtering
-        sort_action='native',  # Enable sorting
+        columns=[{"name": i, "id": i} for i in FINANCIALS_SCHEMA.columns],  # Columns to be updated in the callback
+        # Filtering, sorting and paging run on the server; only the visible page is sent
+        filter_action='custom',  # Enable filtering
+        filter_query='',
+        sort_action='custom',  # Enable sorting
         sort_mode='multi',  # Allow multi-column sorting
-        page_action='native',  # Enable pagination
+        sort_by=[],
+        page_action='custom',  # Enable pagination
+        page_current=0,
         page_size=10,  # Number of rows per page
     ),
 
 
 
-    dcc.Graph(
-        id='sales-trends',
-        figure={
-            'data': [
-                {'x': sales_trends_data['Date'], 'y': sales_trends_data['TotalSales'], 'type': 'line',
-                 'name': 'Sales Trends'},
-            ],
-            'layout': {
-                'title': 'Sales Trends Over Time'
-            }
-        }
-    ),
+    # Cross-filters; every chart below is re-rendered from the selected slice
+    html.H3('Filter Charts:'),
+    html.Div([
+        dcc.Dropdown(
+            id=f'{dimension.lower()}-filter',
+            options=[],  # Filled in once the data is loaded
+            multi=True,
+            placeholder=f'All {dimension.lower()}s',
+        )
+        for dimension in FILTER_DIMENSIONS
+    ] + [
+        dcc.DatePickerRange(
+            id='date-filter',
+            display_format='DD/MM/YYYY',
+        ),
+    ]),
 
-    dcc.Graph(
-        id='profit-by-country',
-        figure={
-            'data': [
-                {'x': profit_by_country_data['Country'], 'y': profit_by_country_data['Profit'], 'type': 'bar', 'name': 'Profit by Country'},
-            ],
-            'layout': {
-                'title': 'Profit Analysis by Country'
-            }
-        }
-    ),
+    *[dcc.Loading(dcc.Graph(id=graph_id, figure=loading_figure(title))) for graph_id, title in zip(CHART_IDS, CHART_TITLES)],
+])
 
-    dcc.Graph(
-        id='product-performance',
-        figure={
-            'data': [
-                {'x': product_performance_data['Product'], 'y': product_performance_data['Sales'], 'type': 'bar', 'name': 'Sales'},
-                {'x': product_performance_data['Product'], 'y': product_performance_data['Profit'], 'type': 'bar', 'name': 'Profit'},
-            ],
-            'layout': {
-                'title': 'Product Performance',
-                'barmode': 'stack'
-            }
-        }
-    ),
 
-    dcc.Graph(
-        id='country-wise-sales',
-        figure={
-            'data': [
-                {'x': country_wise_sales_data['Country'], 'y': country_wise_sales_data['Sales'], 'type': 'bar', 'name': 'Sales by Country'},
-            ],
-            'layout': {
-                'title': 'Country-wise Sales Distribution',
-                'xaxis': {'title': 'Country'},
-                'yaxis': {'title': 'Total Sales'}
-            }
-        }
-    ),
+# Store the loaded data's fingerprint once the background load finished. Polling goes on
+# at the refresh interval, and a refreshed dataset changes the fingerprint, which re-renders
+# the filters, charts and table of pages that are already open.
+@app.callback(
+    Output('data-ready', 'data'),
+    Output('loading-poll', 'interval'),
+    Output('loading-status', 'children'),
+    Input('loading-poll', 'n_intervals'),
+    State('data-ready', 'data'),
+)
+def poll_loading(n_intervals, loaded_version):
+    dashboard_data.start()
+    if not dashboard_data.done:
+        raise dash.exceptions.PreventUpdate
+    if dashboard_data.error is not None:
+        return False, REFRESH_INTERVAL * 1000, f'Loading the data failed: {dashboard_data.error}'
+    version = dashboard_data.get().fingerprint()
+    if version == loaded_version:
+        raise dash.exceptions.PreventUpdate
+    return version, REFRESH_INTERVAL * 1000, ''
 
-    dcc.Graph(
-        id='discount-impact',
-        figure={
-            'data': [
-                {'x': discount_impact_data['Discount Band'], 'y': discount_impact_data['Sales'], 'mode': 'markers', 'type': 'scatter', 'name': 'Discount Impact on Sales'},
-            ],
-            'layout': {
-                'title': 'Discount Impact on Sales'
-            }
-        }
-    ),
 
+# Fill the filter controls from the loaded data
+@app.callback(
+    *[Output(f'{dimension.lower()}-filter', 'options') for dimension in FILTER_DIMENSIONS],
+    Output('date-filter', 'min_date_allowed'),
+    Output('date-filter', 'max_date_allowed'),
+    Input('data-ready', 'data'),
+)
+def update_filter_options(data_ready):
+    cross_filter = loaded_data()
+    options = [[{'label': value, 'value': value} for value in cross_filter.options(dimension)]
+               for dimension in FILTER_DIMENSIONS]
+    return *options, *(bound.date().isoformat() for bound in cross_filter.date_bounds())
 
-    dcc.Graph(
-        id='correlation-analysis',
-        figure={
-            'data': [
-                {
-                    'z': correlation_analysis_data.values,
-                    'x': correlation_analysis_data.columns,
-                    'y': correlation_analysis_data.index,
-                    'type': 'heatmap',
-                    'colorscale': 'Viridis',
-                }
-            ],
-            'layout': {
-                'title': 'Correlation Analysis',
-                'xaxis': {'title': 'Variables'},
-                'yaxis': {'title': 'Variables'},
-            }
-        }
-    ),
 
+# Render every chart once the data is loaded, and re-render it for the selected countries,
+# products, segments and dates
+@app.callback(
+    *[Output(graph_id, 'figure') for graph_id in CHART_IDS],
+    Input('data-ready', 'data'),
+    *[Input(f'{dimension.lower()}-filter', 'value') for dimension in FILTER_DIMENSIONS],
+    Input('date-filter', 'start_date'),
+    Input('date-filter', 'end_date'),
+)
+@timed_callback
+def update_charts(data_ready, *filters):
+    cross_filter = loaded_data()
+    selections = dict(zip(FILTER_DIMENSIONS, filters[:len(FILTER_DIMENSIONS)]))
+    start_date, end_date = filters[len(FILTER_DIMENSIONS):]
+
+    fingerprint = cross_filter.fingerprint(selections, start_date, end_date)
+    return figure_cache.figures(CHART_BUILDERS, fingerprint, lambda: cross_filter.reports(
+        [strategy() for strategy in CHART_STRATEGIES], selections, start_date, end_date))
 
-])
 
+# Serve the requested page of the filtered and sorted data
+@app.callback(
+    Output('table', 'data'),
+    Output('table', 'page_count'),
+    Input('data-ready', 'data'),
+    Input('table', 'page_current'),
+    Input('table', 'page_size'),
+    Input('table', 'sort_by'),
+    Input('table', 'filter_query')
+)
+@timed_callback
+def update_table_page(data_ready, page_current, page_size, sort_by, filter_query):
+    sales_data = loaded_data().data
+    try:
+        return query_table(sales_data, page_current, page_size, filter_query, sort_by)
+    except ValueError:
+        # Keep the current page while the filter expression is incomplete or invalid
+        raise dash.exceptions.PreventUpdate
 
 # Define callback to update table columns
 @app.callback(
@@ -174,5 +284,16 @@ def uncheck_all_columns(n_clicks):
 
 
 
+# Every report reads the same frame; copy-on-write lets column selections such as
+# DiscountImpactOnSales share its memory instead of copying it. pandas options are
+# process-wide, so the entry points (this one and serve.py) set it rather than the import.
+def enable_copy_on_write():
+    pd.set_option('mode.copy_on_write', True)
+
+
+# Development server; in production run serve.py, which preloads the data and forks workers
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    enable_copy_on_write()
+    dashboard_data.start()
     app.run_server(debug=True)
@@ -0,0 +1,268 @@
+# Production entry point for the dashboard: python serve.py [--bind 0.0.0.0:8050] [--workers N]
+# The dataset, sales cube and unfiltered figures are loaded once in the parent process,
+# which then forks the workers. The workers share those pages copy-on-write instead of
+# each loading its own copy, so adding workers adds little memory: the columns are numpy
+# buffers that are only read, and gc.freeze() keeps the collector from touching (and so
+# copying) the objects loaded before the fork.
+# Runs under gunicorn (preload_app) when it is installed, otherwise under the built-in
+# pre-fork server: one listening socket shared by forked threaded Werkzeug servers.
+# Refreshed data keeps that sharing: only the parent watches the sources, and when they
+# change it loads the new data once and replaces the workers with new forks of itself,
+# letting the old ones finish their requests. Workers never load data of their own.
+# The parent never forks while another of its threads runs: a child would inherit any lock
+# such a thread holds (pandas, logging, the allocator) locked for good.
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from importlib.util import find_spec
+
+logger = logging.getLogger('serve')
+
+HAS_GUNICORN = find_spec('gunicorn') is not None
+
+
+# Seconds a replaced worker gets to finish the requests it is serving
+WORKER_GRACE_SECONDS = 10
+
+
+# Compute the figures of the unfiltered dashboard and freeze everything loaded so far, so
+# the workers forked next share it
+def _warm(dashboard):
+    dashboard.update_charts(True, *[None] * (len(dashboard.FILTER_DIMENSIONS) + 2))
+    gc.unfreeze()
+    gc.collect()
+    gc.freeze()
+
+
+# Load everything the callbacks read before forking: the data, its fingerprint and the
+# figures of the unfiltered dashboard, which every new session asks for first
+def preload():
+    import dashboard
+    start = time.perf_counter()
+    dashboard.enable_copy_on_write()
+    # The parent watches the sources (data_changed); the workers only serve what they inherit
+    dashboard.dashboard_data.watch = False
+    dashboard.dashboard_data.get()
+    # No thread may run across the fork
+    dashboard.dashboard_data.stop()
+    _warm(dashboard)
+    logger.info('Preloaded the dashboard data in %.2fs', time.perf_counter() - start)
+    return dashboard.app.server
+
+
+# Called periodically by the parent's supervising loop, so it must stay cheap: whether the
+# sources changed and settled since the data was loaded
+def data_changed():
+    import dashboard
+    return dashboard.dashboard_data.pending() is not None
+
+
+# Load the current sources in the parent and rebuild what preload() built. Returns True when
+# new data was swapped in and the workers should be replaced.
+def reload_data():
+    import dashboard
+    start = time.perf_counter()
+    if not dashboard.dashboard_data.refresh():
+        return False
+    _warm(dashboard)
+    logger.info('Reloaded the dashboard data in %.2fs', time.perf_counter() - start)
+    return True
+
+
+def _parse_bind(bind):
+    host, _, port = bind.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+# Fork `workers` threaded Werkzeug servers accepting on one shared socket, and replace any
+# worker that dies until the parent is asked to stop (SIGINT or SIGTERM). When `check` is
+# given the parent calls it every `reload_interval` seconds; when it returns True, reload()
+# runs on a thread and, if it returns True, a new generation of workers is forked and the
+# previous one is stopped gracefully. While reload() runs the parent keeps reaping workers
+# and answering signals, but workers that die are only replaced once it has finished.
+def serve_prefork(app, bind, workers, threaded=True, check=None, reload=None, reload_interval=5.0):
+    from werkzeug.serving import make_server
+    if not hasattr(os, 'fork'):
+        raise RuntimeError('The pre-fork server needs os.fork; install gunicorn or use a POSIX system')
+
+    host, port = _parse_bind(bind)
+    listener = socket.create_server((host, port), reuse_port=False, backlog=1024)
+    listener.set_inheritable(True)
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server = make_server(host, port, app, threaded=threaded, fd=listener.fileno())
+                # SIGTERM stops accepting; requests in progress get WORKER_GRACE_SECONDS
+                signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+                server.serve_forever()
+                deadline = time.monotonic() + WORKER_GRACE_SECONDS
+                while threading.active_count() > 1 and time.monotonic() < deadline:
+                    time.sleep(0.05)
+            finally:
+                os._exit(0)
+        return pid
+
+    generation = 0
+    # pid -> generation of every live worker, and the workers already told to stop
+    children = {spawn(): generation for _ in range(workers)}
+    retiring = set()
+    # Workers that died while a reload was running, replaced once it finished
+    replacements = 0
+    loader, reloaded = None, []
+    logger.info('Serving on http://%s:%d with %d workers', host, port, workers)
+
+    def retire(pids):
+        for pid in pids:
+            if pid not in retiring:
+                retiring.add(pid)
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def load():
+        try:
+            reloaded.append(reload())
+        except Exception:
+            logger.exception('Reloading the data failed; the workers keep serving the previous data')
+            reloaded.append(False)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    next_check = time.monotonic() + reload_interval
+    while children or (replacements and not stopping):
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            pid = 0
+        if pid:
+            retiring.discard(pid)
+            if children.pop(pid, None) == generation and not stopping:
+                logger.warning('Worker %d exited with status %d; starting a new one', pid, status)
+                replacements += 1
+        if stopping:
+            retire(list(children))
+        elif loader is not None:
+            if not loader.is_alive():
+                loader = None
+                if reloaded.pop():
+                    previous = list(children)
+                    generation += 1
+                    children.update((spawn(), generation) for _ in range(workers))
+                    retire(previous)
+                    replacements = 0
+                    logger.info('Replaced the workers with generation %d', generation)
+        elif replacements:
+            children.update((spawn(), generation) for _ in range(replacements))
+            replacements = 0
+        elif check is not None and time.monotonic() >= next_check:
+            try:
+                due = check()
+            except Exception:
+                logger.exception('Checking the data sources failed')
+                due = False
+            next_check = time.monotonic() + reload_interval
+            if due:
+                loader = threading.Thread(target=load, name='reload', daemon=True)
+                loader.start()
+        if not pid:
+            time.sleep(0.05)
+    listener.close()
+
+
+# Under gunicorn, SIGALRM runs check() every `reload_interval` seconds in the master's main
+# thread, and a due reload becomes a SIGHUP. gunicorn answers it in its main loop: the
+# on_reload hook runs reload() there, then the master forks new workers, which inherit the
+# reloaded data since the app is preloaded, and stops the old ones gracefully. The master
+# neither forks nor reaps workers while reload() runs.
+def serve_gunicorn(app, bind, workers, threads, check=None, reload=None, reload_interval=5.0):
+    from gunicorn.app.base import BaseApplication
+
+    def alarm(signum, frame):
+        try:
+            if check():
+                os.kill(os.getpid(), signal.SIGHUP)
+        except Exception:
+            logger.exception('Checking the data sources failed')
+
+    def when_ready(server):
+        if check is not None:
+            signal.signal(signal.SIGALRM, alarm)
+            signal.setitimer(signal.ITIMER_REAL, reload_interval, reload_interval)
+
+    def on_reload(server):
+        if reload is None:
+            return
+        # No check while loading: the sources differ from the loaded data until it is done
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        try:
+            reload()
+        except Exception:
+            logger.exception('Reloading the data failed; the workers keep serving the previous data')
+        finally:
+            if check is not None:
+                signal.setitimer(signal.ITIMER_REAL, reload_interval, reload_interval)
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            # The app (and the data) is loaded once in the master and inherited by the workers
+            self.cfg.set('preload_app', True)
+            self.cfg.set('when_ready', when_ready)
+            self.cfg.set('on_reload', on_reload)
+
+        def load(self):
+            return app
+
+    DashboardApplication().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the dashboard with several worker processes')
+    parser.add_argument('--bind', default=os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050'))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('DASHBOARD_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=8, help='threads per worker (gunicorn)')
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'prefork'], default='auto')
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        logging.getLogger('pipeline').setLevel(logging.WARNING)
+
+    server = args.server
+    if server == 'auto':
+        server = 'gunicorn' if HAS_GUNICORN else 'prefork'
+    app = preload()
+    import dashboard
+    interval = dashboard.dashboard_data.interval
+    if server == 'gunicorn':
+        serve_gunicorn(app, args.bind, args.workers, args.threads, data_changed, reload_data, interval)
+    else:
+        serve_prefork(app, args.bind, args.workers, check=data_changed, reload=reload_data, reload_interval=interval)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
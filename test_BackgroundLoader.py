@@ -0,0 +1,43 @@
+import threading
+import pytest
+from BackgroundLoader import BackgroundLoader
+
+
+class TestBackgroundLoader:
+    def test_nothing_runs_until_started(self):
+        calls = []
+        loader = BackgroundLoader(lambda: calls.append(1))
+        assert not loader.started and not loader.done
+        assert calls == []
+
+    def test_get_waits_for_the_background_load(self):
+        release = threading.Event()
+        loader = BackgroundLoader(lambda: release.wait() and 'data')
+        loader.start()
+        assert loader.started and not loader.ready
+        with pytest.raises(TimeoutError):
+            loader.get(timeout=0.01)
+        release.set()
+        assert loader.get(timeout=5) == 'data'
+        assert loader.ready and loader.seconds is not None
+
+    def test_loads_only_once(self):
+        calls = []
+        loader = BackgroundLoader(lambda: calls.append(1) or len(calls))
+        loader.start()
+        loader.start()
+        assert loader.get(timeout=5) == 1
+        assert loader.get(timeout=5) == 1
+        assert calls == [1]
+
+    def test_get_starts_a_lazy_load(self):
+        assert BackgroundLoader(lambda: 42).get(timeout=5) == 42
+
+    def test_errors_are_raised_from_get(self):
+        def fail():
+            raise ValueError('broken source')
+        loader = BackgroundLoader(fail)
+        with pytest.raises(ValueError, match='broken source'):
+            loader.get(timeout=5)
+        assert loader.done and not loader.ready
+        assert isinstance(loader.error, ValueError)
@@ -0,0 +1,60 @@
+import json
+import pytest
+from BulkIngestion import BulkDataIngestion, concat_frames
+from DataSchema import FINANCIALS_SCHEMA
+import pandas as pd
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    data = pd.read_csv('datasets/Financials.csv', dtype=str)
+    for i in range(4):
+        data.iloc[i * 175:(i + 1) * 175].to_csv(tmp_path / f'part-{i}.csv', index=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_ingest_glob_in_parallel(partitions, use_processes):
+    ingestion = BulkDataIngestion(schema=FINANCIALS_SCHEMA, max_workers=2, use_processes=use_processes)
+    result = ingestion.ingest(str(partitions / 'part-*.csv'))
+    assert len(result.data) == 700
+    assert len(result.files) == 4
+    assert not result.failures
+    assert isinstance(result.data['Country'].dtype, pd.CategoricalDtype)
+    assert result.data['Sales'].dtype == 'float64'
+
+
+def test_failures_are_reported(partitions):
+    (partitions / 'broken.csv').write_text('')
+    result = BulkDataIngestion(schema=FINANCIALS_SCHEMA).ingest(str(partitions))
+    assert len(result.data) == 700
+    assert [report.path for report in result.failures] == [str(partitions / 'broken.csv')]
+    assert 'EmptyDataError' in result.failures[0].error
+
+
+def test_dispatch_by_extension(tmp_path):
+    (tmp_path / 'a.csv').write_text('Country,Sales\nCanada,1\n')
+    (tmp_path / 'b.json').write_text(json.dumps([{'Country': 'France', 'Sales': 2}]))
+    (tmp_path / 'notes.txt').write_text('ignored')
+    result = BulkDataIngestion().ingest(str(tmp_path))
+    assert [report.strategy for report in result.files] == ['CSVDataIngestion', 'JSONDataIngestion']
+    assert result.data['Country'].tolist() == ['Canada', 'France']
+
+
+def test_explicit_unsupported_file_is_reported(tmp_path):
+    (tmp_path / 'a.csv').write_text('Country,Sales\nCanada,1\n')
+    (tmp_path / 'notes.txt').write_text('not data')
+    result = BulkDataIngestion().ingest([str(tmp_path / 'notes.txt'), str(tmp_path / 'a.csv')])
+    assert [report.path for report in result.files] == [str(tmp_path / 'notes.txt'), str(tmp_path / 'a.csv')]
+    assert [report.path for report in result.failures] == [str(tmp_path / 'notes.txt')]
+    assert 'No ingestion strategy' in result.failures[0].error
+    assert result.data['Country'].tolist() == ['Canada']
+
+
+def test_concat_frames_unions_categories():
+    first = pd.DataFrame({'Country': pd.Categorical(['Canada'])})
+    second = pd.DataFrame({'Country': pd.Categorical(['France', 'Canada'])})
+    result = concat_frames([first, None, second])
+    assert isinstance(result['Country'].dtype, pd.CategoricalDtype)
+    assert result['Country'].cat.categories.tolist() == ['Canada', 'France']
+    assert result['Country'].tolist() == ['Canada', 'France', 'Canada']
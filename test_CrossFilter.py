@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import SalesTrendsOverTime, ProductPerformance, DiscountImpactOnSales, CorrelationAnalysis
+from SalesCube import SalesCube
+from CrossFilter import CrossFilter
+
+
+@pytest.fixture(scope='module')
+def data():
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+@pytest.fixture(scope='module')
+def cross_filter(data):
+    cube = SalesCube.from_frame(data, moments=CorrelationAnalysis.columns)
+    return CrossFilter(data, cube, row_columns=['Discount Band', 'Sales', 'Profit'])
+
+
+class TestCrossFilter:
+    def test_no_selection_means_no_mask(self, cross_filter):
+        assert cross_filter.mask() is None
+        assert cross_filter.mask({'Country': [], 'Product': None}) is None
+        assert cross_filter.cube_slice() is cross_filter.cube
+
+    def test_mask_matches_string_comparisons(self, data, cross_filter):
+        mask = cross_filter.mask({'Country': ['Canada', 'Mexico'], 'Segment': ['Government']}, '2014-01-01', '2014-06-01')
+        expected = (data['Country'].isin(['Canada', 'Mexico']) & (data['Segment'] == 'Government')
+                    & (data['Date'] >= '2014-01-01') & (data['Date'] <= '2014-06-01'))
+        np.testing.assert_array_equal(mask, expected.to_numpy())
+
+    def test_unknown_values_select_nothing(self, cross_filter):
+        assert not cross_filter.mask({'Country': ['Atlantis']}).any()
+
+    def test_options_and_date_bounds(self, data, cross_filter):
+        assert cross_filter.options('Segment') == sorted(data['Segment'].unique())
+        assert cross_filter.date_bounds() == (data['Date'].min(), data['Date'].max())
+
+    def test_reports_match_reports_on_filtered_rows(self, data, cross_filter):
+        strategies = [SalesTrendsOverTime(), ProductPerformance(), DiscountImpactOnSales(), CorrelationAnalysis()]
+        selections = {'Product': ['Paseo', 'VTT']}
+        rows = data[data['Product'].isin(['Paseo', 'VTT']) & (data['Date'] >= '2014-03-01')]
+
+        results = cross_filter.reports(strategies, selections, start='2014-03-01')
+        for strategy, result in zip(strategies, results):
+            expected = strategy.process_data(rows)
+            pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+    @pytest.mark.parametrize('granularity', ['day', 'month'])
+    def test_mid_month_range_agrees_with_rows(self, data, granularity):
+        # Spread the rows over the days of their month
+        daily = data.assign(Date=data['Date'] + pd.to_timedelta(np.arange(len(data)) % 28, unit='D'))
+        cube = SalesCube.from_frame(daily, granularity, moments=CorrelationAnalysis.columns)
+        cross_filter = CrossFilter(daily, cube, row_columns=['Discount Band', 'Sales', 'Profit'])
+        strategies = [SalesTrendsOverTime(), ProductPerformance(), DiscountImpactOnSales(), CorrelationAnalysis()]
+        rows = daily[(daily['Date'] >= '2014-06-15') & (daily['Date'] <= '2014-06-20')]
+        assert 0 < len(rows) < (daily['Date'].dt.to_period('M') == '2014-06').sum()
+
+        results = cross_filter.reports(strategies, start='2014-06-15', end='2014-06-20')
+        for strategy, result in zip(strategies, results):
+            expected = strategy.process_data(rows)
+            pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False)
+
+    def test_monthly_cube_only_answers_whole_months(self, cross_filter):
+        assert cross_filter.cube_matches('2014-06-01', '2014-06-30')
+        assert cross_filter.cube_matches()
+        assert not cross_filter.cube_matches('2014-06-15')
+        assert not cross_filter.cube_matches(end='2014-06-20')
+
+    def test_fingerprint_follows_the_selection(self, cross_filter):
+        base = cross_filter.fingerprint()
+        assert cross_filter.fingerprint({'Country': [], 'Product': None}) == base
+        selected = cross_filter.fingerprint({'Country': ['Mexico', 'Canada'], 'Segment': ['Government']}, '2014-01-01')
+        assert selected == cross_filter.fingerprint({'Segment': ['Government'], 'Country': ['Canada', 'Mexico']},
+                                                    '2014-01-01T00:00:00')
+        assert selected != base
+        assert selected != cross_filter.fingerprint({'Country': ['Canada']}, '2014-01-01')
+
+    def test_input_frame_is_untouched(self, data, cross_filter):
+        before = data.copy()
+        cross_filter.reports([SalesTrendsOverTime(), DiscountImpactOnSales()], {'Country': ['France']})
+        pd.testing.assert_frame_equal(data, before)
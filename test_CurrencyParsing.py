@@ -0,0 +1,60 @@
+from CurrencyParsing import parse_currency, parse_currency_columns, convert_currency
+import pandas as pd
+import numpy as np
+
+
+# Test the vectorized parser against the ERP money formats
+class TestParseCurrency:
+    def test_parses_money_strings(self):
+        values = pd.Series(['$1,618.50 ', '$3.00 ', '$32,370.00 '])
+        result = parse_currency(values)
+        assert result.tolist() == [1618.5, 3.0, 32370.0]
+
+    def test_placeholders_and_blanks_become_nan(self):
+        values = pd.Series([' $-   ', '', '   ', None, np.nan, 'abc'])
+        result = parse_currency(values)
+        assert result.isnull().all()
+
+    def test_parenthesized_negatives(self):
+        values = pd.Series(['($4,533.75)', '($880.00)', '-$5.00 '])
+        result = parse_currency(values)
+        assert result.tolist() == [-4533.75, -880.0, -5.0]
+
+    def test_numeric_columns_pass_through(self):
+        values = pd.Series([1, 2, 3], name='Units Sold')
+        result = parse_currency(values)
+        assert result.dtype == 'float64'
+        assert result.name == 'Units Sold'
+        assert result.tolist() == [1.0, 2.0, 3.0]
+
+    def test_empty_input(self):
+        result = parse_currency(pd.Series([], dtype=object, name='Sales'))
+        assert result.dtype == 'float64' and result.name == 'Sales' and result.empty
+
+    def test_all_missing_input(self):
+        values = pd.Series([None, None, None], index=[3, 4, 5])
+        result = parse_currency(values)
+        assert result.dtype == 'float64'
+        assert result.index.tolist() == [3, 4, 5]
+        assert result.isnull().all()
+
+    def test_matches_legacy_converter(self):
+        values = pd.Series(['$1,618.50 ', ' $-   ', '$888.00 ', '', '$20.00 '], index=[5, 6, 7, 8, 9])
+        expected = values.apply(convert_currency)
+        pd.testing.assert_series_equal(parse_currency(values), expected)
+
+
+def test_parse_currency_columns_leaves_input_untouched():
+    data = pd.DataFrame({'Sales': ['$1.00 ', '$2.00 '], 'Profit': [' $-   ', '($1.00)'], 'Country': ['US', 'UK']})
+    original = data.copy()
+    result = parse_currency_columns(data, ['Sales', 'Profit'])
+    assert result.columns.tolist() == ['Sales', 'Profit']
+    assert result['Profit'].isnull().tolist() == [True, False]
+    pd.testing.assert_frame_equal(data, original)
+
+
+def test_parse_categorical_column():
+    values = pd.Series(['$1.00 ', ' $-   ', '$1.00 ', None], dtype='category')
+    result = parse_currency(values)
+    assert result.tolist()[0] == 1.0 and result.tolist()[2] == 1.0
+    assert result.isnull().tolist() == [False, True, False, True]
@@ -0,0 +1,64 @@
+import os
+import pytest
+from DataCache import DatasetCache, CachedDataIngestion, HAS_PYARROW
+from DataIngestion import CSVDataIngestion, DataIngestionStrategy
+from DataSchema import FINANCIALS_SCHEMA
+import pandas as pd
+from unittest.mock import Mock
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    file_path = tmp_path / "sample.csv"
+    pd.DataFrame({'col1': [1, 2], 'col2': ['a', 'b']}).to_csv(file_path, index=False)
+    return str(file_path)
+
+
+@pytest.fixture(params=['pickle', pytest.param('feather', marks=pytest.mark.skipif(not HAS_PYARROW, reason='pyarrow not installed'))])
+def cache(request, tmp_path):
+    return DatasetCache(str(tmp_path / 'cache'), cache_format=request.param)
+
+
+class TestDatasetCache:
+    def test_miss_then_hit(self, cache, sample_csv):
+        assert cache.load(sample_csv) is None
+        data = pd.read_csv(sample_csv)
+        cache.store(sample_csv, data)
+        pd.testing.assert_frame_equal(cache.load(sample_csv), data)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_source_change_invalidates(self, cache, sample_csv):
+        cache.store(sample_csv, pd.read_csv(sample_csv))
+        old_entry = cache.entry_path(sample_csv)
+
+        pd.DataFrame({'col1': [3], 'col2': ['c']}).to_csv(sample_csv, index=False)
+        os.utime(sample_csv, ns=(0, os.stat(sample_csv).st_mtime_ns + 10 ** 9))
+        assert cache.load(sample_csv) is None
+
+        cache.store(sample_csv, pd.read_csv(sample_csv))
+        assert not os.path.exists(old_entry)
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+    def test_schema_version_is_part_of_key(self, cache, sample_csv):
+        assert cache.entry_path(sample_csv, 1) != cache.entry_path(sample_csv, 2)
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            DatasetCache(str(tmp_path), cache_format='xlsx')
+
+
+class TestCachedDataIngestion:
+    def test_wrapped_strategy_runs_once(self, cache, sample_csv):
+        strategy = Mock(spec=DataIngestionStrategy)
+        strategy.ingest_data.return_value = pd.DataFrame({'col1': [1]})
+        ingestion = CachedDataIngestion(strategy, cache)
+        ingestion.ingest_data(sample_csv)
+        ingestion.ingest_data(sample_csv)
+        strategy.ingest_data.assert_called_once_with(sample_csv)
+
+    def test_typed_frame_round_trips(self, cache):
+        ingestion = CachedDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA), cache)
+        cold = ingestion.ingest_data('datasets/Financials.csv')
+        warm = ingestion.ingest_data('datasets/Financials.csv')
+        pd.testing.assert_frame_equal(warm, cold)
+        assert cache.hits == 1
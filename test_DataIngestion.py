@@ -1,5 +1,7 @@
 import pytest
-from DataIngestion import DataIngestionStrategy, CSVDataIngestion, DataIngestionContext
+from DataIngestion import DataIngestionStrategy, CSVDataIngestion, JSONDataIngestion, XMLDataIngestion, DataIngestionContext, expand_paths
+import json
+from DataSchema import FINANCIALS_SCHEMA
 import pandas as pd
 from unittest.mock import Mock
 
@@ -11,6 +13,28 @@ def test_DataIngestionStrategy_cannot_be_instantiated():
 
 
 # Test the concrete class CSVDataIngestion
+class TestExpandPaths:
+    @pytest.fixture
+    def sources(self, tmp_path):
+        for name in ['a.csv', 'b.csv', 'c.json', '.hidden.csv', 'd.csv.tmp', 'notes.txt']:
+            (tmp_path / name).write_text('x')
+        (tmp_path / 'nested.csv').mkdir()
+        return tmp_path
+
+    def test_directories_and_globs_expand_to_files(self, sources):
+        assert expand_paths(str(sources)) == [str(sources / name) for name in ['a.csv', 'b.csv', 'c.json', 'notes.txt']]
+        assert expand_paths(str(sources / '*.csv')) == [str(sources / 'a.csv'), str(sources / 'b.csv')]
+
+    def test_extensions_filter_only_listings_and_matches(self, sources):
+        named = [str(sources), str(sources / 'notes.txt'), str(sources / 'missing.xml')]
+        assert expand_paths(named, {'.csv'}) == [
+            str(sources / 'a.csv'), str(sources / 'b.csv'), str(sources / 'notes.txt'), str(sources / 'missing.xml')]
+
+    def test_paths_are_absolute_and_unique(self, sources, monkeypatch):
+        monkeypatch.chdir(sources)
+        assert expand_paths(['a.csv', str(sources / 'a.csv'), '*.json']) == [str(sources / 'a.csv'), str(sources / 'c.json')]
+
+
 class TestCSVDataIngestion:
     def test_ingest_valid_csv(self, tmp_path):
         # Create a sample CSV file
@@ -38,6 +62,126 @@ class TestCSVDataIngestion:
             ingestion.ingest_data("nonexistent.csv")
 
 
+    def test_ingest_chunks(self, tmp_path):
+        df = pd.DataFrame({'col1': range(10), 'col2': range(10, 20)})
+        file_path = tmp_path / "sample.csv"
+        df.to_csv(file_path, index=False)
+
+        chunks = list(CSVDataIngestion().ingest_chunks(file_path, 4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+    def test_ingest_appended(self, tmp_path):
+        file_path = tmp_path / "sample.csv"
+        file_path.write_text('col1,col2\n1,a\n2,b\n')
+        offset = file_path.stat().st_size
+        with open(file_path, 'a') as file:
+            file.write('3,c\n4,d\n')
+
+        chunks = list(CSVDataIngestion().ingest_appended(file_path, offset, 10))
+        pd.testing.assert_frame_equal(pd.concat(chunks), pd.DataFrame({'col1': [3, 4], 'col2': ['c', 'd']}))
+        assert list(CSVDataIngestion().ingest_appended(file_path, file_path.stat().st_size, 10)) == []
+
+    def test_reads_stop_at_the_last_complete_line(self, tmp_path):
+        file_path = tmp_path / "sample.csv"
+        file_path.write_text('col1,col2\n1,a\n2,b\n3,')
+        strategy = CSVDataIngestion()
+        end = strategy.record_end(file_path, 0, file_path.stat().st_size)
+        assert end == len('col1,col2\n1,a\n2,b\n')
+        chunks = list(strategy.ingest_chunks(file_path, 10, end=end))
+        pd.testing.assert_frame_equal(pd.concat(chunks), pd.DataFrame({'col1': [1, 2], 'col2': ['a', 'b']}))
+        assert strategy.record_end(file_path, end, file_path.stat().st_size) == end
+        assert list(strategy.ingest_appended(file_path, end, 10, end=end)) == []
+
+
+# Test the JSON ingestion
+class TestJSONDataIngestion:
+    def test_array_of_records_returns_dataframe(self, tmp_path):
+        file_path = tmp_path / "sample.json"
+        file_path.write_text(json.dumps([{'col1': 1, 'col2': 'a'}, {'col1': 2, 'col2': 'b'}]))
+        result = JSONDataIngestion().ingest_data(file_path)
+        pd.testing.assert_frame_equal(result, pd.DataFrame({'col1': [1, 2], 'col2': ['a', 'b']}))
+
+    def test_nested_records_are_flattened(self, tmp_path):
+        file_path = tmp_path / "nested.json"
+        file_path.write_text(json.dumps({'records': [
+            {'Country': 'Canada', 'Pricing': {'Sales': '$1.00 ', 'Profit': '($2.00)'}},
+            {'Country': 'France', 'Pricing': {'Sales': '$3.00 '}},
+        ]}))
+        raw = JSONDataIngestion(record_path='records').ingest_data(file_path)
+        assert raw.columns.tolist() == ['Country', 'Pricing.Sales', 'Pricing.Profit']
+
+        typed = JSONDataIngestion(record_path='records', schema=FINANCIALS_SCHEMA).ingest_data(file_path)
+        assert typed['Sales'].tolist() == [1.0, 3.0]
+        assert typed['Profit'][0] == -2.0
+        assert isinstance(typed['Country'].dtype, pd.CategoricalDtype)
+
+    def test_line_delimited_matches_csv_schema(self, tmp_path):
+        file_path = tmp_path / "financials.ndjson"
+        pd.read_csv('datasets/Financials.csv', dtype=str).to_json(file_path, orient='records', lines=True)
+        chunks = list(JSONDataIngestion(lines=True, schema=FINANCIALS_SCHEMA).ingest_chunks(file_path, 300))
+        assert [len(chunk) for chunk in chunks] == [300, 300, 100]
+
+        result = JSONDataIngestion(lines=True, schema=FINANCIALS_SCHEMA).ingest_data(file_path)
+        expected = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_line_delimited_appended(self, tmp_path):
+        file_path = tmp_path / "sample.ndjson"
+        file_path.write_text('{"col1": 1}\n')
+        offset = file_path.stat().st_size
+        with open(file_path, 'a') as file:
+            file.write('{"col1": 2}\n\n{"col1": 3}\n')
+        chunks = list(JSONDataIngestion(lines=True).ingest_appended(file_path, offset, 10))
+        assert pd.concat(chunks)['col1'].tolist() == [2, 3]
+
+
+# Test the streaming XML ingestion
+class TestXMLDataIngestion:
+    @pytest.fixture
+    def sample_xml(self, tmp_path):
+        file_path = tmp_path / "sample.xml"
+        file_path.write_text(
+            '<Financials>'
+            '<Record id="1"><Country>Canada</Country><Sales>$10.00 </Sales><Discount_Band> None </Discount_Band></Record>'
+            '<Record id="2"><Country>France</Country><Sales>$20.00 </Sales></Record>'
+            '<Record id="3"><Country>Mexico</Country><Sales>$30.00 </Sales><Discount_Band> Low </Discount_Band></Record>'
+            '</Financials>'
+        )
+        return file_path
+
+    def test_one_row_per_record(self, sample_xml):
+        result = XMLDataIngestion().ingest_data(sample_xml)
+        assert result.columns.tolist() == ['id', 'Country', 'Sales', 'Discount_Band']
+        assert result['Country'].tolist() == ['Canada', 'France', 'Mexico']
+        assert result['Discount_Band'].tolist() == [' None ', None, ' Low ']
+
+    def test_field_map_and_schema(self, sample_xml):
+        ingestion = XMLDataIngestion(record_tag='Record', field_map={
+            '@id': 'Id', 'Country': 'Country', 'Sales': 'Sales', 'Discount_Band': 'Discount Band',
+        }, schema=FINANCIALS_SCHEMA)
+        result = ingestion.ingest_data(sample_xml)
+        assert result.columns.tolist() == ['Id', 'Country', 'Sales', 'Discount Band']
+        assert result['Sales'].tolist() == [10.0, 20.0, 30.0]
+        assert result['Discount Band'].cat.categories.tolist() == ['Low', 'None']
+
+    def test_nested_records(self, tmp_path):
+        file_path = tmp_path / "nested.xml"
+        file_path.write_text('<Export><Header>ignored</Header><Orders><Order><Sales>1</Sales></Order>'
+                             '<Order><Sales>2</Sales></Order></Orders></Export>')
+        result = XMLDataIngestion(record_tag='Order').ingest_data(file_path)
+        assert result['Sales'].tolist() == ['1', '2']
+
+    def test_ingest_chunks(self, sample_xml):
+        chunks = list(XMLDataIngestion().ingest_chunks(sample_xml, 2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+
+    def test_empty_document(self, tmp_path):
+        file_path = tmp_path / "empty.xml"
+        file_path.write_text('<Financials></Financials>')
+        assert XMLDataIngestion().ingest_data(file_path).empty
+
+
 # Test the context class DataIngestionContext
 class TestDataIngestionContext:
     def test_context_uses_strategy(self):
@@ -54,3 +198,31 @@ class TestDataIngestionContext:
         context.ingest("path/to/data")
         strategy2.ingest_data.assert_called_once_with("path/to/data")
         strategy1.ingest_data.assert_not_called()
+
+    def test_context_ingest_chunks(self):
+        strategy = Mock(spec=DataIngestionStrategy)
+        context = DataIngestionContext(strategy)
+        context.ingest_chunks("path/to/data", 500)
+        strategy.ingest_chunks.assert_called_once_with("path/to/data", 500)
+
+
+# Test schema-driven CSV ingestion
+class TestTypedCSVDataIngestion:
+    def test_ingest_financials_with_schema(self):
+        ingestion = CSVDataIngestion(schema=FINANCIALS_SCHEMA)
+        result = ingestion.ingest_data('datasets/Financials.csv')
+        assert isinstance(result['Country'].dtype, pd.CategoricalDtype)
+        assert ' Carretera ' not in result['Product'].cat.categories
+        assert 'Carretera' in result['Product'].cat.categories
+        assert result['Sales'].dtype == 'float64'
+        assert pd.api.types.is_datetime64_any_dtype(result['Date'])
+        assert (result['Date'].dt.month == result['Month Number']).all()
+
+    def test_currency_columns_are_parsed(self, tmp_path):
+        file_path = tmp_path / "money.csv"
+        file_path.write_text('Sales,Profit\n"$1,618.50 ", $-   \n$3.00 ,($4.00)\n')
+        ingestion = CSVDataIngestion(currency_columns=['Sales', 'Profit'])
+        result = ingestion.ingest_data(file_path)
+        assert result['Sales'].tolist() == [1618.5, 3.0]
+        assert pd.isnull(result['Profit'][0])
+        assert result['Profit'][1] == -4.0
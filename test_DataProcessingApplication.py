@@ -2,11 +2,23 @@ import pytest
 from DataProcessingApplication import (
     DataProcess, SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance,
     DiscountImpactOnSales, MonthlySalesDistribution, CountryWiseSalesDistribution,
-    CorrelationAnalysis, DataProcessingContext
+    CorrelationAnalysis, SummaryStatistics, GroupedCorrelation, DataProcessingContext, ReportPlan, grouped_sums,
+    group_key_columns
 )
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from CurrencyParsing import parse_currency_columns
+import numpy as np
 import pandas as pd
+import tracemalloc
 from unittest.mock import Mock
 
+ALL_STRATEGIES = [
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, DiscountImpactOnSales,
+    MonthlySalesDistribution, CountryWiseSalesDistribution, CorrelationAnalysis, SummaryStatistics,
+    GroupedCorrelation,
+]
+
 # Test the Abstract Base Class DataProcess
 def test_DataProcess_cannot_be_instantiated():
     with pytest.raises(TypeError):
@@ -109,6 +121,167 @@ class TestCorrelationAnalysis:
         assert result.shape[0] == result.shape[1]
         # More detailed checks can be added to verify the correctness of the correlation values
 
+    def test_empty_frame_gives_nan_matrix(self):
+        data = CSVDataIngestion().ingest_data('datasets/Financials.csv').iloc[:0]
+        result = CorrelationAnalysis().process_data(data)
+        assert result.shape == (7, 7)
+        assert result.isnull().all().all()
+
+# Tests for streaming: chunked results must match the whole-frame results
+class TestStreamingProcessing:
+    @pytest.mark.parametrize('strategy_class', [
+        SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance,
+        MonthlySalesDistribution, CountryWiseSalesDistribution,
+    ])
+    def test_chunks_match_whole_frame(self, sample_data, strategy_class):
+        expected = strategy_class().process_data(sample_data)
+        chunks = [sample_data.iloc[i:i + 3] for i in range(0, len(sample_data), 3)]
+        result = strategy_class().process_chunks(chunks)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_correlation_chunks_match_whole_frame(self):
+        data = pd.DataFrame({
+            'Units Sold': [100, 150, None, 250, 120, 90],
+            'Manufacturing Price': [10, 20, 10, 30, 5, 3],
+            'Sale Price': [20, 30, 20, 40, 15, 12],
+            'Gross Sales': [2000, 3000, 4000, 5000, 1800, 1080],
+            'Discounts': [200, None, 400, 500, 0, 10],
+            'Sales': [1800, 2700, 3600, 4500, 1800, 1070],
+            'Profit': [900, 1350, 1800, 2250, -100, 40],
+        })
+        expected = CorrelationAnalysis().process_data(data)
+        context = DataProcessingContext(CorrelationAnalysis())
+        result = context.process_chunks([data.iloc[:2], data.iloc[2:5], data.iloc[5:]])
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_summary_statistics_chunks_match_describe(self, financials):
+        columns = SummaryStatistics.columns
+        expected = parse_currency_columns(financials, columns).describe()
+        chunks = [financials.iloc[i:i + 100] for i in range(0, len(financials), 100)]
+        result = SummaryStatistics().process_chunks(chunks)
+        exact = ['count', 'mean', 'std', 'min', 'max']
+        pd.testing.assert_frame_equal(result.loc[exact], expected.loc[exact])
+        assert (result.loc['50%'] - expected.loc['50%']).abs().le(expected.loc['std']).all()
+
+    @pytest.mark.parametrize('by', ['Country', 'Segment', ['Country', 'Segment']])
+    def test_grouped_correlation_chunks_match_whole_frame(self, financials, by):
+        columns = CorrelationAnalysis.columns
+        values = parse_currency_columns(financials, columns).join(financials[by if isinstance(by, list) else [by]])
+        expected = values.groupby(by, observed=True)[columns].corr()
+        chunks = [financials.iloc[i:i + 150] for i in range(0, len(financials), 150)]
+        result = GroupedCorrelation(by).process_chunks(chunks)
+        # Group keys come back as plain values, not categoricals
+        pd.testing.assert_frame_equal(result, expected, check_index_type=False, check_categorical=False)
+
+    def test_row_level_strategy_does_not_stream(self, sample_data):
+        with pytest.raises(NotImplementedError):
+            DiscountImpactOnSales().process_chunks([sample_data])
+
+    def test_no_chunks(self):
+        with pytest.raises(ValueError):
+            ProductPerformance().process_chunks([])
+
+# Tests for batch execution of several strategies
+class TestReportPlan:
+    def test_results_match_individual_strategies(self, sample_data):
+        strategies = [
+            SalesTrendsOverTime(), ProfitAnalysisByCountry(), ProductPerformance(), DiscountImpactOnSales(),
+            MonthlySalesDistribution(), CountryWiseSalesDistribution(),
+        ]
+        results = ReportPlan(strategies).execute(sample_data)
+        assert len(results) == len(strategies)
+        for strategy, result in zip(strategies, results):
+            pd.testing.assert_frame_equal(result, strategy.process_data(sample_data))
+
+    def test_shares_group_keys(self):
+        plan = ReportPlan([
+            ProfitAnalysisByCountry(), CountryWiseSalesDistribution(),
+            SalesTrendsOverTime(), MonthlySalesDistribution(),
+        ])
+        # Country is grouped once, Month is rolled up from Year x Month
+        assert list(plan.base_keys.values()) == [['Country'], ['Year', 'Month']]
+        assert plan.base_columns[frozenset(['Country'])] == ['Profit', 'Sales']
+
+    def test_context_process_many(self, sample_data):
+        context = DataProcessingContext(Mock(spec=DataProcess))
+        profit, sales = context.process_many([ProfitAnalysisByCountry(), CountryWiseSalesDistribution()], sample_data)
+        assert profit.columns.tolist() == ['Country', 'Profit']
+        assert sales['Sales'].tolist() == [400, 300]
+
+# Grouped sums through key codes must give the frame of the equivalent groupby
+class TestGroupedSums:
+    @pytest.mark.parametrize('keys', [
+        ['Country'], ['Year', 'Month'], ['Segment', 'Year', 'Month'], ['Year', 'Quarter'], ['Discount Band', 'Day'],
+        ['Month Number'],
+    ])
+    def test_matches_groupby(self, keys):
+        data = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+        columns = ['Sales', 'Discounts', 'Profit']
+        expected = data.groupby(group_key_columns(data, keys), observed=True)[columns].sum()
+        pd.testing.assert_frame_equal(grouped_sums(data, keys, columns), expected)
+
+    def test_missing_keys_and_values_are_skipped(self):
+        data = pd.DataFrame({
+            'Country': pd.Categorical(['US', None, 'UK', 'US'], categories=['UK', 'US', 'FR']),
+            'Product': ['A', 'A', None, 'B'],
+            'Sales': [1.0, 2.0, 3.0, np.nan],
+        })
+        result = grouped_sums(data, ['Country', 'Product'], ['Sales'])
+        assert result.index.tolist() == [('US', 'A'), ('US', 'B')]
+        assert result['Sales'].tolist() == [1.0, 0.0]
+        pd.testing.assert_frame_equal(result, data.groupby(['Country', 'Product'], observed=True)[['Sales']].sum())
+
+    def test_integer_values_keep_exact_sums(self, sample_data):
+        result = grouped_sums(sample_data, ['Country'], ['Sales'])
+        assert result['Sales'].dtype == 'int64'
+        assert result['Sales'].tolist() == [400, 300]
+
+# Immutable-input contract: strategies derive what they need without touching or copying the input
+@pytest.fixture(params=['raw', 'typed'])
+def financials(request):
+    if request.param == 'raw':
+        return CSVDataIngestion().ingest_data('datasets/Financials.csv')
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+def measure_peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestImmutableInputs:
+    @pytest.mark.parametrize('strategy_class', ALL_STRATEGIES)
+    def test_input_untouched(self, financials, strategy_class):
+        original = financials.copy(deep=True)
+        strategy_class().process_data(financials)
+        pd.testing.assert_frame_equal(financials, original)
+
+    def test_execution_order_does_not_matter(self, financials):
+        forward = [strategy().process_data(financials) for strategy in ALL_STRATEGIES]
+        backward = [strategy().process_data(financials) for strategy in reversed(ALL_STRATEGIES)][::-1]
+        for first, second in zip(forward, backward):
+            pd.testing.assert_frame_equal(first, second)
+
+    def test_report_plan_input_untouched(self, financials):
+        original = financials.copy(deep=True)
+        ReportPlan([strategy() for strategy in ALL_STRATEGIES]).execute(financials)
+        pd.testing.assert_frame_equal(financials, original)
+
+    @pytest.mark.parametrize('strategy_class', ALL_STRATEGIES)
+    def test_peak_memory_stays_below_a_frame_copy(self, strategy_class):
+        data = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+        data = pd.concat([data] * 100, ignore_index=True)
+        # Wide payload the strategies never read: copying the whole frame would show up here
+        payload = pd.DataFrame(np.zeros((len(data), 20)), columns=[f'Extra {i}' for i in range(20)])
+        data = pd.concat([data, payload], axis=1)
+
+        peak = measure_peak_memory(strategy_class().process_data, data)
+        assert peak < data.memory_usage(deep=True).sum() / 2
+
 # Test for DataProcessingContext
 class TestDataProcessingContext:
     def test_context_uses_strategy(self, sample_data):
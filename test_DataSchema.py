@@ -0,0 +1,58 @@
+import pytest
+from DataSchema import DataSchema, FINANCIALS_SCHEMA, strip_categories
+import pandas as pd
+
+
+@pytest.fixture
+def raw_data():
+    return pd.DataFrame({
+        'Country': ['Canada', 'Germany', 'Canada'],
+        'Product': [' Carretera ', ' Montana ', 'Carretera'],
+        'Sales': ['$1,618.50 ', ' $-   ', '($10.00)'],
+        'Date': ['1/6/2014', '1/12/2013', '1/1/2014'],
+        'Year': [2014, 2013, 2014],
+    })
+
+
+def test_strip_categories_merges_padded_labels():
+    values = pd.Series([' Carretera ', 'Carretera', None, ' VTT '], dtype='category')
+    result = strip_categories(values)
+    assert result.cat.categories.tolist() == ['Carretera', 'VTT']
+    assert result.tolist()[:2] == ['Carretera', 'Carretera']
+    assert pd.isnull(result[2])
+
+
+class TestDataSchema:
+    def test_apply_converts_columns(self, raw_data):
+        schema = DataSchema(
+            columns=raw_data.columns,
+            money_columns=['Sales'],
+            categorical_columns=['Country', 'Product'],
+            integer_columns={'Year': 'int16'},
+            date_columns={'Date': '%d/%m/%Y'},
+        )
+        result = schema.apply(raw_data)
+        assert result['Product'].cat.categories.tolist() == ['Carretera', 'Montana']
+        assert result['Sales'].iloc[0] == 1618.5
+        assert pd.isnull(result['Sales'].iloc[1])
+        assert result['Sales'].iloc[2] == -10.0
+        assert result['Date'].dt.month.tolist() == [6, 12, 1]
+        assert result['Year'].dtype == 'int16'
+
+    def test_apply_with_a_money_field_missing_from_every_record(self, raw_data):
+        # As in an XML or JSON chunk whose records all lack the field
+        raw_data['Sales'] = None
+        result = FINANCIALS_SCHEMA.apply(raw_data)
+        assert result['Sales'].dtype == 'float64'
+        assert result['Sales'].isnull().all()
+
+    def test_apply_leaves_input_untouched(self, raw_data):
+        original = raw_data.copy()
+        FINANCIALS_SCHEMA.apply(raw_data)
+        pd.testing.assert_frame_equal(raw_data, original)
+
+    def test_read_dtypes(self):
+        dtypes = FINANCIALS_SCHEMA.read_dtypes()
+        assert dtypes['Segment'] == 'category'
+        assert dtypes['Sales'] == 'object'
+        assert dtypes['Year'] == 'int16'
@@ -0,0 +1,114 @@
+import gzip
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask, Response
+from plotly.io.json import to_json_plotly
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import DiscountImpactOnSales, SalesTrendsOverTime
+from Figures import (
+    FigureCache, density, discount_impact_figure, lttb, sales_trends_figure, profit_by_country_figure,
+)
+from ResponseCompression import register_compression
+
+
+@pytest.fixture(scope='module')
+def data():
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+class TestDownsampling:
+    def test_lttb_keeps_ends_and_peaks(self):
+        x = np.arange(10_000)
+        y = np.sin(x / 500)
+        y[4321] = 50
+        kept = lttb(x, y, 200)
+        assert len(kept) == 200
+        assert kept[0] == 0 and kept[-1] == 9999
+        assert 4321 in kept
+        assert np.all(np.diff(kept) > 0)
+
+    def test_lttb_leaves_short_series_alone(self):
+        assert lttb([1, 2, 3], [1, 2, 3], 10).tolist() == [0, 1, 2]
+
+    def test_lttb_on_dates(self):
+        dates = pd.Series(pd.date_range('2014-01-01', periods=1000, freq='D'))
+        assert len(lttb(dates, np.arange(1000.0), 100)) == 100
+
+    def test_density_counts_every_row(self, data):
+        bands, sales, counts = density(data['Discount Band'], data['Sales'], bins=20)
+        assert bands == ['High', 'Low', 'Medium', 'None']
+        assert counts.shape == (20, 4)
+        assert counts.sum() == len(data)
+        assert counts[:, bands.index('None')].sum() == (data['Discount Band'] == 'None').sum()
+
+
+class TestFigures:
+    def test_discount_impact_switches_to_density(self, data):
+        rows = DiscountImpactOnSales().process_data(data)
+        assert discount_impact_figure(rows)['data'][0]['type'] == 'scatter'
+        figure = discount_impact_figure(rows, max_points=100)
+        assert figure['data'][0]['type'] == 'heatmap'
+        assert '700 rows' in figure['layout']['title']
+
+    def test_payload_is_bounded_by_the_limits(self, data):
+        rows = DiscountImpactOnSales().process_data(pd.concat([data] * 20, ignore_index=True))
+        payload = to_json_plotly(discount_impact_figure(rows))
+        assert len(payload) < 20_000
+
+    def test_sales_trends_is_downsampled(self, data):
+        trends = SalesTrendsOverTime().process_data(data)
+        assert len(sales_trends_figure(trends)['data'][0]['x']) == len(trends)
+        assert len(sales_trends_figure(trends, max_points=5)['data'][0]['x']) == 5
+
+
+class TestFigureCache:
+    def test_figure_is_cached_by_report_fingerprint(self, data):
+        cache = FigureCache()
+        report = data.groupby('Country', observed=True)[['Profit']].sum().reset_index()
+        first = cache.figure(profit_by_country_figure, report)
+        second = cache.figure(profit_by_country_figure, report.copy())
+        assert first == second
+        assert cache.cache.stats['misses'] == 1 and cache.cache.stats['hits'] == 1
+        assert first['data'][0]['x'] == ['Canada', 'France', 'Germany', 'Mexico', 'United States of America']
+
+    def test_reports_are_only_computed_on_a_miss(self, data):
+        cache = FigureCache()
+        calls = []
+
+        def reports():
+            calls.append(1)
+            return [DiscountImpactOnSales().process_data(data)]
+
+        first = cache.figures([discount_impact_figure], 'selection', reports)
+        second = cache.figures([discount_impact_figure], 'selection', reports)
+        cache.figures([discount_impact_figure], 'other selection', reports)
+        assert len(calls) == 2
+        # A hit returns the cached figures without decoding or copying them
+        assert all(a is b for a, b in zip(first, second))
+        json.dumps(first)
+
+
+class TestResponseCompression:
+    @pytest.fixture
+    def client(self):
+        server = Flask(__name__)
+        register_compression(server, min_size=100)
+        server.add_url_rule('/big', 'big', lambda: Response(json.dumps({'x': list(range(1000))}), mimetype='application/json'))
+        server.add_url_rule('/small', 'small', lambda: Response('{}', mimetype='application/json'))
+        server.add_url_rule('/png', 'png', lambda: Response(b'0' * 1000, mimetype='image/png'))
+        return server.test_client()
+
+    def test_gzip_when_accepted(self, client):
+        response = client.get('/big', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data))['x'][-1] == 999
+        assert int(response.headers['Content-Length']) == len(response.data)
+
+    def test_plain_otherwise(self, client):
+        assert 'Content-Encoding' not in client.get('/big').headers
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/png', headers={'Accept-Encoding': 'gzip'}).headers
@@ -0,0 +1,136 @@
+import pytest
+from IncrementalPipeline import IncrementalPipeline
+from DataIngestion import DataIngestionContext, CSVDataIngestion
+from DataProcessingApplication import (
+    ProfitAnalysisByCountry, MonthlySalesDistribution, CorrelationAnalysis, DiscountImpactOnSales
+)
+from DataSchema import FINANCIALS_SCHEMA
+import pandas as pd
+
+
+STRATEGIES = [ProfitAnalysisByCountry, MonthlySalesDistribution, CorrelationAnalysis]
+
+
+@pytest.fixture
+def financials_lines():
+    with open('datasets/Financials.csv') as file:
+        return file.read().splitlines(keepends=True)
+
+
+@pytest.fixture
+def context():
+    return DataIngestionContext(CSVDataIngestion(schema=FINANCIALS_SCHEMA))
+
+
+def full_results(context, paths):
+    data = pd.concat([context.ingest(path) for path in paths], ignore_index=True)
+    return [strategy().process_data(data) for strategy in STRATEGIES]
+
+
+def assert_results_equal(results, expected):
+    for result, frame in zip(results, expected):
+        pd.testing.assert_frame_equal(result, frame, check_dtype=False, check_categorical=False,
+                                      check_index_type=False, check_column_type=False)
+
+
+def make_pipeline(context, tmp_path):
+    return IncrementalPipeline(context, [strategy() for strategy in STRATEGIES], str(tmp_path / 'state.pkl'),
+                               chunksize=97)
+
+
+class TestIncrementalPipeline:
+    def test_appended_rows_are_consumed_as_deltas(self, tmp_path, context, financials_lines):
+        source = tmp_path / 'sales.csv'
+        source.write_text(''.join(financials_lines[:301]))
+        make_pipeline(context, tmp_path).refresh(str(source))
+
+        with open(source, 'a') as file:
+            file.write(''.join(financials_lines[301:]))
+        results = make_pipeline(context, tmp_path).refresh(str(source))
+        assert_results_equal(results, full_results(context, [str(source)]))
+
+    def test_new_files_are_picked_up(self, tmp_path, context, financials_lines):
+        first, second = tmp_path / 'day1.csv', tmp_path / 'day2.csv'
+        first.write_text(''.join(financials_lines[:400]))
+        pipeline = make_pipeline(context, tmp_path)
+        pipeline.refresh(str(tmp_path / 'day*.csv'))
+
+        second.write_text(financials_lines[0] + ''.join(financials_lines[400:]))
+        results = pipeline.refresh(str(tmp_path / 'day*.csv'))
+        assert_results_equal(results, full_results(context, [str(first), str(second)]))
+
+    def test_unchanged_sources_are_not_read(self, tmp_path, context, financials_lines, monkeypatch):
+        source = tmp_path / 'sales.csv'
+        source.write_text(''.join(financials_lines))
+        pipeline = make_pipeline(context, tmp_path)
+        expected = pipeline.refresh(str(source))
+
+        monkeypatch.setattr(context, 'ingest_chunks', lambda *args: pytest.fail('re-read unchanged file'))
+        assert_results_equal(pipeline.refresh(str(source)), expected)
+
+    def test_rewritten_source_triggers_rebuild(self, tmp_path, context, financials_lines):
+        source = tmp_path / 'sales.csv'
+        source.write_text(''.join(financials_lines))
+        pipeline = make_pipeline(context, tmp_path)
+        pipeline.refresh(str(source))
+
+        source.write_text(''.join(financials_lines[:200]))
+        results = pipeline.refresh(str(source))
+        assert_results_equal(results, full_results(context, [str(source)]))
+
+    def test_half_written_line_waits_for_its_newline(self, tmp_path, context, financials_lines):
+        source = tmp_path / 'sales.csv'
+        cut = len(financials_lines[301]) // 2
+        source.write_text(''.join(financials_lines[:301]) + financials_lines[301][:cut])
+        pipeline = make_pipeline(context, tmp_path)
+        pipeline.refresh(str(source))
+
+        with open(source, 'a') as file:
+            file.write(financials_lines[301][cut:] + ''.join(financials_lines[302:]))
+        results = pipeline.refresh(str(source))
+        assert_results_equal(results, full_results(context, [str(source)]))
+
+    def test_rows_appended_during_a_read_are_counted_once(self, tmp_path, context, financials_lines, monkeypatch):
+        source = tmp_path / 'sales.csv'
+        source.write_text(''.join(financials_lines[:301]))
+        pipeline = make_pipeline(context, tmp_path)
+        ingest_chunks = context.ingest_chunks
+
+        def append_while_reading(*args, **kwargs):
+            with open(source, 'a') as file:
+                file.write(''.join(financials_lines[301:]))
+            return ingest_chunks(*args, **kwargs)
+
+        monkeypatch.setattr(context, 'ingest_chunks', append_while_reading)
+        pipeline.refresh(str(source))
+        monkeypatch.undo()
+        results = pipeline.refresh(str(source))
+        assert_results_equal(results, full_results(context, [str(source)]))
+
+    def test_failed_read_is_retried_without_double_counting(self, tmp_path, context, financials_lines):
+        source = tmp_path / 'sales.csv'
+        bad = financials_lines[250].replace('/2014', '/20x4').replace('/2013', '/20x3')
+        source.write_text(''.join(financials_lines[:250]) + bad + ''.join(financials_lines[251:]))
+        pipeline = make_pipeline(context, tmp_path)
+        # The bad date sits in the third chunk: the two read before it must not be kept
+        with pytest.raises(ValueError):
+            pipeline.refresh(str(source))
+        assert pipeline.partials == {} and pipeline.sources == {}
+
+        source.write_text(''.join(financials_lines))
+        results = make_pipeline(context, tmp_path).refresh(str(source))
+        assert_results_equal(results, full_results(context, [str(source)]))
+        assert_results_equal(pipeline.refresh(str(source)), full_results(context, [str(source)]))
+
+    def test_directory_sources(self, tmp_path, context, financials_lines):
+        sources = tmp_path / 'sources'
+        sources.mkdir()
+        (sources / 'day1.csv').write_text(''.join(financials_lines[:400]))
+        (sources / 'day2.csv').write_text(financials_lines[0] + ''.join(financials_lines[400:]))
+        (sources / 'day3.csv.tmp').write_text('partial')
+        results = make_pipeline(context, tmp_path).refresh(str(sources))
+        assert_results_equal(results, full_results(context, [str(sources / 'day1.csv'), str(sources / 'day2.csv')]))
+
+    def test_row_level_strategy_is_rejected(self, tmp_path, context):
+        with pytest.raises(ValueError):
+            IncrementalPipeline(context, [DiscountImpactOnSales()], str(tmp_path / 'state.pkl'))
@@ -0,0 +1,156 @@
+import json
+import logging
+import numpy as np
+import pytest
+from flask import Flask
+from DataIngestion import CSVDataIngestion, DataIngestionContext
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    DataProcessingContext, ProductPerformance, CountryWiseSalesDistribution, CorrelationAnalysis,
+)
+from Instrumentation import Instrumentation, LogSink, MetricsRegistry, register_metrics_endpoint, stage
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+class FailingSink:
+    def emit(self, metrics):
+        raise RuntimeError('sink down')
+
+
+class TestInstrumentation:
+    def test_measure_records_time_and_rows(self, registry):
+        instrumentation = Instrumentation([registry])
+        with instrumentation.measure('process', 'Report', rows_in=10) as call:
+            sum(range(10_000))
+            call.rows_out = 3
+        [metrics] = registry.records()
+        assert (metrics.stage, metrics.strategy, metrics.rows_in, metrics.rows_out) == ('process', 'Report', 10, 3)
+        assert metrics.wall_seconds > 0 and metrics.cpu_seconds >= 0
+        assert metrics.error is None
+
+    def test_nested_stages_are_named_after_their_parent(self, registry):
+        instrumentation = Instrumentation([registry])
+        with instrumentation.measure('ingest', 'Reader'):
+            with stage('read'):
+                with stage('parse'):
+                    pass
+        assert [m.stage for m in registry.records()] == ['ingest.read.parse', 'ingest.read', 'ingest']
+        assert {m.strategy for m in registry.records()} == {'Reader'}
+
+    def test_stage_without_instrumentation_does_nothing(self):
+        with stage('read') as metrics:
+            assert metrics is None
+
+    def test_errors_are_recorded_and_raised(self, registry):
+        instrumentation = Instrumentation([registry])
+        with pytest.raises(ValueError):
+            with instrumentation.measure('process', 'Report'):
+                raise ValueError('bad data')
+        assert 'bad data' in registry.records()[0].error
+        assert registry.summary()[('process', 'Report')]['errors'] == 1
+
+    def test_tracemalloc_peak_includes_nested_stages(self, registry):
+        instrumentation = Instrumentation([registry], memory='tracemalloc')
+        with instrumentation.measure('process', 'Report'):
+            with stage('allocate'):
+                block = np.ones(2_000_000)
+                del block
+        inner, outer = registry.records()
+        assert inner.peak_memory_delta >= 16_000_000
+        assert outer.peak_memory_delta >= inner.peak_memory_delta
+
+    def test_profile_next_captures_a_single_call(self, registry, tmp_path):
+        instrumentation = Instrumentation([registry], memory=None)
+        instrumentation.profile_next(tmp_path / 'call.prof')
+        with instrumentation.measure('process', 'First'):
+            sorted(range(1000))
+        with instrumentation.measure('process', 'Second'):
+            pass
+        first, second = registry.records()
+        assert 'cumulative' in first.profile and (tmp_path / 'call.prof').exists()
+        assert second.profile is None
+
+    def test_failing_sink_does_not_break_the_call(self, registry):
+        instrumentation = Instrumentation([FailingSink(), registry])
+        with instrumentation.measure('process', 'Report'):
+            pass
+        assert len(registry.records()) == 1
+
+    def test_log_sink_writes_json(self, caplog):
+        instrumentation = Instrumentation([LogSink()])
+        with caplog.at_level(logging.INFO, logger='pipeline'):
+            with instrumentation.measure('ingest', 'Reader') as call:
+                call.rows_out = 5
+        assert json.loads(caplog.records[0].getMessage())['rows_out'] == 5
+
+
+class TestMetricsRegistry:
+    def test_prometheus_text(self, registry):
+        instrumentation = Instrumentation([registry])
+        for _ in range(2):
+            with instrumentation.measure('process', 'Say "hi"', rows_in=4) as call:
+                call.rows_out = 1
+        text = registry.prometheus_text()
+        assert '# TYPE erp_pipeline_calls_total counter' in text
+        assert 'erp_pipeline_calls_total{stage="process",strategy="Say \\"hi\\""} 2' in text
+        assert 'erp_pipeline_rows_in_total{stage="process",strategy="Say \\"hi\\""} 8' in text
+        assert 'erp_pipeline_wall_seconds_bucket{stage="process",strategy="Say \\"hi\\"",le="+Inf"} 2' in text
+
+    def test_metrics_endpoint(self, registry):
+        with Instrumentation([registry]).measure('process', 'Report'):
+            pass
+        server = Flask(__name__)
+        register_metrics_endpoint(server, registry)
+        response = server.test_client().get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        assert b'erp_pipeline_calls_total{stage="process",strategy="Report"} 1' in response.data
+
+    def test_metrics_endpoint_serves_several_registries(self, registry):
+        class Gauge:
+            def prometheus_text(self):
+                return 'erp_pipeline_data_age_seconds 3.0\n'
+
+        with Instrumentation([registry]).measure('process', 'Report'):
+            pass
+        server = Flask(__name__)
+        register_metrics_endpoint(server, [registry, Gauge()])
+        text = server.test_client().get('/metrics').get_data(as_text=True)
+        assert 'erp_pipeline_calls_total{stage="process",strategy="Report"} 1' in text
+        assert text.endswith('erp_pipeline_data_age_seconds 3.0\n')
+
+
+class TestInstrumentedContexts:
+    def test_ingestion_context_records_read_and_conversion_stages(self, registry):
+        context = DataIngestionContext(CSVDataIngestion(schema=FINANCIALS_SCHEMA), instrumentation=Instrumentation([registry]))
+        data = context.ingest('datasets/Financials.csv')
+        stages = {m.stage: m for m in registry.records()}
+        assert stages['ingest'].rows_out == len(data)
+        assert {'ingest.read', 'ingest.convert', 'ingest.convert.Date', 'ingest.convert.Sales'} <= set(stages)
+        assert stages['ingest.convert'].rows_in == len(data)
+
+    def test_ingest_chunks_is_recorded_when_exhausted(self, registry):
+        context = DataIngestionContext(CSVDataIngestion(schema=FINANCIALS_SCHEMA), instrumentation=Instrumentation([registry]))
+        chunks = context.ingest_chunks('datasets/Financials.csv', 300)
+        assert registry.records() == []
+        list(chunks)
+        [metrics] = registry.records()
+        assert (metrics.stage, metrics.rows_out) == ('ingest_chunks', 700)
+
+    def test_processing_context_records_every_call(self, registry):
+        data = CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+        context = DataProcessingContext(ProductPerformance(), instrumentation=Instrumentation([registry]))
+        context.process(data)
+        context.process_many([ProductPerformance(), CountryWiseSalesDistribution(), CorrelationAnalysis()], data)
+        context.set_strategy(CorrelationAnalysis())
+        context.process_chunks([data.iloc[:350], data.iloc[350:]])
+
+        stages = {m.stage: m for m in registry.records()}
+        assert stages['process'].rows_in == 700 and stages['process'].rows_out == 6
+        assert 'process_many.groupby Product' in stages
+        assert 'process_many.CorrelationAnalysis' in stages
+        assert stages['process_chunks'].rows_in == 700
@@ -0,0 +1,73 @@
+import logging
+import pandas as pd
+import pytest
+from DataCache import CachedDataIngestion, DatasetCache
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    SalesTrendsOverTime, ProfitAnalysisByCountry, ProductPerformance, CorrelationAnalysis, DiscountImpactOnSales,
+)
+from MemoryOptimization import CompactDataIngestion, compact_frame
+
+
+@pytest.fixture(scope='module')
+def raw():
+    return pd.read_csv('datasets/Financials.csv')
+
+
+@pytest.fixture(scope='module')
+def typed():
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+class TestCompactFrame:
+    def test_raw_frame_is_typed_and_smaller(self, raw):
+        compact, report = compact_frame(raw)
+        assert compact['Country'].dtype == 'category'
+        assert compact['Product'].cat.categories.tolist() == ['Amarilla', 'Carretera', 'Montana', 'Paseo', 'VTT', 'Velo']
+        assert compact['Sales'].dtype == 'float64'
+        assert compact['Sale Price'].dtype == 'int16'
+        assert compact['Month Number'].dtype == 'int8'
+        assert report.bytes_after < report.bytes_before / 5
+        assert 'object -> category' in str(report)
+        assert raw['Country'].dtype == object
+
+    def test_money_placeholders_become_missing(self, raw, typed):
+        compact, _ = compact_frame(raw)
+        assert compact['Discounts'].isna().sum() == typed['Discounts'].isna().sum()
+        pd.testing.assert_series_equal(compact['Profit'], typed['Profit'])
+
+    def test_reports_are_unchanged(self, typed):
+        compact, _ = compact_frame(typed)
+        for strategy in [SalesTrendsOverTime(), ProfitAnalysisByCountry(), ProductPerformance(), CorrelationAnalysis()]:
+            pd.testing.assert_frame_equal(strategy.process_data(compact), strategy.process_data(typed))
+        assert DiscountImpactOnSales().process_data(compact).equals(DiscountImpactOnSales().process_data(typed))
+
+    def test_unique_text_and_non_numbers_stay_objects(self):
+        data = pd.DataFrame({'id': [f'row-{i}' for i in range(10)], 'price': ['1.5', 'n/a'] * 5})
+        compact, _ = compact_frame(data)
+        assert compact.dtypes.tolist() == [object, 'category']
+
+    def test_float32_only_on_request_and_when_lossless(self):
+        data = pd.DataFrame({'half': [0.5, 1.5, 2.5], 'cents': [1234567.89, 0.01, 2.0]})
+        assert compact_frame(data)[0].dtypes.tolist() == ['float64', 'float64']
+        assert compact_frame(data, float32=True)[0].dtypes.tolist() == ['float32', 'float64']
+
+
+class TestCompactDataIngestion:
+    def test_report_is_kept_and_logged(self, caplog):
+        ingestion = CompactDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA))
+        with caplog.at_level(logging.INFO, logger='MemoryOptimization'):
+            data = ingestion.ingest_data('datasets/Financials.csv')
+        assert data['Manufacturing Price'].dtype == 'int16'
+        assert ingestion.report.rows == 700
+        assert 'Compacted' in caplog.text
+
+    def test_cache_keeps_compact_and_plain_frames_apart(self, tmp_path):
+        cache = DatasetCache(str(tmp_path))
+        plain = CachedDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA), cache).ingest_data('datasets/Financials.csv')
+        compact = CachedDataIngestion(CompactDataIngestion(CSVDataIngestion(schema=FINANCIALS_SCHEMA)), cache) \
+            .ingest_data('datasets/Financials.csv')
+        assert plain['Sale Price'].dtype == 'float64'
+        assert compact['Sale Price'].dtype == 'int16'
+        assert cache.misses == 2
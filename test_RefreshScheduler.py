@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+import pytest
+from Instrumentation import Instrumentation, MetricsRegistry
+from RefreshScheduler import RefreshScheduler, source_signature
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'data.csv'
+    write(path, 'v1', mtime=1_000_000)
+    return path
+
+
+@pytest.fixture
+def scheduler(source):
+    scheduler = RefreshScheduler(lambda: source.read_text(), [str(source)], interval=0.02)
+    yield scheduler
+    scheduler.stop(timeout=5)
+
+
+class TestSources:
+    def test_directory_sources_cover_their_files(self, tmp_path):
+        for name in ['a.csv', 'b.json', '.hidden']:
+            (tmp_path / name).write_text('x')
+        assert list(source_signature([str(tmp_path)])) == [str(tmp_path / 'a.csv'), str(tmp_path / 'b.json')]
+
+    def test_signature_follows_content_changes(self, source):
+        before = source_signature([str(source)])
+        write(source, 'v2 longer', mtime=1_000_100)
+        assert source_signature([str(source)]) != before
+
+    def test_missing_file_is_part_of_the_signature(self, tmp_path):
+        assert source_signature([str(tmp_path / 'missing.csv')]) == {str(tmp_path / 'missing.csv'): None}
+
+
+class TestRefreshScheduler:
+    def test_first_load_in_the_background(self, scheduler):
+        scheduler.start()
+        assert scheduler.get(timeout=5) == 'v1'
+        assert scheduler.refreshes == 1 and scheduler.staleness() == 0.0
+
+    def test_changed_source_is_swapped_in(self, scheduler, source):
+        scheduler.start()
+        scheduler.get(timeout=5)
+        write(source, 'v2', mtime=1_000_100)
+        wait_until(lambda: scheduler.get() == 'v2')
+        assert scheduler.refreshes == 2
+        assert scheduler.staleness() == 0.0
+
+    def test_unchanged_source_is_not_reloaded(self, scheduler):
+        scheduler.start()
+        scheduler.get(timeout=5)
+        time.sleep(0.2)
+        assert scheduler.refreshes == 1
+
+    def test_readers_keep_the_previous_value_during_a_refresh(self, source):
+        loading, release = threading.Event(), threading.Event()
+        loads = []
+
+        def load():
+            loads.append(1)
+            if len(loads) > 1:
+                loading.set()
+                release.wait(5)
+            return source.read_text()
+
+        scheduler = RefreshScheduler(load, [str(source)], interval=0.02)
+        scheduler.start()
+        try:
+            scheduler.get(timeout=5)
+            write(source, 'v2', mtime=1_000_100)
+            assert loading.wait(5)
+            # The refresh is running: readers get the old value without waiting
+            assert scheduler.get(timeout=0.1) == 'v1'
+            assert scheduler.staleness() > 0
+            release.set()
+            wait_until(lambda: scheduler.get() == 'v2')
+        finally:
+            release.set()
+            scheduler.stop(timeout=5)
+
+    def test_failed_refresh_keeps_the_previous_value(self, source):
+        def load():
+            text = source.read_text()
+            if text == 'broken':
+                raise ValueError('unreadable')
+            return text
+
+        scheduler = RefreshScheduler(load, [str(source)], interval=0.02)
+        scheduler.start()
+        try:
+            scheduler.get(timeout=5)
+            write(source, 'broken', mtime=1_000_100)
+            wait_until(lambda: scheduler.failures == 1)
+            assert scheduler.get() == 'v1' and scheduler.error is None
+            # The same broken file is not retried, a fixed one is loaded
+            time.sleep(0.2)
+            assert scheduler.failures == 1
+            write(source, 'v3', mtime=1_000_200)
+            wait_until(lambda: scheduler.get() == 'v3')
+        finally:
+            scheduler.stop(timeout=5)
+
+    def test_failed_first_load_raises_until_a_refresh_succeeds(self, source):
+        write(source, 'broken', mtime=1_000_000)
+
+        def load():
+            text = source.read_text()
+            if text == 'broken':
+                raise ValueError('unreadable')
+            return text
+
+        scheduler = RefreshScheduler(load, [str(source)], interval=0.02)
+        scheduler.start()
+        try:
+            with pytest.raises(ValueError):
+                scheduler.get(timeout=5)
+            assert not scheduler.ready
+            write(source, 'v2', mtime=1_000_100)
+            wait_until(lambda: scheduler.ready)
+            assert scheduler.get() == 'v2'
+        finally:
+            scheduler.stop(timeout=5)
+
+    def test_stop_and_restart_resume_watching(self, scheduler, source):
+        scheduler.start()
+        scheduler.get(timeout=5)
+        scheduler.stop(timeout=5)
+        write(source, 'v2', mtime=1_000_100)
+        time.sleep(0.2)
+        assert scheduler.get() == 'v1'
+        scheduler.start()
+        wait_until(lambda: scheduler.get() == 'v2')
+        assert scheduler.refreshes == 2
+
+    def test_metrics(self, source):
+        registry = MetricsRegistry()
+        scheduler = RefreshScheduler(lambda: source.read_text(), [str(source)], name='financials',
+                                     instrumentation=Instrumentation([registry], memory=None))
+        assert scheduler.refresh()
+        assert registry.summary()[('refresh', 'financials')]['calls'] == 1
+        text = scheduler.prometheus_text()
+        assert 'erp_pipeline_refreshes_total{name="financials"} 1' in text
+        assert 'erp_pipeline_data_staleness_seconds{name="financials"} 0.0' in text
+        assert 'erp_pipeline_last_refresh_seconds{name="financials"}' in text
+
+    def test_without_watching_the_owner_polls(self, source):
+        scheduler = RefreshScheduler(lambda: source.read_text(), [str(source)], interval=0.02, watch=False)
+        scheduler.start()
+        assert scheduler.get(timeout=5) == 'v1'
+        write(source, 'v2', mtime=1_000_100)
+        time.sleep(0.2)
+        # Nothing watches: the thread ended after the first load and start() does not restart it
+        scheduler.start()
+        assert scheduler.get() == 'v1' and not scheduler._thread.is_alive()
+        # A change is loaded once it is seen unchanged on two polls
+        assert not scheduler.poll()
+        assert scheduler.staleness() > 0
+        assert scheduler.poll()
+        assert scheduler.get() == 'v2' and scheduler.refreshes == 2
+        assert not scheduler.poll()
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+import pytest
+from ReportCache import ReportCache, frame_fingerprint, strategy_key
+from DataProcessingApplication import DataProcessingContext, ProfitAnalysisByCountry, CountryWiseSalesDistribution
+import pandas as pd
+from unittest.mock import Mock
+
+
+@pytest.fixture
+def sample_data():
+    return pd.DataFrame({
+        'Country': ['US', 'US', 'UK', 'UK'],
+        'Sales': [100, 200, 150, 250],
+        'Profit': [50, 80, 60, 100],
+    })
+
+
+def test_fingerprint_tracks_content(sample_data):
+    assert frame_fingerprint(sample_data) == frame_fingerprint(sample_data.copy())
+    changed = sample_data.copy()
+    changed.loc[0, 'Sales'] = 101
+    assert frame_fingerprint(changed) != frame_fingerprint(sample_data)
+
+
+def test_strategy_key_includes_parameters():
+    class Parametrized:
+        def __init__(self, top):
+            self.top = top
+    assert strategy_key(Parametrized(5)) != strategy_key(Parametrized(10))
+
+
+class TestReportCache:
+    def test_get_or_compute_memoizes(self):
+        cache = ReportCache()
+        compute = Mock(return_value=pd.DataFrame({'a': [1]}))
+        cache.get_or_compute('key', compute)
+        cache.get_or_compute('key', compute)
+        compute.assert_called_once()
+        assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+    def test_lru_eviction_by_size(self):
+        cache = ReportCache(max_bytes=8000)
+        for i in range(5):
+            cache.put(f'key{i}', list(range(1000)))
+        assert cache.get('key0') is None
+        assert cache.get('key4') is not None
+        assert cache.stats['evictions'] > 0
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        first = ReportCache(disk_dir=str(tmp_path))
+        first.get_or_compute('key', lambda: pd.DataFrame({'a': [1]}))
+
+        second = ReportCache(disk_dir=str(tmp_path))
+        result = second.get_or_compute('key', Mock(side_effect=AssertionError('recomputed')))
+        assert result['a'].tolist() == [1]
+        assert second.stats['disk_hits'] == 1
+        assert not any(name.endswith('.lock') for name in os.listdir(tmp_path))
+
+    def test_get_or_compute_many_computes_only_missing_keys(self):
+        cache = ReportCache()
+        cache.put('a', 1)
+        compute = Mock(return_value=[20, 30])
+        assert cache.get_or_compute_many(['a', 'b', 'c'], compute) == [1, 20, 30]
+        compute.assert_called_once_with([1, 2])
+        assert cache.stats['hits'] == 1 and cache.stats['misses'] == 2
+        assert cache.get_or_compute_many(['b', 'c'], Mock(side_effect=AssertionError('recomputed'))) == [20, 30]
+
+    def test_get_or_compute_many_waits_for_a_report_another_process_computes(self, tmp_path):
+        # Another worker holds the lock of 'b' and publishes it while we wait for the lock
+        other = ReportCache(disk_dir=str(tmp_path))
+        (tmp_path / 'b.lock').touch()
+
+        def finish():
+            time.sleep(0.2)
+            other.put('b', 'from the other worker')
+            os.remove(tmp_path / 'b.lock')
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        cache = ReportCache(disk_dir=str(tmp_path))
+        compute = Mock(return_value=['computed'])
+        assert cache.get_or_compute_many(['a', 'b'], compute) == ['computed', 'from the other worker']
+        thread.join()
+        compute.assert_called_once_with([0])
+        assert cache.stats['misses'] == 1 and cache.stats['disk_hits'] == 1
+        assert not any(name.endswith('.lock') for name in os.listdir(tmp_path))
+
+    def test_disk_tier_drops_least_recently_used_files(self, tmp_path):
+        cache = ReportCache(disk_dir=str(tmp_path), max_disk_bytes=10000)
+        for i in range(3):
+            cache.put(f'key{i}', list(range(1000)))
+            os.utime(tmp_path / f'key{i}.pkl', (1_000_000 + i, 1_000_000 + i))
+        # Reading key0 from disk makes it the most recently used
+        assert ReportCache(disk_dir=str(tmp_path)).get('key0') is not None
+        cache.put('key3', list(range(1000)))
+        assert sorted(os.listdir(tmp_path)) == ['key0.pkl', 'key2.pkl', 'key3.pkl']
+        assert cache.stats['disk_evictions'] == 1
+
+    def test_prune_disk_removes_abandoned_temporary_files(self, tmp_path):
+        (tmp_path / 'old.tmp').write_bytes(b'partial')
+        os.utime(tmp_path / 'old.tmp', (1_000_000, 1_000_000))
+        (tmp_path / 'writing.tmp').write_bytes(b'partial')
+        ReportCache(disk_dir=str(tmp_path)).prune_disk()
+        assert os.listdir(tmp_path) == ['writing.tmp']
+
+
+class TestCachedDataProcessingContext:
+    def test_process_uses_cache(self, sample_data):
+        cache = ReportCache()
+        context = DataProcessingContext(ProfitAnalysisByCountry(), cache=cache)
+        first = context.process(sample_data)
+        second = context.process(sample_data.copy())
+        assert second is first
+        assert cache.stats['hits'] == 1
+
+    def test_process_many_only_computes_missing(self, sample_data):
+        cache = ReportCache()
+        context = DataProcessingContext(ProfitAnalysisByCountry(), cache=cache)
+        context.process(sample_data)
+        profit, sales = context.process_many([ProfitAnalysisByCountry(), CountryWiseSalesDistribution()], sample_data)
+        assert cache.stats['hits'] == 1
+        assert cache.stats['misses'] == 2
+        assert sales['Sales'].tolist() == [400, 300]
@@ -0,0 +1,100 @@
+import pytest
+import pandas as pd
+from DataIngestion import CSVDataIngestion, DataIngestionContext
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    DataProcessingContext, SalesTrendsOverTime, MonthlySalesDistribution, ProfitAnalysisByCountry,
+    ProductPerformance, CountryWiseSalesDistribution, QuarterlySales, SegmentSalesTrends, CorrelationAnalysis,
+    DiscountImpactOnSales,
+)
+from ReportCache import ReportCache
+from SalesCube import BuildSalesCube
+from SQLBackend import SQLStore, SQLBackend
+import SQLBackend as sql_backend
+
+STRATEGIES = [
+    SalesTrendsOverTime, MonthlySalesDistribution, ProfitAnalysisByCountry, ProductPerformance,
+    CountryWiseSalesDistribution, QuarterlySales, SegmentSalesTrends, DiscountImpactOnSales, CorrelationAnalysis,
+]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+@pytest.fixture(scope='module')
+def store():
+    # Streamed in chunks, as a file larger than memory would be
+    chunks = DataIngestionContext(CSVDataIngestion(schema=FINANCIALS_SCHEMA)).ingest_chunks('datasets/Financials.csv', 250)
+    with SQLStore() as store:
+        yield store.load_chunks(chunks)
+
+
+class TestSQLBackend:
+    @pytest.mark.parametrize('strategy', STRATEGIES)
+    def test_reports_match_the_pandas_backend(self, data, store, strategy):
+        expected = DataProcessingContext(strategy()).process(data)
+        result = DataProcessingContext(strategy(), backend=SQLBackend()).process(store)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_process_many_matches_the_pandas_backend(self, data, store):
+        strategies = [strategy() for strategy in STRATEGIES]
+        expected = DataProcessingContext(None).process_many(strategies, data)
+        results = DataProcessingContext(None, backend=SQLBackend()).process_many(strategies, store)
+        for result, report in zip(results, expected):
+            pd.testing.assert_frame_equal(result, report)
+
+    def test_partitioned_scans_match_a_single_scan(self, data, store, monkeypatch):
+        monkeypatch.setattr(sql_backend, 'MIN_PARTITION_ROWS', 100)
+        store.threads = 4
+        try:
+            assert len(store._partitions()) == 4
+            pd.testing.assert_frame_equal(QuarterlySales().process_sql(store), QuarterlySales().process_data(data))
+            pd.testing.assert_frame_equal(CorrelationAnalysis().process_sql(store), CorrelationAnalysis().process_data(data))
+        finally:
+            store.threads = 1
+
+    def test_rows_read_back_with_their_dtypes(self, data, store):
+        pd.testing.assert_frame_equal(store.select(), data)
+        chunks = list(store.chunks(300))
+        assert [len(chunk) for chunk in chunks] == [300, 300, 100]
+        pd.testing.assert_frame_equal(pd.concat(chunks), data)
+
+    def test_streaming_strategies_without_sql_run_on_chunks(self, data, store):
+        cube = DataProcessingContext(BuildSalesCube(), backend=SQLBackend(chunksize=200)).process(store)
+        pd.testing.assert_frame_equal(ProductPerformance().process_cube(cube), ProductPerformance().process_data(data))
+
+    def test_reopened_store_keeps_rows_and_fingerprint(self, data, tmp_path):
+        path = str(tmp_path / 'financials.sqlite')
+        with SQLStore(path) as store:
+            store.load(data)
+            fingerprint = store.fingerprint()
+        with SQLStore(path) as store:
+            assert len(store) == len(data)
+            assert store.fingerprint() == fingerprint
+            pd.testing.assert_frame_equal(ProfitAnalysisByCountry().process_sql(store),
+                                          ProfitAnalysisByCountry().process_data(data))
+            store.load(data.iloc[:10])
+            assert store.fingerprint() != fingerprint
+
+    def test_cached_reports_follow_the_store(self, data):
+        cache = ReportCache()
+        context = DataProcessingContext(ProductPerformance(), cache=cache, backend=SQLBackend())
+        with SQLStore() as store:
+            store.load(data)
+            context.process(store)
+            context.process(store)
+            assert cache.stats['hits'] == 1
+            store.load(data.iloc[:10])
+            assert context.process(store)['Sales'].sum() == pytest.approx(data['Sales'].sum() + data['Sales'][:10].sum())
+
+    def test_mismatched_columns_are_rejected(self, data):
+        with SQLStore() as store:
+            store.load(data)
+            with pytest.raises(ValueError):
+                store.load(data.drop(columns=['Profit']))
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            SQLStore(engine='oracle')
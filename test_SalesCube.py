@@ -0,0 +1,90 @@
+import pytest
+import pandas as pd
+from DataIngestion import CSVDataIngestion
+from DataSchema import FINANCIALS_SCHEMA
+from DataProcessingApplication import (
+    DataProcessingContext, SalesTrendsOverTime, MonthlySalesDistribution, ProfitAnalysisByCountry,
+    ProductPerformance, CountryWiseSalesDistribution, QuarterlySales, SegmentSalesTrends, CorrelationAnalysis,
+)
+from ReportCache import ReportCache
+from SalesCube import SalesCube, BuildSalesCube
+
+GROUPED_STRATEGIES = [
+    SalesTrendsOverTime, MonthlySalesDistribution, ProfitAnalysisByCountry, ProductPerformance,
+    CountryWiseSalesDistribution, QuarterlySales, SegmentSalesTrends,
+]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return CSVDataIngestion(schema=FINANCIALS_SCHEMA).ingest_data('datasets/Financials.csv')
+
+
+@pytest.fixture(scope='module')
+def cube(data):
+    return SalesCube.from_frame(data)
+
+
+def assert_same_report(left, right):
+    pd.testing.assert_frame_equal(left.reset_index(drop=True), right.reset_index(drop=True), check_dtype=False)
+
+
+class TestSalesCube:
+    @pytest.mark.parametrize('strategy', GROUPED_STRATEGIES)
+    def test_reports_from_cube_match_raw_rows(self, data, cube, strategy):
+        assert_same_report(strategy().process_cube(cube), strategy().process_data(data))
+
+    def test_cube_is_smaller_than_the_data(self, data, cube):
+        assert len(cube) < len(data)
+        assert cube.data['Sales'].sum() == pytest.approx(data['Sales'].sum())
+
+    def test_day_granularity_rolls_up_to_months(self, data, cube):
+        daily = SalesCube.from_frame(data, 'day')
+        assert 'Day' in daily.data.index.names
+        assert_same_report(SalesTrendsOverTime().process_cube(daily), SalesTrendsOverTime().process_cube(cube))
+
+    def test_filter_matches_filtered_rows(self, data, cube):
+        sliced = cube.filter({'Country': 'Canada', 'Segment': ['Government', 'Midmarket']}, start='2014-01-01', end='2014-06-30')
+        rows = data[(data['Country'] == 'Canada') & data['Segment'].isin(['Government', 'Midmarket'])
+                    & (data['Date'] >= '2014-01-01') & (data['Date'] <= '2014-06-30')]
+        assert_same_report(QuarterlySales().process_cube(sliced), QuarterlySales().process_data(rows))
+
+    def test_streamed_and_merged_cubes_match(self, data, cube):
+        streamed = BuildSalesCube().process_chunks([data.iloc[:250], data.iloc[250:]])
+        assert_same_report(ProductPerformance().process_cube(streamed), ProductPerformance().process_cube(cube))
+
+        merged = SalesCube.from_frame(data.iloc[:300]).merge(SalesCube.from_frame(data.iloc[300:]))
+        assert_same_report(SalesTrendsOverTime().process_cube(merged), SalesTrendsOverTime().process_cube(cube))
+
+    def test_raw_money_strings_are_parsed(self, cube):
+        raw = pd.read_csv('datasets/Financials.csv')
+        assert SalesCube.from_frame(raw).data['Sales'].sum() == pytest.approx(cube.data['Sales'].sum())
+
+    def test_unknown_dimension_and_measure(self, cube):
+        with pytest.raises(KeyError):
+            cube.rollup(['Day'])
+        with pytest.raises(KeyError):
+            cube.rollup(['Year'], ['Sale Price'])
+
+    def test_correlation_from_moments_matches_rows(self, data):
+        cube = SalesCube.from_frame(data, moments=CorrelationAnalysis.columns)
+        sliced = cube.filter({'Segment': 'Enterprise'})
+        rows = data[data['Segment'] == 'Enterprise']
+        # Discounts and Profit have missing values, so this checks the pairwise-complete sums
+        pd.testing.assert_frame_equal(CorrelationAnalysis().process_cube(cube), CorrelationAnalysis().process_data(data))
+        pd.testing.assert_frame_equal(CorrelationAnalysis().process_cube(sliced), CorrelationAnalysis().process_data(rows))
+        pd.testing.assert_frame_equal(cube.covariance(['Sales', 'Profit']), data[['Sales', 'Profit']].cov())
+
+    def test_row_level_reports_are_not_answered(self, cube):
+        with pytest.raises(NotImplementedError):
+            CorrelationAnalysis().process_cube(cube)
+
+    def test_context_builds_cube_in_plan_and_caches_queries(self, data):
+        cache = ReportCache()
+        context = DataProcessingContext(SalesTrendsOverTime(), cache=cache)
+        cube, by_country = context.process_many([BuildSalesCube(), ProfitAnalysisByCountry()], data)
+        assert_same_report(by_country, ProfitAnalysisByCountry().process_data(data))
+
+        first = context.process_cube(cube)
+        assert context.process_cube(cube) is first
+        assert cache.stats['hits'] == 1
@@ -0,0 +1,141 @@
+import pickle
+import pytest
+import StreamingStatistics
+from StreamingStatistics import CovarianceAccumulator, GroupedStatistics, QuantileSketch, StatisticsAccumulator
+import numpy as np
+import pandas as pd
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(1e6, 10.0, size=(200, 3)), columns=['a', 'b', 'c'])
+    frame['b'] += frame['a'] * 0.5
+    frame.loc[rng.choice(200, 20, replace=False), 'c'] = np.nan
+    return frame
+
+
+class TestCovarianceAccumulator:
+    def test_single_frame_matches_pandas(self, data):
+        accumulator = CovarianceAccumulator.from_frame(data)
+        pd.testing.assert_frame_equal(accumulator.correlation(), data.corr())
+        pd.testing.assert_frame_equal(accumulator.covariance(), data.cov())
+
+    def test_merged_chunks_match_pandas(self, data):
+        accumulators = [CovarianceAccumulator.from_frame(data.iloc[i:i + 37]) for i in range(0, len(data), 37)]
+        merged = accumulators[0]
+        for accumulator in accumulators[1:]:
+            merged.merge(accumulator)
+        pd.testing.assert_frame_equal(merged.correlation(), data.corr())
+
+    def test_too_few_rows_give_nan(self):
+        accumulator = CovarianceAccumulator.from_frame(pd.DataFrame({'a': [1.0], 'b': [2.0]}))
+        assert accumulator.correlation().isnull().all().all()
+
+
+def rank_errors(sketch, values, quantiles):
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, sketch.quantile(quantiles), side='right') / len(ordered)
+    return np.abs(ranks - quantiles)
+
+
+class TestQuantileSketch:
+    def test_exact_below_k_values(self):
+        values = np.random.default_rng(0).normal(size=150)
+        sketch = QuantileSketch(k=200).update(values)
+        np.testing.assert_allclose(sketch.quantile([0.1, 0.5, 0.9]), np.quantile(values, [0.1, 0.5, 0.9]))
+
+    def test_rank_error_is_bounded(self):
+        values = np.random.default_rng(1).lognormal(size=200_000)
+        sketch = QuantileSketch(k=200)
+        for i in range(0, len(values), 30_000):
+            sketch.update(values[i:i + 30_000])
+        quantiles = np.linspace(0.01, 0.99, 99)
+        assert rank_errors(sketch, values, quantiles).max() < 0.02
+        assert sum(map(len, sketch.levels)) < 3 * 200
+
+    def test_merged_sketches_match_the_stream(self):
+        values = np.random.default_rng(2).normal(size=100_000)
+        parts = [QuantileSketch(seed=i).update(values[i::4]) for i in range(4)]
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        assert merged.count == len(values)
+        assert (merged.min, merged.max) == (values.min(), values.max())
+        assert rank_errors(merged, values, np.array([0.05, 0.25, 0.5, 0.75, 0.95])).max() < 0.02
+
+    def test_extremes_are_exact(self):
+        values = np.random.default_rng(3).normal(size=10_000)
+        sketch = QuantileSketch(k=50).update(values)
+        assert sketch.quantile(0) == values.min()
+        assert sketch.quantile(1) == values.max()
+
+    def test_missing_values_are_ignored(self):
+        sketch = QuantileSketch().update([1.0, np.nan, 3.0])
+        assert sketch.count == 2
+        assert sketch.quantile(0.5) == 2.0
+
+    def test_empty_sketch_gives_nan(self):
+        assert np.isnan(QuantileSketch().quantile(0.5))
+        assert np.isnan(QuantileSketch().update([np.nan]).min)
+
+
+class TestStatisticsAccumulator:
+    def test_summary_matches_describe(self, data):
+        # Fewer rows than k, so the quartiles are exact too
+        pd.testing.assert_frame_equal(StatisticsAccumulator.from_frame(data).summary(), data.describe())
+
+    def test_chunks_from_other_processes_merge(self, data):
+        parts = [pickle.loads(pickle.dumps(StatisticsAccumulator.from_frame(data.iloc[i:i + 50], k=16)))
+                 for i in range(0, len(data), 50)]
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        pd.testing.assert_frame_equal(merged.correlation(), data.corr())
+        pd.testing.assert_frame_equal(merged.summary().loc[['count', 'mean', 'std', 'min', 'max']],
+                                      data.describe().loc[['count', 'mean', 'std', 'min', 'max']])
+        medians = merged.summary().loc['50%']
+        assert (medians - data.median()).abs().max() < data.std().max() / 2
+
+
+class TestGroupedStatistics:
+    @pytest.fixture
+    def grouped(self, data):
+        return data.assign(group=np.resize(['x', 'y', 'z'], len(data)))
+
+    def test_correlation_matches_groupby(self, grouped):
+        statistics = GroupedStatistics.from_frame(grouped, ['a', 'b', 'c'], 'group')
+        pd.testing.assert_frame_equal(statistics.correlation(), grouped.groupby('group')[['a', 'b', 'c']].corr())
+
+    def test_groups_spread_over_blocks(self, grouped, monkeypatch):
+        monkeypatch.setattr(StreamingStatistics, 'BLOCK_ROWS', 7)
+        # Rows without a group key are left out, as groupby leaves them out
+        grouped = grouped.assign(group=grouped['group'].where(np.arange(len(grouped)) % 11 != 0))
+        statistics = GroupedStatistics.from_frame(grouped, ['a', 'b', 'c'], 'group')
+        pd.testing.assert_frame_equal(statistics.covariance(), grouped.groupby('group')[['a', 'b', 'c']].cov())
+        counts = statistics.summary().xs('count', level=1)['a']
+        assert counts.to_dict() == grouped.groupby('group')['a'].count().to_dict()
+
+    def test_chunks_with_new_groups_merge(self, grouped):
+        first = GroupedStatistics.from_frame(grouped[grouped['group'] != 'z'], ['a', 'b', 'c'], 'group')
+        second = GroupedStatistics.from_frame(grouped[grouped['group'] != 'x'], ['a', 'b', 'c'], 'group')
+        merged = first.merge(second)
+        assert sorted(merged.groups) == ['x', 'y', 'z']
+        assert merged.summary().loc[('y', 'count'), 'a'] == 2 * (grouped['group'] == 'y').sum()
+
+    def test_merge_leaves_the_other_unchanged(self, grouped):
+        first = GroupedStatistics.from_frame(grouped[grouped['group'] == 'x'], ['a', 'b', 'c'], 'group')
+        second = GroupedStatistics.from_frame(grouped[grouped['group'] == 'z'], ['a', 'b', 'c'], 'group')
+        before = second.summary()
+        first.merge(second)
+        assert first.groups['z'] is not second.groups['z']
+        # Updating the merged result does not reach the accumulators it was merged from
+        first.update(grouped)
+        pd.testing.assert_frame_equal(second.summary(), before)
+        assert first.summary().loc[('z', 'count'), 'a'] == 2 * (grouped['group'] == 'z').sum()
+
+    def test_several_keys(self, grouped):
+        grouped = grouped.assign(half=np.arange(len(grouped)) < 100)
+        statistics = GroupedStatistics.from_frame(grouped, ['a', 'b'], ['group', 'half'])
+        expected = grouped.groupby(['group', 'half'])[['a', 'b']].cov()
+        pd.testing.assert_frame_equal(statistics.covariance(), expected)
@@ -0,0 +1,67 @@
+import pytest
+from TableQuery import parse_filter_query, filter_frame, sort_frame, query_table
+import pandas as pd
+
+
+@pytest.fixture
+def sample_data():
+    return pd.DataFrame({
+        'Country': pd.Categorical(['Canada', 'Germany', 'France', 'Canada', 'Mexico']),
+        'Sales': [100.0, 250.0, None, 400.0, 50.0],
+        'Date': pd.to_datetime(['2014-01-01', '2014-06-01', '2013-12-01', '2014-06-01', '2014-02-01']),
+    })
+
+
+class TestParseFilterQuery:
+    def test_parses_clauses(self):
+        clauses = parse_filter_query('{Sales} >= 100 && {Country} icontains "can"')
+        assert clauses == [('Sales', 'ge', '100', True), ('Country', 'contains', 'can', False)]
+
+    def test_empty_query(self):
+        assert parse_filter_query('') == []
+        assert parse_filter_query(None) == []
+
+    def test_invalid_expression(self):
+        with pytest.raises(ValueError):
+            parse_filter_query('Sales > 100')
+
+
+class TestFilterFrame:
+    def test_numeric_comparison(self, sample_data):
+        assert filter_frame(sample_data, '{Sales} > 100')['Sales'].tolist() == [250.0, 400.0]
+
+    def test_categorical_contains(self, sample_data):
+        result = filter_frame(sample_data, '{Country} icontains CAN')
+        assert result['Country'].tolist() == ['Canada', 'Canada']
+        assert len(filter_frame(sample_data, '{Country} scontains CAN')) == 0
+
+    def test_categorical_equality(self, sample_data):
+        assert len(filter_frame(sample_data, '{Country} = Canada')) == 2
+        assert len(filter_frame(sample_data, '{Country} s= canada')) == 0
+
+    def test_date_prefix(self, sample_data):
+        assert len(filter_frame(sample_data, '{Date} datestartswith 2014-06')) == 2
+        assert len(filter_frame(sample_data, '{Date} datestartswith 2014')) == 4
+
+    def test_blank(self, sample_data):
+        assert filter_frame(sample_data, '{Sales} is blank')['Country'].tolist() == ['France']
+
+    def test_combined(self, sample_data):
+        assert len(filter_frame(sample_data, '{Country} = Canada && {Sales} < 200')) == 1
+
+    def test_unknown_column(self, sample_data):
+        with pytest.raises(ValueError):
+            filter_frame(sample_data, '{Region} = EU')
+
+
+def test_sort_frame(sample_data):
+    result = sort_frame(sample_data, [{'column_id': 'Country', 'direction': 'asc'}, {'column_id': 'Sales', 'direction': 'desc'}])
+    assert result['Sales'].tolist()[:2] == [400.0, 100.0]
+
+
+def test_query_table_returns_single_page(sample_data):
+    records, page_count = query_table(sample_data, page_current=1, page_size=2,
+                                      sort_by=[{'column_id': 'Sales', 'direction': 'desc'}])
+    assert page_count == 3
+    assert [record['Sales'] for record in records] == [100.0, 50.0]
+    assert records[0]['Date'] == '2014-01-01'
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from benchmarks import suite, synthetic
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(synthetic, 'BLOCK_ROWS', 100)
+
+
+class TestSynthetic:
+    def test_same_seed_gives_the_same_prefix(self, small_blocks):
+        # Sizes ending inside a block and spanning several blocks share their first rows
+        long = synthetic.generate_financials(350, seed=3)
+        pd.testing.assert_frame_equal(synthetic.generate_financials(150, seed=3), long.head(150))
+        pd.testing.assert_frame_equal(synthetic.generate_financials(40, seed=3), long.head(40))
+        assert not synthetic.generate_financials(40, seed=4).equals(long.head(40))
+
+    @pytest.mark.parametrize('file_format', ['json', 'ndjson', 'xml'])
+    def test_every_format_reads_back_like_the_csv(self, small_blocks, tmp_path, file_format):
+        csv_path = synthetic.write_financials(250, str(tmp_path / 'data.csv'), 'csv', seed=1)
+        path = synthetic.write_financials(250, str(tmp_path / f'data.{file_format}'), file_format, seed=1)
+        expected = suite.INGESTIONS['csv']().ingest_data(csv_path)
+        assert len(expected) == 250
+        pd.testing.assert_frame_equal(suite.INGESTIONS[file_format]().ingest_data(path), expected)
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            synthetic.write_financials(10, str(tmp_path / 'data.parquet'), 'parquet')
+
+
+def result(target, seconds, peak):
+    return suite.record('process', target, 'csv', 1000, 'memory', seconds, peak)
+
+
+class TestCompare:
+    def test_flags_results_beyond_the_threshold(self):
+        baseline = {'results': [result('Fast', 0.10, 1000), result('Lean', 0.10, 1000)]}
+        results = [result('Fast', 0.13, 1000), result('Lean', 0.11, 1100)]
+        regressions = suite.compare(results, baseline, threshold=0.2)
+        assert [(regression['target'], regression['metric']) for regression in regressions] == [('Fast', 'seconds')]
+        assert regressions[0]['ratio'] == pytest.approx(1.3)
+
+    def test_memory_growth_is_flagged(self):
+        baseline = {'results': [result('Lean', 0.10, 1000)]}
+        regressions = suite.compare([result('Lean', 0.10, 1500)], baseline, threshold=0.2)
+        assert [regression['metric'] for regression in regressions] == ['peak_bytes']
+
+    def test_noisy_timings_and_new_benchmarks_are_not_flagged(self):
+        baseline = {'results': [result('Tiny', 0.001, None)]}
+        results = [result('Tiny', 0.005, None), result('New', 10.0, 10 ** 9)]
+        assert suite.compare(results, baseline, threshold=0.2) == []
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import threading
+import types
+import dash
+import pandas as pd
+import pytest
+import dashboard
+from RefreshScheduler import RefreshScheduler
+
+
+# Stands in for the loaded CrossFilter: poll_loading only reads its fingerprint
+def loaded(version):
+    return types.SimpleNamespace(fingerprint=lambda: version)
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    source = tmp_path / 'data.csv'
+    source.write_text('x')
+    versions = ['v1']
+    scheduler = RefreshScheduler(lambda: loaded(versions[-1]), [str(source)], interval=60, watch=False)
+    monkeypatch.setattr(dashboard, 'dashboard_data', scheduler)
+    yield versions
+    scheduler.stop(timeout=5)
+
+
+# A scheduler whose load waits for `release` and then returns `load()`
+@pytest.fixture
+def blocked_loading(tmp_path, monkeypatch):
+    source = tmp_path / 'data.csv'
+    source.write_text('x')
+    release = threading.Event()
+
+    def install(load):
+        def blocked():
+            release.wait(5)
+            return load()
+        scheduler = RefreshScheduler(blocked, [str(source)], interval=60, watch=False)
+        monkeypatch.setattr(dashboard, 'dashboard_data', scheduler)
+        return scheduler
+
+    yield install, release
+    release.set()
+    dashboard.dashboard_data.stop(timeout=5)
+
+
+def test_import_does_not_ingest(tmp_path):
+    # In a fresh interpreter, with a data file that does not exist: importing succeeds and
+    # nothing has started loading until a request (or the script entry point) asks for it
+    script = ('import dashboard; data = dashboard.dashboard_data; '
+              'assert data._thread is None and not data.done and data.refreshes == 0')
+    environment = dict(os.environ, DASHBOARD_DATA=str(tmp_path / 'missing.csv'))
+    result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=environment, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+class TestWhileLoading:
+    def test_callbacks_keep_their_placeholders(self, blocked_loading):
+        install, release = blocked_loading
+        install(lambda: loaded('v1'))
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.poll_loading(1, False)
+        assert dashboard.dashboard_data._thread.is_alive()
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.update_filter_options(False)
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.update_charts(False, *[None] * (len(dashboard.FILTER_DIMENSIONS) + 2))
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.update_table_page(False, 0, 10, [], '')
+        release.set()
+        dashboard.dashboard_data.get(timeout=5)
+        assert dashboard.poll_loading(2, False)[0] == 'v1'
+
+    def test_load_failure_is_reported(self, blocked_loading):
+        install, release = blocked_loading
+
+        def fail():
+            raise FileNotFoundError('datasets/Financials.csv')
+
+        scheduler = install(fail)
+        release.set()
+        scheduler.start()
+        with pytest.raises(FileNotFoundError):
+            scheduler.get(timeout=5)
+        version, interval, status = dashboard.poll_loading(1, False)
+        assert version is False and interval == dashboard.REFRESH_INTERVAL * 1000
+        assert status == 'Loading the data failed: datasets/Financials.csv'
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.update_filter_options(False)
+
+
+def test_import_leaves_pandas_options_alone():
+    # Set by the entry points, not by importing the module
+    assert pd.get_option('mode.copy_on_write') is False
+
+
+class TestPollLoading:
+    def test_stores_the_data_version_and_keeps_polling(self, versions):
+        dashboard.dashboard_data.get(timeout=5)
+        version, interval, status = dashboard.poll_loading(1, False)
+        assert version == 'v1' and status == ''
+        assert interval == dashboard.REFRESH_INTERVAL * 1000
+
+    def test_same_version_does_not_update(self, versions):
+        dashboard.dashboard_data.get(timeout=5)
+        with pytest.raises(dash.exceptions.PreventUpdate):
+            dashboard.poll_loading(2, 'v1')
+
+    def test_refreshed_data_updates_open_pages(self, versions):
+        dashboard.dashboard_data.get(timeout=5)
+        versions.append('v2')
+        assert dashboard.dashboard_data.refresh()
+        assert dashboard.poll_loading(3, 'v1')[0] == 'v2'
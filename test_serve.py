@@ -0,0 +1,232 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import urllib.request
+from importlib.util import find_spec
+import pytest
+from serve import _parse_bind, serve_gunicorn, serve_prefork
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='the pre-fork server needs os.fork')
+
+
+# Answers every request with the pid of the worker serving it
+def pid_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def get(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5) as response:
+                return int(response.read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+# The data the workers serve; only the parent process changes it, in reload()
+DATA = {'version': 1}
+
+
+# Answers every request with the worker's pid and the version of the data it inherited
+def data_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [f'{os.getpid()} {DATA["version"]}'.encode()]
+
+
+# A data source the parent watches: check() sees a new version named in the trigger file,
+# reload() loads it (once the release file exists) and logs the pid it was loaded in
+class VersionSource:
+    def __init__(self, directory, blocking=False):
+        self.trigger = directory / 'version'
+        self.release = directory / 'release'
+        self.loads = directory / 'loads'
+        if not blocking:
+            self.release.touch()
+
+    def version(self):
+        return int(self.trigger.read_text()) if self.trigger.exists() else DATA['version']
+
+    def check(self):
+        return self.version() != DATA['version']
+
+    def reload(self):
+        while not self.release.exists():
+            time.sleep(0.01)
+        DATA['version'] = self.version()
+        with open(self.loads, 'a') as file:
+            file.write(f'{os.getpid()}\n')
+        return True
+
+    def serve(self, target, port, **kwargs):
+        process = multiprocessing.get_context('fork').Process(
+            target=target, args=(data_app, f'127.0.0.1:{port}', 2),
+            kwargs={'check': self.check, 'reload': self.reload, 'reload_interval': 0.05, **kwargs})
+        process.start()
+        return process
+
+
+def wait_for_version(port, version, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if get_text(port).split()[1] == version:
+                return
+        except OSError:
+            pass
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def wait_for_exit(pid, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def get_text(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5) as response:
+                return response.read().decode()
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def server():
+    port = free_port()
+    process = multiprocessing.get_context('fork').Process(
+        target=serve_prefork, args=(pid_app, f'127.0.0.1:{port}', 2))
+    process.start()
+    yield process, port
+    if process.is_alive():
+        os.kill(process.pid, signal.SIGTERM)
+    process.join(10)
+
+
+class TestParseBind:
+    def test_host_and_port(self):
+        assert _parse_bind('127.0.0.1:8050') == ('127.0.0.1', 8050)
+
+    def test_port_only_listens_everywhere(self):
+        assert _parse_bind(':8050') == ('0.0.0.0', 8050)
+
+
+class TestPreforkServer:
+    def test_requests_are_served_by_forked_workers(self, server):
+        process, port = server
+        worker = get(port)
+        assert worker not in (os.getpid(), process.pid)
+
+    def test_dead_worker_is_replaced(self, server):
+        process, port = server
+        worker = get(port)
+        os.kill(worker, signal.SIGKILL)
+        # The surviving worker or the replacement keeps serving
+        for _ in range(5):
+            assert get(port) != worker
+
+    def test_sigterm_stops_the_workers(self, server):
+        process, port = server
+        get(port)
+        os.kill(process.pid, signal.SIGTERM)
+        process.join(10)
+        assert process.exitcode == 0
+        with pytest.raises(OSError):
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=2)
+
+    def test_reload_in_the_parent_replaces_the_workers(self, tmp_path):
+        port = free_port()
+        source = VersionSource(tmp_path)
+        process = source.serve(serve_prefork, port)
+        try:
+            first_pid, version = get_text(port).split()
+            assert version == '1'
+            source.trigger.write_text('2')
+            wait_for_version(port, '2')
+            # The replaced workers finish and exit
+            wait_for_exit(int(first_pid))
+            # Loaded once, by the parent, and served by new workers forked after the load
+            assert source.loads.read_text().split() == [str(process.pid)]
+            for _ in range(5):
+                pid, version = get_text(port).split()
+                assert version == '2' and pid != first_pid
+        finally:
+            os.kill(process.pid, signal.SIGTERM)
+            process.join(10)
+        assert process.exitcode == 0
+
+    def test_workers_dying_during_a_reload_are_reaped_and_replaced_after_it(self, tmp_path):
+        port = free_port()
+        source = VersionSource(tmp_path, blocking=True)
+        process = source.serve(serve_prefork, port)
+        try:
+            worker = int(get_text(port).split()[0])
+            source.trigger.write_text('2')
+            time.sleep(0.3)
+            # The reload is running: the dead worker is reaped and the other one keeps serving
+            os.kill(worker, signal.SIGKILL)
+            wait_for_exit(worker)
+            for _ in range(5):
+                pid, version = get_text(port).split()
+                assert int(pid) != worker and version == '1'
+            source.release.touch()
+            wait_for_version(port, '2')
+        finally:
+            os.kill(process.pid, signal.SIGTERM)
+            process.join(10)
+        assert process.exitcode == 0
+
+    def test_sigterm_during_a_reload_stops_the_server(self, tmp_path):
+        port = free_port()
+        source = VersionSource(tmp_path, blocking=True)
+        process = source.serve(serve_prefork, port)
+        get_text(port)
+        source.trigger.write_text('2')
+        time.sleep(0.3)
+        os.kill(process.pid, signal.SIGTERM)
+        process.join(10)
+        assert process.exitcode == 0
+        assert not source.loads.exists()
+
+
+@pytest.mark.skipif(find_spec('gunicorn') is None, reason='gunicorn is not installed')
+class TestGunicornServer:
+    def test_reload_in_the_master_replaces_the_workers(self, tmp_path):
+        port = free_port()
+        source = VersionSource(tmp_path)
+        process = source.serve(serve_gunicorn, port, threads=2)
+        try:
+            first_pid, version = get_text(port, timeout=30).split()
+            assert version == '1'
+            source.trigger.write_text('2')
+            wait_for_version(port, '2')
+            wait_for_exit(int(first_pid), timeout=40)
+            # Loaded once, in the master's main thread (SIGALRM and on_reload), before forking
+            assert source.loads.read_text().split() == [str(process.pid)]
+            for _ in range(5):
+                pid, version = get_text(port).split()
+                assert version == '2' and pid != first_pid
+        finally:
+            os.kill(process.pid, signal.SIGTERM)
+            process.join(40)